@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module benchmarks the export of an Nginx Resolution Tree with thousands of server names, both
+serially and fanned out over pools of threads and processes of increasing size. For each
+configuration it prints the best time and the speedup over the serial export, that is, the scaling
+curve of the export on the machine it runs on.
+
+Each run exports into a fresh directory, so that every file is rendered and written. Run it from the
+root of the project, optionally passing the number of server names and the largest pool to try:
+
+    $ python -m benchmarks.export 4000 8
+"""
+
+from os import cpu_count
+from shutil import rmtree
+from sys import argv
+from tempfile import mkdtemp
+from time import perf_counter
+
+from nrt.nrt import Nrt
+
+REPEAT = 3
+
+
+def generate_nrt(server_names):
+    """
+    Returns an Nrt with the given number of server names, each served at two addresses with a few
+    locations, some of which proxied to Green Unicorn.
+    """
+    directives = []
+    for index in range(server_names):
+        domain = "tenant%d.example.com" % (index)
+        for port in ("80", "8080"):
+            directives.append({ "signature" : "app%d:0.0.0.0:%s:%s:/" % (index, port, domain)})
+            directives.append({ "signature" : "app%d:0.0.0.0:%s:%s:/static/" % (index, port, domain), "parameters" : {"deny" : ["10.0.0.0/8"]}})
+            directives.append({
+                                "signature" : "app%d:0.0.0.0:%s:%s:/api/" % (index, port, domain),
+                                "parameters" : {"language" : "python", "gunicorn" : {"ip" : "10.1.%d.%d" % (index // 256 % 256, index % 256), "port" : "8000"}},
+                                })
+    return Nrt(**{"directives" : directives})
+
+
+def time_export(handle_nrt, workers, pool):
+    """
+    Returns the best time needed to export the given Nrt into an empty directory.
+    """
+    best = None
+    for _ in range(REPEAT):
+        path = mkdtemp()
+        start = perf_counter()
+        handle_nrt.export(path, workers=workers, pool=pool)
+        elapsed = perf_counter() - start
+        rmtree(path)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    """
+    Runs the benchmark and prints the scaling curve.
+    """
+    server_names = int(argv[1]) if len(argv) > 1 else 4000
+    max_workers = int(argv[2]) if len(argv) > 2 else max(cpu_count() or 1, 2)
+    handle_nrt = generate_nrt(server_names)
+
+    serial = time_export(handle_nrt, 1, "thread")
+    print("Exporting %d server names on %s CPU(s), best of %d:" % (server_names, cpu_count(), REPEAT))
+    print("    %-8s %7s %9s %7s" % ("pool", "workers", "time", "speedup"))
+    print("    %-8s %7d %7.3f s %6.2fx" % ("serial", 1, serial, 1.0))
+    workers = 2
+    while workers <= max_workers:
+        for pool in ("thread", "process"):
+            elapsed = time_export(handle_nrt, workers, pool)
+            print("    %-8s %7d %7.3f s %6.2fx" % (pool, workers, elapsed, serial / elapsed))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
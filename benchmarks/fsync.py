@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module benchmarks the durable write of thousands of virtual host files on a local file system,
+comparing two strategies:
+
+    - per file: each file is written, fsynced and renamed into place, and the directory fsynced,
+      before the next one.
+    - batched: all the files are written into a staging directory, fsynced in batches, renamed into
+      place and, finally, the directory is fsynced once. This is what Nrt.export does.
+
+Both strategies write into a temporary directory of the given parent, which defaults to the current
+one, since the temporary directory of the system may be in memory. Run it from the root of the
+project, optionally passing the number of files and the parent directory:
+
+    $ python -m benchmarks.fsync 2000 /var/tmp
+"""
+
+from os import fsync, getcwd, replace
+from os.path import join
+from shutil import rmtree
+from sys import argv
+from tempfile import mkdtemp
+from time import perf_counter
+
+from nrt.vhost import commit, ENCODING, fsync_directory, stage, write
+
+CONTENT = "".join("    location /location%d/ {\n        allow all;\n    }\n" % (index) for index in range(40))
+
+
+def per_file(path, files):
+    """
+    Writes, fsyncs and renames each file into place, then fsyncs the directory, before moving to
+    the next one.
+    """
+    staging = stage(path)
+    for index in range(files):
+        filename = "tenant%d.conf" % (index)
+        with open(join(staging, filename), "w", encoding=ENCODING, newline="") as handle:
+            handle.write(CONTENT)
+            handle.flush()
+            fsync(handle.fileno())
+        replace(join(staging, filename), join(path, filename))
+        fsync_directory(path)
+
+
+def batched(path, files):
+    """
+    Stages all the files, then commits them at once.
+    """
+    staging = stage(path)
+    filenames = ["tenant%d.conf" % (index) for index in range(files)]
+    for filename in filenames:
+        write(join(staging, filename), [CONTENT])
+    commit(path, staging, filenames, [])
+
+
+def main():
+    """
+    Runs the benchmark and prints the throughput of each strategy.
+    """
+    files = int(argv[1]) if len(argv) > 1 else 2000
+    parent = argv[2] if len(argv) > 2 else getcwd()
+
+    print("Writing %d files of %d bytes into %s:" % (files, len(CONTENT), parent))
+    for strategy in (per_file, batched):
+        path = mkdtemp(dir=parent)
+        start = perf_counter()
+        strategy(path, files)
+        elapsed = perf_counter() - start
+        rmtree(path)
+        print("    %-9s %8.3f s %10.0f files/s" % (strategy.__name__, elapsed, files / elapsed))
+
+
+if __name__ == '__main__':
+    main()
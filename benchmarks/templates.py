@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module benchmarks the rendering of Location blocks through compiled templates against naive,
+per call, string formatting of the same text.
+
+Two naive strategies are measured: formatting the whole template source with str.format, which
+parses it at each call, and building the block line by line with the % operator. The export of the
+blocks, which memoizes them in the render cache, is measured as well: after the first round all of
+its lookups are hits. Run it from the root of the project:
+
+    $ python -m benchmarks.templates
+"""
+
+from timeit import repeat
+
+from nrt.blocks.location.gunicorn import GunicornLocationBlock
+
+LOCATIONS = 1000
+REPEAT = 5
+
+
+def naive_format(blocks):
+    """
+    Renders the given blocks by formatting the template source at each call.
+    """
+    source = GunicornLocationBlock.TEMPLATE.source
+    return [source.format(**block._values()) for block in blocks]
+
+
+def naive_lines(blocks):
+    """
+    Renders the given blocks line by line, formatting each line at each call.
+    """
+    rendered = []
+    for block in blocks:
+        lines = ["    location %s {" % (block.location)]
+        lines.append(block._export_rules().rstrip("\n"))
+        lines.append("        proxy_pass http://%s;" % (block.upstream))
+        lines.append("        proxy_http_version %s;" % ("1.1"))
+        lines.append("        proxy_set_header Connection %s;" % ("\"\""))
+        lines.append("        proxy_set_header Host %s;" % ("$host"))
+        lines.append("        proxy_set_header X-Real-IP %s;" % ("$remote_addr"))
+        lines.append("        proxy_set_header X-Forwarded-For %s;" % ("$proxy_add_x_forwarded_for"))
+        lines.append("        proxy_set_header X-Forwarded-Proto %s;" % ("$scheme"))
+        lines.append("    }")
+        rendered.append("\n".join(lines) + "\n")
+    return rendered
+
+
+def compiled(blocks):
+    """
+    Renders the given blocks through their compiled template.
+    """
+    return [block.TEMPLATE.render(block._values()) for block in blocks]
+
+
+def cached(blocks):
+    """
+    Exports the given blocks, which are rendered through their compiled template and memoized.
+    """
+    return [block.export() for block in blocks]
+
+
+def main():
+    """
+    Runs the benchmark and prints, for each strategy, the best time needed to render the blocks.
+    """
+    blocks = [GunicornLocationBlock(**{
+                                        "allow" : ["10.0.%d.0/24" % (index % 256)],
+                                        "location" : "/location%d/" % (index),
+                                        "port" : str(8000 + index % 1000),
+                                        }
+                                    ) for index in range(LOCATIONS)]
+    if not cached(blocks) == compiled(blocks) == naive_format(blocks) == naive_lines(blocks):
+        raise SystemError("The strategies do not render the same blocks!")
+
+    print("Rendering %d Gunicorn location blocks, best of %d:" % (LOCATIONS, REPEAT))
+    for strategy in (naive_format, naive_lines, compiled, cached):
+        best = min(repeat(lambda: strategy(blocks), number=10, repeat=REPEAT)) / 10
+        print("    %-13s %8.3f ms" % (strategy.__name__, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
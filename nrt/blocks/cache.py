@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines the LRUCache class, a bounded cache of rendered blocks.
+
+Many blocks of an Nginx Resolution Tree are rendered into the very same text: the same location,
+served the same way, under many server names. Rather than rendering them again and again, blocks
+store their text in an LRUCache, keyed on their render-relevant state. Once the cache is full, the
+least recently used entry is evicted to make room for a new one.
+
+The cache counts its hits and misses, which tell whether it is properly sized for a workload. It is
+safe to be shared among threads.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache(object):
+    """
+    Represent a bounded, least recently used, cache.
+    """
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes an LRUCache instance. The maximum number of entries it holds can be optionally
+        passed in, and defaults to 4096.
+        """
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.maxsize = kwargs.get("maxsize", 4096)
+
+
+    def __len__(self):
+        """
+        Returns the number of entries currently held by the cache.
+        """
+        return len(self._entries)
+
+
+    def clear(self):
+        """
+        Removes all the entries of the cache and resets its counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def get(self, key):
+        """
+        Returns the entry of the given key, marking it as the most recently used, or None if the
+        cache does not hold it.
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+
+    @property
+    def maxsize(self):
+        """
+        Returns the maximum number of entries the cache holds.
+        """
+        return self._maxsize
+
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        """
+        Sets the maximum number of entries the cache holds, evicting the least recently used ones
+        if it currently holds more. A maximum size of 0 disables the cache.
+        """
+        if not isinstance(maxsize, int) or isinstance(maxsize, bool):
+            raise TypeError("The maximum size must be an integer, not %s." % (type(maxsize).__name__))
+        if maxsize < 0:
+            raise ValueError("%s is not a valid maximum size." % (maxsize))
+
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+
+    def put(self, key, value):
+        """
+        Stores the given entry as the most recently used one, evicting the least recently used
+        entry if the cache is full.
+        """
+        with self._lock:
+            if self._maxsize == 0:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
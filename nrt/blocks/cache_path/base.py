@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines an Nginx proxy cache path block. A proxy cache path block defines a zone, a
+named cache stored in a directory, which Location blocks cache the responses of their backends in.
+
+Caching the responses of a backend for as little as a second, a microcache, spares it most of the
+requests for the same content under load. Which responses are cached, for how long, and how stale
+ones are served, is a matter of the Location blocks. The zone itself, its directory and its sizes,
+is defined once in the http context, no matter how many Location blocks cache into it.
+
+All the settings of a cache, both those of its zone and those of the Location blocks, are listed
+in SETTINGS, along with their default and the pattern their values are validated against. Those of
+the zone are listed in ZONE_SETTINGS too. Nginx rejects two zones stored in the same directory, so
+the path of a zone has no fixed default: it defaults, through default_path, to a directory named
+after the zone, below ROOT_PATH.
+
+As Upstream blocks do, proxy cache path blocks are exported as a stream of fragments. The block is
+rendered through a Template compiled at import time.
+"""
+
+from re import compile
+
+from nrt.blocks.template import Template
+
+ROOT_PATH = "/var/cache/nginx"
+SIZE_REGEX = compile(r"^\d+[kKmMgG]?$")
+TIME_REGEX = compile(r"^\d+(ms|s|m|h|d|w|M|y)?$")
+
+SETTINGS = {
+            "inactive" : ("10m", TIME_REGEX),
+            "key" : ("$scheme$request_method$host$request_uri", compile(r"^\S+$")),
+            "lock" : ("on", compile(r"^(on|off)$")),
+            "max_size" : ("1g", SIZE_REGEX),
+            "path" : (None, compile(r"^/\S*$")),
+            "size" : ("10m", SIZE_REGEX),
+            "use_stale" : ("updating error timeout http_500 http_502 http_503 http_504", compile(r"^(off|((error|timeout|invalid_header|updating|http_500|http_502|http_503|http_504|http_403|http_404|http_429) ?)+)$")),
+            "valid" : ("1s", TIME_REGEX),
+            "zone" : ("microcache", compile(r"^\w+$")),
+            }
+ZONE_SETTINGS = ("inactive", "max_size", "path", "size", "zone")
+
+
+def default_path(zone):
+    """
+    Returns the default path of the given zone: a directory named after it, below ROOT_PATH.
+    """
+    return "%s/%s" % (ROOT_PATH, zone)
+
+
+class CachePathBlock(object):
+    """
+    Represent an Nginx proxy cache path block.
+    """
+    TEMPLATE = Template(
+                        "proxy_cache_path {path} levels=1:2 keys_zone={zone}:{size} max_size={max_size} inactive={inactive} use_temp_path=off;\n"
+                        )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a CachePathBlock instance. Any of the ZONE_SETTINGS can be optionally passed
+        in. The path defaults to the default_path of the zone.
+        """
+        self._settings = dict((setting, SETTINGS[setting][0]) for setting in ZONE_SETTINGS)
+        for setting in ZONE_SETTINGS:
+            if kwargs.get(setting, None) is not None:
+                self.settings = (setting, kwargs.get(setting))
+        if self._settings["path"] is None:
+            self._settings["path"] = default_path(self._settings["zone"])
+
+
+    def export(self):
+        """
+        Yields the block as properly formatted fragments ready to be written, in order, to a
+        configuration file.
+        """
+        yield self.TEMPLATE.render(self._settings)
+
+
+    @property
+    def settings(self):
+        """
+        Returns the settings of the zone, a dictionary mapping each of the ZONE_SETTINGS to its
+        value.
+        """
+        return dict(self._settings)
+
+
+    @settings.setter
+    def settings(self, setting):
+        """
+        Sets one of the ZONE_SETTINGS, given as a (name, value) pair.
+        """
+        if setting is None:
+            raise ValueError("A setting must be given.")
+        if not isinstance(setting, tuple) or len(setting) != 2:
+            raise TypeError("The setting must be a (name, value) pair, not %s." % (type(setting).__name__))
+
+        name, value = setting
+        if name not in ZONE_SETTINGS:
+            raise ValueError("%s is not a valid cache zone setting." % (name))
+        if not isinstance(value, str):
+            raise TypeError("The cache zone setting %s must be a string, not %s." % (name, type(value).__name__))
+        if not SETTINGS[name][1].match(value):
+            raise ValueError("%s is not a valid value for the cache zone setting %s." % (value, name))
+
+        self._settings[name] = value
+
+
+    @property
+    def zone(self):
+        """
+        Returns the name of the zone.
+        """
+        return self._settings["zone"]
@@ -15,22 +15,89 @@ or range that is allowed to access the content. deny is the other way around. By
 applies an allow all rule.
 
 It has an export method that returns a properly formatted string representation of the whole object
-so that it can be used to create a virtual host file.
+so that it can be used to create a virtual host file. Deny rules are rendered before allow rules,
+and a rule involving 'all' always comes last, since Nginx applies the first rule that matches. A
+block that only allows specific IPs or ranges denies anybody else.
+
+Each Location block class renders itself through a Template, compiled once at import time.
+Subclasses replace the template and add the values of their own fields.
+
+Rendered blocks are memoized in RENDER_CACHE, a bounded LRU cache shared by all the Location block
+classes. A block is keyed on its class and on all the state it is rendered from, so that identical
+blocks, such as the same location served the same way under many server names, are rendered once.
+Subclasses adding fields to the template must add them to the key as well.
+
+Blocks passing requests to an Upstream block name it through their upstream property, which is
+None for basic blocks, serving content themselves. Their structure is their state apart from that
+upstream: two blocks with the same structure are rendered the same way, but for the Upstream block
+they pass requests to.
 """
 
+from nrt.blocks.cache import LRUCache
+from nrt.blocks.template import Template
+
+RENDER_CACHE = LRUCache(**{"maxsize" : 4096})
+
 
 class LocationBlock(object):
     """
     Represent a basic Nginx Location block.
     """
+    TEMPLATE = Template(
+                        "    location {location} {{\n"
+                        "{rules}"
+                        "    }}\n"
+                        )
+
+
     def __init__(self, *args, **kwargs):
         """
-        Initializes a LocationBlock instance.
+        Initializes a LocationBlock instance. The location, allow and deny directives can be
+        optionally passed in.
         """
         self._allow = []
         self._deny = []
         self._location = None
 
+        for directive in kwargs.get("allow", []):
+            self.allow = directive
+        for directive in kwargs.get("deny", []):
+            self.deny = directive
+        if kwargs.get("location", None) is not None:
+            self.location = kwargs.get("location")
+
+
+    def _export_rules(self):
+        """
+        Returns the allow and deny rules of the block, as a string of properly indented lines, in
+        the order Nginx must evaluate them.
+        """
+        lines = ["        deny %s;\n" % (directive) for directive in self.deny if directive != "all"]
+        lines.extend(["        allow %s;\n" % (directive) for directive in self.allow if directive != "all"])
+        if "all" in self.deny or ("all" not in self.allow and self.allow):
+            lines.append("        deny all;\n")
+        elif "all" in self.allow:
+            lines.append("        allow all;\n")
+        return "".join(lines)
+
+
+    def _key(self):
+        """
+        Returns the key of the block within the render cache, made of its class and of all the
+        state it is rendered from.
+        """
+        return (type(self), self.location, tuple(self.allow), tuple(self.deny))
+
+
+    def _values(self):
+        """
+        Returns the values of the fields of the block's template.
+        """
+        return {
+                "location" : self.location,
+                "rules" : self._export_rules(),
+                }
+
 
     @property
     def allow(self):
@@ -63,7 +130,7 @@ class LocationBlock(object):
         return self._deny
 
 
-    @allow.setter
+    @deny.setter
     def deny(self, directive=None):
         """
         Adds a deny directive to those currently part of the Location block. The content of a
@@ -81,8 +148,15 @@ class LocationBlock(object):
     def export(self):
         """
         Returns the class as a properly formatted string ready to be used to create a virtual host.
+        The rendered string is taken from the render cache, if an identical block was rendered
+        recently.
         """
-        pass
+        key = self._key()
+        rendered = RENDER_CACHE.get(key)
+        if rendered is None:
+            rendered = self.TEMPLATE.render(self._values())
+            RENDER_CACHE.put(key, rendered)
+        return rendered
 
 
     @property
@@ -93,7 +167,7 @@ class LocationBlock(object):
         return self._location
 
 
-    @allow.setter
+    @location.setter
     def location(self, location=None):
         """
         Adds a location literal or regex to those currently part of the Location block. The
@@ -101,7 +175,23 @@ class LocationBlock(object):
         """
         if location is None:
             raise ValueError("A location name must be given.")
-        if not isinstance(directive, str):
+        if not isinstance(location, str):
             raise TypeError("The location name must be a string, not %s." % (type(location).__name__))
 
         self._location = location
+
+
+    def structure(self):
+        """
+        Returns the state of the block apart from the Upstream block it passes requests to, if
+        any. A basic block does not pass requests anywhere, so its structure is its whole state.
+        """
+        return self._key()
+
+
+    @property
+    def upstream(self):
+        """
+        Returns the name of the Upstream block the requests are passed to, None for a basic block.
+        """
+        return None
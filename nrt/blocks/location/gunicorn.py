@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines a Green Unicorn Nginx Location block. It extends the basic Location block with
+the directives required to proxy the requests to a Green Unicorn server, which is identified by its
+IP address and port. They default to 127.0.0.1 and 8000, respectively. A server sharing the host
+with Nginx can rather be reached through a unix domain socket, which spares the TCP loopback.
+
+Requests are not proxied to the address of the server but to an Upstream block named after it, so
+that all the Location blocks proxying to the same server share the same pool of keepalive
+connections. To be kept alive, connections must use HTTP/1.1 and must not forward the Connection
+header of the client. The settings of the pool, keepalive and keepalive_requests, are optional and
+default to those of the Upstream block, which is built by the Nrt out of all the Location blocks
+proxying to the server.
+
+A Location block can also balance its requests among a pool of Green Unicorn servers, its backends,
+each with an optional weight and max_fails. The Upstream block of a pool is named after a digest of
+its servers and of its balancing method, so that identical pools share the same Upstream block.
+
+The responses of the server can optionally be cached, for a short time, into a proxy cache zone.
+Only one request at a time is passed to the server to fill the cache, and stale responses are
+served while the cache is being updated or if the server fails.
+
+Requests can also be proxied to a variable, holding the name of the Upstream block, rather than to
+the Upstream block itself. A single block then serves many server names, each with its own Green
+Unicorn server.
+"""
+
+from hashlib import sha1
+
+from nrt.blocks.cache_path.base import default_path, SETTINGS
+from nrt.blocks.location.base import LocationBlock
+from nrt.blocks.map.base import VARIABLE_REGEX
+from nrt.blocks.template import Template
+from nrt.blocks.upstream.base import upstream_name
+
+
+class GunicornLocationBlock(LocationBlock):
+    """
+    Represent a Green Unicorn Nginx Location block.
+    """
+    TEMPLATE = Template(
+                        "    location {location} {{\n"
+                        "{rules}"
+                        "        proxy_pass http://{upstream};\n"
+                        "        proxy_http_version 1.1;\n"
+                        "        proxy_set_header Connection \"\";\n"
+                        "        proxy_set_header Host $host;\n"
+                        "        proxy_set_header X-Real-IP $remote_addr;\n"
+                        "        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;\n"
+                        "        proxy_set_header X-Forwarded-Proto $scheme;\n"
+                        "{cache}"
+                        "    }}\n"
+                        )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a GunicornLocationBlock instance. On top of those of the basic Location block,
+        the IP address and the port, or the unix socket, of the Green Unicorn server, as well as
+        the keepalive and keepalive_requests settings of its Upstream block, can be optionally
+        passed in. Rather than a single server, a pool of backends can be given, along with the
+        method, and its key, requests are balanced among them with. The settings of the cache of
+        the responses, as well as a variable requests are proxied to in place of the Upstream
+        block, can be optionally passed in too.
+        """
+        super(GunicornLocationBlock, self).__init__(*args, **kwargs)
+        self._backends = []
+        self.ip = kwargs.get("ip", "127.0.0.1")
+        self.port = kwargs.get("port", "8000")
+        self.socket = kwargs.get("socket", None)
+        self.keepalive = kwargs.get("keepalive", None)
+        self.keepalive_requests = kwargs.get("keepalive_requests", None)
+        self.hash_key = kwargs.get("hash_key", "$remote_addr")
+        self.method = kwargs.get("method", "round_robin")
+        self.cache = kwargs.get("cache", None)
+        self.variable = kwargs.get("variable", None)
+        for backend in kwargs.get("backends", []):
+            self.backends = backend
+
+
+    def _key(self):
+        """
+        Returns the key of the block within the render cache.
+        """
+        return self.structure() + (self._pass(),)
+
+
+    def _pass(self):
+        """
+        Returns what the requests are proxied to: the variable of the block, if any, or the name
+        of its Upstream block.
+        """
+        if self.variable is not None:
+            return self.variable
+        return self.upstream
+
+
+    def _values(self):
+        """
+        Returns the values of the fields of the block's template.
+        """
+        values = super(GunicornLocationBlock, self)._values()
+        values["upstream"] = self._pass()
+        values["cache"] = ""
+        if self.cache is not None:
+            values["cache"] = (
+                                "        proxy_cache %(zone)s;\n"
+                                "        proxy_cache_valid %(valid)s;\n"
+                                "        proxy_cache_key %(key)s;\n"
+                                "        proxy_cache_lock %(lock)s;\n"
+                                "        proxy_cache_use_stale %(use_stale)s;\n"
+                                ) % (self.cache)
+        return values
+
+
+    @property
+    def backends(self):
+        """
+        Returns the backends of the pool of Green Unicorn servers, empty if the block proxies to a
+        single server.
+        """
+        return self._backends
+
+
+    @backends.setter
+    def backends(self, backend):
+        """
+        Adds a backend to the pool of Green Unicorn servers. A backend is a dictionary holding its
+        ip and port, which default to 127.0.0.1 and 8000, or its socket, and optionally its weight
+        and max_fails.
+        """
+        if backend is None:
+            raise ValueError("A backend must be given.")
+        if not isinstance(backend, dict):
+            raise TypeError("The backend must be a dictionary, not %s." % (type(backend).__name__))
+
+        if backend.get("socket", None) is not None:
+            server = "unix:%s" % (backend["socket"])
+        else:
+            server = "%s:%s" % (backend.get("ip", "127.0.0.1"), backend.get("port", "8000"))
+        for setting in ("weight", "max_fails"):
+            if setting in backend.keys():
+                server += " %s=%s" % (setting, backend[setting])
+        self._backends.append(server)
+
+
+    @property
+    def cache(self):
+        """
+        Returns the settings of the cache of the responses of the Green Unicorn server, or None if
+        they are not cached.
+        """
+        return self._cache
+
+
+    @cache.setter
+    def cache(self, cache):
+        """
+        Sets the settings of the cache of the responses of the Green Unicorn server. Any of the
+        cache SETTINGS not given takes its default, the path the default_path of the zone, while
+        None disables the cache.
+        """
+        if cache is None:
+            self._cache = None
+            return
+        if not isinstance(cache, dict):
+            raise TypeError("GUnicorn's cache must be a dictionary, not %s." % (type(cache).__name__))
+
+        settings = dict((setting, default) for setting, (default, regex) in SETTINGS.items())
+        for setting, value in cache.items():
+            if setting not in SETTINGS:
+                raise ValueError("%s is not a valid cache setting." % (setting))
+            if not isinstance(value, str):
+                raise TypeError("The cache setting %s must be a string, not %s." % (setting, type(value).__name__))
+            if not SETTINGS[setting][1].match(value):
+                raise ValueError("%s is not a valid value for the cache setting %s." % (value, setting))
+            settings[setting] = value
+        if settings["path"] is None:
+            settings["path"] = default_path(settings["zone"])
+
+        self._cache = settings
+
+
+    @property
+    def hash_key(self):
+        """
+        Returns the key the hash method balances the backends on.
+        """
+        return self._hash_key
+
+
+    @hash_key.setter
+    def hash_key(self, hash_key):
+        """
+        Sets the key the hash method balances the backends on.
+        """
+        if not isinstance(hash_key, str):
+            raise TypeError("GUnicorn's hash key must be a string, not %s." % (type(hash_key).__name__))
+
+        self._hash_key = hash_key
+
+
+    @property
+    def ip(self):
+        """
+        Returns the IP address of the Green Unicorn server.
+        """
+        return self._ip
+
+
+    @ip.setter
+    def ip(self, ip):
+        """
+        Sets the IP address of the Green Unicorn server. The goodness of the IP itself is not
+        validated.
+        """
+        if ip is None:
+            raise ValueError("An IP must be given.")
+        if not isinstance(ip, str):
+            raise TypeError("GUnicorn's IP must be a string, not %s." % (type(ip).__name__))
+
+        self._ip = ip
+
+
+    @property
+    def keepalive(self):
+        """
+        Returns the number of idle connections to the Green Unicorn server each worker keeps open,
+        or None if the default of the Upstream block applies.
+        """
+        return self._keepalive
+
+
+    @keepalive.setter
+    def keepalive(self, keepalive):
+        """
+        Sets the number of idle connections to the Green Unicorn server each worker keeps open.
+        None restores the default of the Upstream block.
+        """
+        if keepalive is not None and not isinstance(keepalive, str):
+            raise TypeError("GUnicorn's keepalive must be a string, not %s." % (type(keepalive).__name__))
+
+        self._keepalive = keepalive
+
+
+    @property
+    def keepalive_requests(self):
+        """
+        Returns the number of requests served through a connection to the Green Unicorn server
+        before it is closed, or None if the default of the Upstream block applies.
+        """
+        return self._keepalive_requests
+
+
+    @keepalive_requests.setter
+    def keepalive_requests(self, keepalive_requests):
+        """
+        Sets the number of requests served through a connection to the Green Unicorn server before
+        it is closed. None restores the default of the Upstream block.
+        """
+        if keepalive_requests is not None and not isinstance(keepalive_requests, str):
+            raise TypeError("GUnicorn's keepalive_requests must be a string, not %s." % (type(keepalive_requests).__name__))
+
+        self._keepalive_requests = keepalive_requests
+
+
+    @property
+    def method(self):
+        """
+        Returns the method requests are balanced among the backends with.
+        """
+        return self._method
+
+
+    @method.setter
+    def method(self, method):
+        """
+        Sets the method requests are balanced among the backends with. It is validated by the
+        Upstream block.
+        """
+        if not isinstance(method, str):
+            raise TypeError("GUnicorn's method must be a string, not %s." % (type(method).__name__))
+
+        self._method = method
+
+
+    @property
+    def port(self):
+        """
+        Returns the port of the Green Unicorn server.
+        """
+        return self._port
+
+
+    @port.setter
+    def port(self, port):
+        """
+        Sets the port of the Green Unicorn server.
+        """
+        if port is None:
+            raise ValueError("A port must be given.")
+        if not isinstance(port, str):
+            raise TypeError("GUnicorn's port must be a string, not %s." % (type(port).__name__))
+
+        self._port = port
+
+
+    @property
+    def servers(self):
+        """
+        Returns the servers of the Upstream block the requests are proxied to, each with its
+        parameters.
+        """
+        if self._backends:
+            return list(self._backends)
+        if self.socket is not None:
+            return ["unix:%s" % (self.socket)]
+        return ["%s:%s" % (self.ip, self.port)]
+
+
+    @property
+    def socket(self):
+        """
+        Returns the path of the unix socket of the Green Unicorn server, or None if it is reached
+        through its IP address and port.
+        """
+        return self._socket
+
+
+    @socket.setter
+    def socket(self, socket):
+        """
+        Sets the path of the unix socket of the Green Unicorn server. None reaches it through its
+        IP address and port. The goodness of the path itself is not validated.
+        """
+        if socket is not None and not isinstance(socket, str):
+            raise TypeError("GUnicorn's socket must be a string, not %s." % (type(socket).__name__))
+
+        self._socket = socket
+
+
+    def structure(self):
+        """
+        Returns the state of the block apart from the Upstream block it passes requests to.
+        """
+        cache = None if self.cache is None else tuple(sorted(self.cache.items()))
+        return super(GunicornLocationBlock, self)._key() + (cache,)
+
+
+    @property
+    def upstream(self):
+        """
+        Returns the name of the Upstream block the requests are proxied to. It is made of the IP
+        address and port, or of the unix socket, of the Green Unicorn server, followed by a digest
+        of them or, for a pool, of a digest of its servers and balancing method.
+        """
+        if self._backends:
+            digest = sha1("\n".join([self.method, self.hash_key] + self._backends).encode("utf-8"))
+            return "gunicorn_pool_%s" % (digest.hexdigest()[:12])
+        return upstream_name("gunicorn", self.servers[0])
+
+
+    @property
+    def variable(self):
+        """
+        Returns the variable the requests are proxied to in place of the Upstream block, or None.
+        """
+        return self._variable
+
+
+    @variable.setter
+    def variable(self, variable):
+        """
+        Sets the variable the requests are proxied to in place of the Upstream block, such as
+        $nrt_backend, which a Map block sets to the name of an Upstream block. None proxies them to
+        the Upstream block.
+        """
+        if variable is not None and not isinstance(variable, str):
+            raise TypeError("The variable must be a string, not %s." % (type(variable).__name__))
+        if variable is not None and not VARIABLE_REGEX.match(variable):
+            raise ValueError("%s is not a valid variable." % (variable))
+
+        self._variable = variable
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines a PHP-FPM Nginx Location block. It extends the basic Location block with the
+FastCGI directives required to pass the requests to a PHP-FPM pool, which is identified by its IP
+address and port. They default to 127.0.0.1 and 9000, respectively. A pool sharing the host with
+Nginx can rather be reached through a unix domain socket, which spares the TCP loopback.
+
+The location of the block is replaced by a regular expression that matches any .php file below it.
+
+As Green Unicorn Location blocks do, requests are not passed to the address of the pool but to an
+Upstream block named after it, which keeps a pool of connections to it alive. FastCGI connections
+are only kept alive if Nginx asks PHP-FPM not to close them, through fastcgi_keep_conn. The buffers
+responses are read into, fastcgi_buffer_size for the headers and fastcgi_buffers for the body,
+default to 32k and 16 16k, so that the typical response of a PHP application is held in memory
+rather than spilled to a temporary file.
+
+As Green Unicorn Location blocks do, requests can rather be passed to a variable holding the name
+of the Upstream block.
+"""
+
+from re import compile
+
+from nrt.blocks.location.base import LocationBlock
+from nrt.blocks.map.base import VARIABLE_REGEX
+from nrt.blocks.template import Template
+from nrt.blocks.upstream.base import upstream_name
+
+BUFFER_SIZE_REGEX = compile(r"^\d+[kKmM]?$")
+BUFFERS_REGEX = compile(r"^\d+ \d+[kKmM]?$")
+
+
+class PhpfpmLocationBlock(LocationBlock):
+    """
+    Represent a PHP-FPM Nginx Location block.
+    """
+    TEMPLATE = Template(
+                        "    location ~ ^{location}.+\\.php(/|$) {{\n"
+                        "{rules}"
+                        "        fastcgi_split_path_info ^(.+\\.php)(/.*)$;\n"
+                        "        fastcgi_pass {upstream};\n"
+                        "        fastcgi_keep_conn on;\n"
+                        "        fastcgi_buffer_size {fastcgi_buffer_size};\n"
+                        "        fastcgi_buffers {fastcgi_buffers};\n"
+                        "        fastcgi_index index.php;\n"
+                        "        include fastcgi_params;\n"
+                        "        fastcgi_param SCRIPT_FILENAME $document_root$fastcgi_script_name;\n"
+                        "        fastcgi_param PATH_INFO $fastcgi_path_info;\n"
+                        "    }}\n"
+                        )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a PhpfpmLocationBlock instance. On top of those of the basic Location block,
+        the IP address and the port, or the unix socket, of the PHP-FPM pool, the keepalive and
+        keepalive_requests settings of its Upstream block, the FastCGI buffers and a variable
+        requests are passed to in place of the Upstream block can be optionally passed in.
+        """
+        super(PhpfpmLocationBlock, self).__init__(*args, **kwargs)
+        self.ip = kwargs.get("ip", "127.0.0.1")
+        self.port = kwargs.get("port", "9000")
+        self.socket = kwargs.get("socket", None)
+        self.fastcgi_buffer_size = kwargs.get("fastcgi_buffer_size", "32k")
+        self.fastcgi_buffers = kwargs.get("fastcgi_buffers", "16 16k")
+        self.keepalive = kwargs.get("keepalive", None)
+        self.keepalive_requests = kwargs.get("keepalive_requests", None)
+        self.variable = kwargs.get("variable", None)
+
+
+    def _key(self):
+        """
+        Returns the key of the block within the render cache.
+        """
+        return self.structure() + (self._pass(),)
+
+
+    def _pass(self):
+        """
+        Returns what the requests are passed to: the variable of the block, if any, or the name of
+        its Upstream block.
+        """
+        if self.variable is not None:
+            return self.variable
+        return self.upstream
+
+
+    def _values(self):
+        """
+        Returns the values of the fields of the block's template.
+        """
+        values = super(PhpfpmLocationBlock, self)._values()
+        values["fastcgi_buffer_size"] = self.fastcgi_buffer_size
+        values["fastcgi_buffers"] = self.fastcgi_buffers
+        values["upstream"] = self._pass()
+        return values
+
+
+    @property
+    def fastcgi_buffer_size(self):
+        """
+        Returns the size of the buffer the headers of the responses of the PHP-FPM pool are read
+        into.
+        """
+        return self._fastcgi_buffer_size
+
+
+    @fastcgi_buffer_size.setter
+    def fastcgi_buffer_size(self, fastcgi_buffer_size):
+        """
+        Sets the size of the buffer the headers of the responses of the PHP-FPM pool are read into,
+        such as 32k.
+        """
+        if fastcgi_buffer_size is None:
+            raise ValueError("A FastCGI buffer size must be given.")
+        if not isinstance(fastcgi_buffer_size, str):
+            raise TypeError("PHP-FPM's FastCGI buffer size must be a string, not %s." % (type(fastcgi_buffer_size).__name__))
+        if not BUFFER_SIZE_REGEX.match(fastcgi_buffer_size):
+            raise ValueError("%s is not a valid FastCGI buffer size." % (fastcgi_buffer_size))
+
+        self._fastcgi_buffer_size = fastcgi_buffer_size
+
+
+    @property
+    def fastcgi_buffers(self):
+        """
+        Returns the number and the size of the buffers the responses of the PHP-FPM pool are read
+        into.
+        """
+        return self._fastcgi_buffers
+
+
+    @fastcgi_buffers.setter
+    def fastcgi_buffers(self, fastcgi_buffers):
+        """
+        Sets the number and the size of the buffers the responses of the PHP-FPM pool are read
+        into, such as 16 16k.
+        """
+        if fastcgi_buffers is None:
+            raise ValueError("The FastCGI buffers must be given.")
+        if not isinstance(fastcgi_buffers, str):
+            raise TypeError("PHP-FPM's FastCGI buffers must be a string, not %s." % (type(fastcgi_buffers).__name__))
+        if not BUFFERS_REGEX.match(fastcgi_buffers):
+            raise ValueError("%s are not valid FastCGI buffers." % (fastcgi_buffers))
+
+        self._fastcgi_buffers = fastcgi_buffers
+
+
+    @property
+    def ip(self):
+        """
+        Returns the IP address of the PHP-FPM pool.
+        """
+        return self._ip
+
+
+    @ip.setter
+    def ip(self, ip):
+        """
+        Sets the IP address of the PHP-FPM pool. The goodness of the IP itself is not validated.
+        """
+        if ip is None:
+            raise ValueError("An IP must be given.")
+        if not isinstance(ip, str):
+            raise TypeError("PHP-FPM's IP must be a string, not %s." % (type(ip).__name__))
+
+        self._ip = ip
+
+
+    @property
+    def keepalive(self):
+        """
+        Returns the number of idle connections to the PHP-FPM pool each worker keeps open, or None
+        if the default of the Upstream block applies.
+        """
+        return self._keepalive
+
+
+    @keepalive.setter
+    def keepalive(self, keepalive):
+        """
+        Sets the number of idle connections to the PHP-FPM pool each worker keeps open. None
+        restores the default of the Upstream block.
+        """
+        if keepalive is not None and not isinstance(keepalive, str):
+            raise TypeError("PHP-FPM's keepalive must be a string, not %s." % (type(keepalive).__name__))
+
+        self._keepalive = keepalive
+
+
+    @property
+    def keepalive_requests(self):
+        """
+        Returns the number of requests served through a connection to the PHP-FPM pool before it
+        is closed, or None if the default of the Upstream block applies.
+        """
+        return self._keepalive_requests
+
+
+    @keepalive_requests.setter
+    def keepalive_requests(self, keepalive_requests):
+        """
+        Sets the number of requests served through a connection to the PHP-FPM pool before it is
+        closed. None restores the default of the Upstream block.
+        """
+        if keepalive_requests is not None and not isinstance(keepalive_requests, str):
+            raise TypeError("PHP-FPM's keepalive_requests must be a string, not %s." % (type(keepalive_requests).__name__))
+
+        self._keepalive_requests = keepalive_requests
+
+
+    @property
+    def port(self):
+        """
+        Returns the port of the PHP-FPM pool.
+        """
+        return self._port
+
+
+    @port.setter
+    def port(self, port):
+        """
+        Sets the port of the PHP-FPM pool.
+        """
+        if port is None:
+            raise ValueError("A port must be given.")
+        if not isinstance(port, str):
+            raise TypeError("PHP-FPM's port must be a string, not %s." % (type(port).__name__))
+
+        self._port = port
+
+
+    @property
+    def servers(self):
+        """
+        Returns the servers of the Upstream block the requests are passed to.
+        """
+        return [self.target]
+
+
+    @property
+    def socket(self):
+        """
+        Returns the path of the unix socket of the PHP-FPM pool, or None if it is reached through
+        its IP address and port.
+        """
+        return self._socket
+
+
+    @socket.setter
+    def socket(self, socket):
+        """
+        Sets the path of the unix socket of the PHP-FPM pool. None reaches it through its IP
+        address and port. The goodness of the path itself is not validated.
+        """
+        if socket is not None and not isinstance(socket, str):
+            raise TypeError("PHP-FPM's socket must be a string, not %s." % (type(socket).__name__))
+
+        self._socket = socket
+
+
+    def structure(self):
+        """
+        Returns the state of the block apart from the Upstream block it passes requests to.
+        """
+        return super(PhpfpmLocationBlock, self)._key() + (self.fastcgi_buffer_size, self.fastcgi_buffers)
+
+
+    @property
+    def target(self):
+        """
+        Returns the address requests are passed to: the unix socket of the PHP-FPM pool, if any,
+        or its IP address and port.
+        """
+        if self.socket is not None:
+            return "unix:%s" % (self.socket)
+        return "%s:%s" % (self.ip, self.port)
+
+
+    @property
+    def upstream(self):
+        """
+        Returns the name of the Upstream block the requests are passed to, made of the IP address
+        and port, or of the unix socket, of the PHP-FPM pool, followed by a digest of them.
+        """
+        return upstream_name("phpfpm", self.target)
+
+
+    @property
+    def variable(self):
+        """
+        Returns the variable the requests are passed to in place of the Upstream block, or None.
+        """
+        return self._variable
+
+
+    @variable.setter
+    def variable(self, variable):
+        """
+        Sets the variable the requests are passed to in place of the Upstream block, such as
+        $nrt_backend, which a Map block sets to the name of an Upstream block. None passes them to
+        the Upstream block.
+        """
+        if variable is not None and not isinstance(variable, str):
+            raise TypeError("The variable must be a string, not %s." % (type(variable).__name__))
+        if variable is not None and not VARIABLE_REGEX.match(variable):
+            raise ValueError("%s is not a valid variable." % (variable))
+
+        self._variable = variable
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines a static Nginx Location block. It extends the basic Location block with the
+directives that make Nginx serve static content, such as assets, fast.
+
+Files are sent straight from the page cache through sendfile and, thanks to tcp_nopush, the headers
+and the beginning of a file fill the same packet. The descriptors and metadata of the files served
+most often are kept in the open file cache, rather than looked up for each request. Clients are
+told, through expires, how long they can cache the files, and precompressed files, such as
+style.css.gz, are served in place of their originals to the clients accepting them, through
+gzip_static, rather than compressed at each request. Optionally, a Cache-Control header can be
+added on top of the one set by expires.
+
+Each of those settings defaults to a value fit for long lived assets, and is validated against the
+pattern listed, along with the default, in SETTINGS.
+"""
+
+from re import compile
+
+from nrt.blocks.location.base import LocationBlock
+from nrt.blocks.template import Template
+
+SWITCH_REGEX = compile(r"^(on|off)$")
+TIME_REGEX = compile(r"^\d+(ms|s|m|h|d|w|M|y)?$")
+
+SETTINGS = {
+            "cache_control" : (None, compile(r"^[\w\-=, ]+$")),
+            "expires" : ("30d", compile(r"^(off|max|epoch|\d+(ms|s|m|h|d|w|M|y)?)$")),
+            "gzip_static" : ("on", compile(r"^(on|off|always)$")),
+            "open_file_cache" : ("max=10000 inactive=60s", compile(r"^(off|max=\d+( inactive=\d+(ms|s|m|h|d|w|M|y)?)?)$")),
+            "open_file_cache_errors" : ("on", SWITCH_REGEX),
+            "open_file_cache_min_uses" : ("2", compile(r"^\d+$")),
+            "open_file_cache_valid" : ("60s", TIME_REGEX),
+            "sendfile" : ("on", SWITCH_REGEX),
+            "tcp_nopush" : ("on", SWITCH_REGEX),
+            }
+
+
+class StaticLocationBlock(LocationBlock):
+    """
+    Represent a static Nginx Location block.
+    """
+    TEMPLATE = Template(
+                        "    location {location} {{\n"
+                        "{rules}"
+                        "        sendfile {sendfile};\n"
+                        "        tcp_nopush {tcp_nopush};\n"
+                        "        open_file_cache {open_file_cache};\n"
+                        "        open_file_cache_valid {open_file_cache_valid};\n"
+                        "        open_file_cache_min_uses {open_file_cache_min_uses};\n"
+                        "        open_file_cache_errors {open_file_cache_errors};\n"
+                        "        expires {expires};\n"
+                        "        gzip_static {gzip_static};\n"
+                        "{cache_control}"
+                        "    }}\n"
+                        )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a StaticLocationBlock instance. On top of those of the basic Location block,
+        any of the SETTINGS can be optionally passed in.
+        """
+        super(StaticLocationBlock, self).__init__(*args, **kwargs)
+        self._settings = dict((setting, default) for setting, (default, regex) in SETTINGS.items())
+        for setting in SETTINGS:
+            if kwargs.get(setting, None) is not None:
+                self.settings = (setting, kwargs.get(setting))
+
+
+    def _key(self):
+        """
+        Returns the key of the block within the render cache.
+        """
+        return super(StaticLocationBlock, self)._key() + tuple(sorted(self._settings.items()))
+
+
+    def _values(self):
+        """
+        Returns the values of the fields of the block's template.
+        """
+        values = super(StaticLocationBlock, self)._values()
+        values.update(self._settings)
+        if self._settings["cache_control"] is None:
+            values["cache_control"] = ""
+        else:
+            values["cache_control"] = "        add_header Cache-Control \"%s\";\n" % (self._settings["cache_control"])
+        return values
+
+
+    @property
+    def settings(self):
+        """
+        Returns the settings of the block, a dictionary mapping each of the SETTINGS to its value.
+        """
+        return dict(self._settings)
+
+
+    @settings.setter
+    def settings(self, setting):
+        """
+        Sets one of the SETTINGS, given as a (name, value) pair.
+        """
+        if setting is None:
+            raise ValueError("A setting must be given.")
+        if not isinstance(setting, tuple) or len(setting) != 2:
+            raise TypeError("The setting must be a (name, value) pair, not %s." % (type(setting).__name__))
+
+        name, value = setting
+        if name not in SETTINGS:
+            raise ValueError("%s is not a valid static setting." % (name))
+        if not isinstance(value, str):
+            raise TypeError("The static setting %s must be a string, not %s." % (name, type(value).__name__))
+        if not SETTINGS[name][1].match(value):
+            raise ValueError("%s is not a valid value for the static setting %s." % (value, name))
+
+        self._settings[name] = value
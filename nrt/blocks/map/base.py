@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines an Nginx Map block. A Map block sets a variable out of the value of another
+one, the source, looking the latter up among its entries: each entry pairs a value of the source
+with the value the variable takes for it.
+
+Server blocks serving many server names the same way, apart from the Upstream blocks some of their
+locations pass requests to, are merged into a single server block by the Nrt. Each such location
+passes its requests to a variable, which a Map block sets, per host, to the name of the proper
+Upstream block. Variables are named by the Nrt, which prefixes them with nrt_. A Map block can
+optionally hold a default, the value the variable takes for any value of the source none of its
+entries maps, such as a request whose host is not among the merged server names.
+
+Map blocks live in the http context. As Server blocks do, they are exported as a stream of
+fragments, one entry at a time.
+"""
+
+from re import compile
+
+from nrt.blocks.template import Template
+
+VARIABLE_REGEX = compile(r"^\$\w+$")
+
+
+class MapBlock(object):
+    """
+    Represent an Nginx Map block.
+    """
+    TEMPLATE = Template(
+                        "map {source} {variable} {{\n"
+                        )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a MapBlock instance. The variable the block sets is mandatory. The source
+        variable, which defaults to $host, the default result, and the entries, given as (value,
+        result) pairs, can be optionally passed in.
+        """
+        self._entries = []
+        self._variable = None
+        self.default = kwargs.get("default", None)
+        self.source = kwargs.get("source", "$host")
+        self.variable = kwargs.get("variable", None)
+        for entry in kwargs.get("entries", []):
+            self.entries = entry
+
+
+    def export(self):
+        """
+        Yields the block as properly formatted fragments ready to be written, in order, to a
+        configuration file.
+        """
+        yield self.TEMPLATE.render({
+                                    "source" : self.source,
+                                    "variable" : self.variable,
+                                    }
+                                )
+        if self.default is not None:
+            yield "    default %s;\n" % (self.default)
+        for value, result in self.entries:
+            yield "    %s %s;\n" % (value, result)
+        yield "}\n"
+
+
+    @property
+    def default(self):
+        """
+        Returns the value the variable takes for a value of the source no entry maps, or None.
+        """
+        return self._default
+
+
+    @default.setter
+    def default(self, default):
+        """
+        Sets the value the variable takes for a value of the source no entry maps. None leaves the
+        variable empty for such values.
+        """
+        if default is not None and not isinstance(default, str):
+            raise TypeError("The default must be a string, not %s." % (type(default).__name__))
+
+        self._default = default
+
+
+    @property
+    def entries(self):
+        """
+        Returns the entries of the Map block, as (value, result) pairs.
+        """
+        return self._entries
+
+
+    @entries.setter
+    def entries(self, entry):
+        """
+        Adds an entry, a (value, result) pair, to those of the Map block. A value already mapped
+        cannot be mapped again. The goodness of the pair itself is not validated.
+        """
+        if entry is None:
+            raise ValueError("An entry must be given.")
+        if not isinstance(entry, tuple) or len(entry) != 2 or not all(isinstance(item, str) for item in entry):
+            raise TypeError("The entry must be a pair of strings, not %s." % (type(entry).__name__))
+        if entry[0] in [value for value, result in self._entries]:
+            raise ValueError("%s is already mapped." % (entry[0]))
+
+        self._entries.append(entry)
+
+
+    @property
+    def source(self):
+        """
+        Returns the variable the Map block looks up its entries by.
+        """
+        return self._source
+
+
+    @source.setter
+    def source(self, source):
+        """
+        Sets the variable the Map block looks up its entries by, such as $host.
+        """
+        if source is None:
+            raise ValueError("A source must be given.")
+        if not isinstance(source, str):
+            raise TypeError("The source must be a string, not %s." % (type(source).__name__))
+        if not VARIABLE_REGEX.match(source):
+            raise ValueError("%s is not a valid variable." % (source))
+
+        self._source = source
+
+
+    @property
+    def variable(self):
+        """
+        Returns the variable the Map block sets.
+        """
+        return self._variable
+
+
+    @variable.setter
+    def variable(self, variable):
+        """
+        Sets the variable the Map block sets, such as $nrt_backend.
+        """
+        if variable is None:
+            raise ValueError("A variable must be given.")
+        if not isinstance(variable, str):
+            raise TypeError("The variable must be a string, not %s." % (type(variable).__name__))
+        if not VARIABLE_REGEX.match(variable):
+            raise ValueError("%s is not a valid variable." % (variable))
+
+        self._variable = variable
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides the helpers used by Server blocks to minimize the Location blocks they hold.
+
+Nginx lets a location inherit the directives of the server it belongs to: a location which does not
+set a directive takes it from its server. Directives which can be repeated, such as
+proxy_set_header, are inherited all or nothing: a location setting any of them inherits none. So
+are the allow and deny rules, which together make a single list. Each directive, and the rules as a
+whole, thus make a family, inherited on its own.
+
+A family set the very same way by all the Location blocks of a Server block can be set once, at the
+server level, instead: each location then inherits it, and Nginx parses and stores it once. Families
+only valid in a location, such as proxy_pass, are never hoisted, and neither are the FastCGI
+parameters, since the include of fastcgi_params sets some of them in every PHP location.
+
+The families of a handler, such as the proxy_ ones, only matter to the locations passing requests
+to it, through proxy_pass or fastcgi_pass. They are hoisted if all those locations share them and
+no other location sets them: the other locations inherit them too, but never use them.
+
+An allow all rule ending the rules of a location is redundant, since Nginx grants access to a
+request no rule matches, and is dropped.
+
+Minimizing never changes how a request is served. The effective families of each location, those
+it sets and those it inherits, are computed before and after the minimization, and the Location
+blocks are left as they are if they differ. Unless a location matches the root prefix, some
+requests match no location at all, and are served with the families set at the server level. Only
+the families of a handler, which such requests never use, are then hoisted, and the server itself
+is checked the same way, as a location setting nothing.
+"""
+
+ACCESS = ("allow", "deny")
+HANDLERS = {
+            "fastcgi_" : "fastcgi_pass",
+            "proxy_" : "proxy_pass",
+            }
+CATCH_ALL = "location / {"
+NEVER_HOISTED = ("fastcgi_param", "fastcgi_pass", "fastcgi_split_path_info", "include", "proxy_pass")
+SERVER_INDENT = "    "
+
+
+def effective(server_lines, location_lines):
+    """
+    Returns the families a location serves requests with, as a dictionary mapping each family to
+    its lines, given the lines set at the server level and those set by the location, both as
+    lists of (family, line) pairs. A family the location does not set is inherited from the
+    server. Families of a handler the location does not pass requests to are left out, and the
+    rules are normalized, dropping a redundant allow all.
+    """
+    families = {}
+    for family, line in server_lines:
+        families.setdefault(family, []).append(line)
+    own = {}
+    for family, line in location_lines:
+        own.setdefault(family, []).append(line)
+    families.update(own)
+    for family in list(families):
+        if not relevant(family, location_lines):
+            del families[family]
+    if families.get("access", [])[-1:] == ["allow all;"]:
+        families["access"] = families["access"][:-1]
+    if not families.get("access", True):
+        del families["access"]
+    return dict((family, tuple(lines)) for family, lines in families.items())
+
+
+def family(line):
+    """
+    Returns the family of the given directive line: the name of the directive, or access for the
+    allow and deny rules.
+    """
+    name = line.split(" ", 1)[0].rstrip(";")
+    return "access" if name in ACCESS else name
+
+
+def minimize(locations):
+    """
+    Minimizes the given rendered Location blocks of a Server block. Returns a pair made of the
+    lines to set at the server level, properly indented, and the minimized Location blocks. The
+    families set the same way by all the Location blocks they matter to, if at least two, are
+    hoisted, unless they matter to a request matching none of them, and the redundant allow all
+    rules are dropped. The Location blocks are returned as they are if minimizing them would
+    change how a request is served, be it one matching none of them.
+    """
+    parsed = [parse(location) for location in locations]
+
+    for header, lines, footer in parsed:
+        access = [index for index, (family_name, line) in enumerate(lines) if family_name == "access"]
+        if access and lines[access[-1]][1] == "allow all;":
+            del lines[access[-1]]
+
+    hoisted = []
+    families = []
+    for header, lines, footer in parsed:
+        for family_name, line in lines:
+            if family_name not in families and family_name not in NEVER_HOISTED:
+                families.append(family_name)
+    fallback = not any(header.strip() == CATCH_ALL for header, lines, footer in parsed)
+    for family_name in families:
+        if fallback and relevant(family_name, []):
+            continue
+        shared = []
+        for header, lines, footer in parsed:
+            family_lines = [line for name, line in lines if name == family_name]
+            if relevant(family_name, lines):
+                shared.append(family_lines)
+            elif family_lines:
+                shared = []
+                break
+        if len(shared) > 1 and all(lines == shared[0] for lines in shared):
+            hoisted.extend((family_name, line) for line in shared[0])
+    if hoisted:
+        hoisted_families = set(family_name for family_name, line in hoisted)
+        parsed = [(header, [(name, line) for name, line in lines if name not in hoisted_families], footer) for header, lines, footer in parsed]
+
+    for location, (header, lines, footer) in zip(locations, parsed):
+        if effective([], parse(location)[1]) != effective(hoisted, lines):
+            return [], list(locations)
+    if fallback and effective([], []) != effective(hoisted, []):
+        return [], list(locations)
+
+    minimized = [header + "".join(["%s%s\n" % (SERVER_INDENT * 2, line) for name, line in lines]) + footer for header, lines, footer in parsed]
+    return ["%s%s\n" % (SERVER_INDENT, line) for name, line in hoisted], minimized
+
+
+def relevant(family, lines):
+    """
+    Returns whether the given family matters to a location setting the given lines, as (family,
+    line) pairs: the families of a handler only matter to the locations passing requests to it.
+    """
+    for prefix, directive in HANDLERS.items():
+        if family.startswith(prefix):
+            return any(name == directive for name, line in lines)
+    return True
+
+
+def parse(location):
+    """
+    Parses a rendered Location block into a triple made of its opening line, its directives, as a
+    list of (family, line) pairs whose lines are stripped of their indentation, and its closing
+    line.
+    """
+    lines = location.splitlines(True)
+    directives = [line.strip() for line in lines[1:-1] if line.strip()]
+    return lines[0], [(family(line), line) for line in directives], lines[-1]
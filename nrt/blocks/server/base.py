@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines a basic Nginx Server block. A Server block is defined by the address it listens
+to and by the server name it serves. It holds the Location blocks that serve the content of that
+server name at that address. A Server block serving the very same content at more addresses can
+listen to all of them, through a listen directive each.
+
+Server blocks are meant to be streamed to virtual host files. As such, the export method does not
+return the whole block at once but yields it fragment by fragment, one Location block at a time, so
+that the locations are never rendered all together in memory. The opening of the block is rendered
+through a Template compiled at import time.
+
+A Server block can optionally be minimized: the directives all its Location blocks share are set
+once, at the server level, and the redundant ones are dropped, as done by minimize. Its Location
+blocks are then all rendered before the block is, since they must be compared with each other, and
+the block records how many bytes minimizing saved.
+"""
+
+from nrt.blocks.minimize import minimize
+from nrt.blocks.template import Template
+
+
+class ServerBlock(object):
+    """
+    Represent a basic Nginx Server block.
+    """
+    TEMPLATE = Template(
+                        "server {{\n"
+                        "{listens}"
+                        "    server_name {server_name};\n"
+                        )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a ServerBlock instance. The listen address and the server name are mandatory.
+        Further addresses to listen to can be optionally passed in. The Location blocks are
+        optional and can be given as any iterable, which is only consumed when the block is
+        exported. Whether the block is minimized can be optionally passed in, and defaults to
+        False.
+        """
+        self._listen = None
+        self._listens = []
+        self._server_name = None
+        self.trimmed = 0
+        self.minimize = kwargs.get("minimize", False)
+        self.listen = kwargs.get("listen", None)
+        for listen in kwargs.get("listens", []):
+            self.listens = listen
+        self.server_name = kwargs.get("server_name", None)
+        self.locations = kwargs.get("locations", [])
+
+
+    def export(self):
+        """
+        Yields the block as properly formatted fragments ready to be written, in order, to a
+        virtual host file. A minimized block records, in trimmed, the number of bytes minimizing
+        saved.
+        """
+        yield self.TEMPLATE.render({
+                                    "listens" : "".join(["    listen %s;\n" % (listen) for listen in self.listens]),
+                                    "server_name" : self.server_name,
+                                    }
+                                )
+        if self.minimize:
+            locations = [location.export() for location in self.locations]
+            hoisted, minimized = minimize(locations)
+            self.trimmed = len("".join(locations).encode("utf-8")) - len("".join(hoisted + minimized).encode("utf-8"))
+            for line in hoisted:
+                yield line
+        else:
+            minimized = (location.export() for location in self.locations)
+        for location in minimized:
+            yield "\n"
+            yield location
+        yield "}\n"
+
+
+    @property
+    def listen(self):
+        """
+        Returns the address the Server block listens to.
+        """
+        return self._listen
+
+
+    @listen.setter
+    def listen(self, listen):
+        """
+        Sets the address the Server block listens to. The goodness of the address itself is not
+        validated.
+        """
+        if listen is None:
+            raise ValueError("A listen address must be given.")
+        if not isinstance(listen, str):
+            raise TypeError("The listen address must be a string, not %s." % (type(listen).__name__))
+
+        self._listen = listen
+
+
+    @property
+    def listens(self):
+        """
+        Returns all the addresses the Server block listens to, the listen address first.
+        """
+        return [self.listen] + self._listens
+
+
+    @listens.setter
+    def listens(self, listen):
+        """
+        Adds an address to those the Server block listens to, on top of the listen address. The
+        goodness of the address itself is not validated.
+        """
+        if listen is None:
+            raise ValueError("A listen address must be given.")
+        if not isinstance(listen, str):
+            raise TypeError("The listen address must be a string, not %s." % (type(listen).__name__))
+
+        if listen not in self.listens:
+            self._listens.append(listen)
+
+
+    @property
+    def minimize(self):
+        """
+        Returns whether the Server block is minimized.
+        """
+        return self._minimize
+
+
+    @minimize.setter
+    def minimize(self, minimize):
+        """
+        Sets whether the Server block is minimized.
+        """
+        if not isinstance(minimize, bool):
+            raise TypeError("The minimize must be a boolean, not %s." % (type(minimize).__name__))
+
+        self._minimize = minimize
+
+
+    @property
+    def server_name(self):
+        """
+        Returns the server name served by the Server block.
+        """
+        return self._server_name
+
+
+    @server_name.setter
+    def server_name(self, server_name):
+        """
+        Sets the server name served by the Server block. The goodness of the server name itself is
+        not validated.
+        """
+        if server_name is None:
+            raise ValueError("A server name must be given.")
+        if not isinstance(server_name, str):
+            raise TypeError("The server name must be a string, not %s." % (type(server_name).__name__))
+
+        self._server_name = server_name
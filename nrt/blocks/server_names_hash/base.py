@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines an Nginx server names hash block, which sizes the hash tables Nginx looks the
+server names of each address up in.
+
+Nginx builds a hash table of server names for each address it listens to. The table is split into
+buckets of server_names_hash_bucket_size bytes, each holding the names that hash to it, and Nginx
+searches the smallest table, up to server_names_hash_max_size buckets, whose buckets all fit their
+names. If a server name does not fit a bucket, or no table up to the maximum size fits all the
+names, Nginx refuses to start. If the buckets are too large, instead, looking a name up in them
+takes longer.
+
+A block is thus sized out of the number of server names of the busiest address and the length of
+the longest server name:
+
+    - the bucket size is the smallest power of two, no smaller than 64 bytes, fitting an element
+      of the longest name. An element takes a pointer, the name and two bytes, aligned to
+      pointers, and the bucket must also fit a terminating pointer.
+    - the maximum size is the smallest power of two, no smaller than 512, Nginx's default, holding
+      four buckets per server name, so that Nginx always finds a table whose buckets fit their
+      names.
+
+The Map blocks of merged server blocks are keyed on the server names of an address too, and their
+hash tables are built the same way. The block can thus optionally size them as well, through
+map_hash_max_size and map_hash_bucket_size.
+
+The block is rendered, along with a comment explaining its sizing, through Templates compiled at
+import time.
+"""
+
+from nrt.blocks.template import Template
+
+POINTER_SIZE = 8
+
+
+class ServerNamesHashBlock(object):
+    """
+    Represent an Nginx server names hash block.
+    """
+    TEMPLATE = Template(
+                        "# Sized for {count} server names at {address}, the busiest address, and for server\n"
+                        "# names up to {length} characters long.\n"
+                        "server_names_hash_max_size {max_size};\n"
+                        "server_names_hash_bucket_size {bucket_size};\n"
+                        )
+    MAPS_TEMPLATE = Template(
+                                "map_hash_max_size {max_size};\n"
+                                "map_hash_bucket_size {bucket_size};\n"
+                                )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes a ServerNamesHashBlock instance. The busiest address, the number of its server
+        names and the length of the longest server name are mandatory. Whether the hash tables of
+        the Map blocks are sized as well can be optionally passed in, and defaults to False.
+        """
+        self.address = kwargs.get("address", None)
+        self.count = kwargs.get("count", None)
+        self.length = kwargs.get("length", None)
+        self.maps = kwargs.get("maps", False)
+
+
+    def export(self):
+        """
+        Yields the block as properly formatted fragments ready to be written, in order, to a
+        configuration file.
+        """
+        yield self.TEMPLATE.render({
+                                    "address" : self.address,
+                                    "bucket_size" : str(self.bucket_size),
+                                    "count" : str(self.count),
+                                    "length" : str(self.length),
+                                    "max_size" : str(self.max_size),
+                                    }
+                                )
+        if self.maps:
+            yield self.MAPS_TEMPLATE.render({
+                                                "bucket_size" : str(self.bucket_size),
+                                                "max_size" : str(self.max_size),
+                                                }
+                                            )
+
+
+    @property
+    def address(self):
+        """
+        Returns the address serving the largest number of server names.
+        """
+        return self._address
+
+
+    @address.setter
+    def address(self, address):
+        """
+        Sets the address serving the largest number of server names.
+        """
+        if address is None:
+            raise ValueError("An address must be given.")
+        if not isinstance(address, str):
+            raise TypeError("The address must be a string, not %s." % (type(address).__name__))
+
+        self._address = address
+
+
+    @property
+    def bucket_size(self):
+        """
+        Returns the size, in bytes, of the buckets of the hash tables: the smallest power of two,
+        no smaller than 64, fitting an element of the longest server name and a terminating
+        pointer.
+        """
+        element = (POINTER_SIZE + self.length + 2 + POINTER_SIZE - 1) // POINTER_SIZE * POINTER_SIZE
+        bucket_size = 64
+        while bucket_size < element + POINTER_SIZE:
+            bucket_size *= 2
+        return bucket_size
+
+
+    @property
+    def count(self):
+        """
+        Returns the number of server names of the busiest address.
+        """
+        return self._count
+
+
+    @count.setter
+    def count(self, count):
+        """
+        Sets the number of server names of the busiest address.
+        """
+        if count is None:
+            raise ValueError("A count must be given.")
+        if not isinstance(count, int) or isinstance(count, bool):
+            raise TypeError("The count must be an integer, not %s." % (type(count).__name__))
+        if count < 0:
+            raise ValueError("%s is not a valid count." % (count))
+
+        self._count = count
+
+
+    @property
+    def length(self):
+        """
+        Returns the length of the longest server name.
+        """
+        return self._length
+
+
+    @length.setter
+    def length(self, length):
+        """
+        Sets the length of the longest server name.
+        """
+        if length is None:
+            raise ValueError("A length must be given.")
+        if not isinstance(length, int) or isinstance(length, bool):
+            raise TypeError("The length must be an integer, not %s." % (type(length).__name__))
+        if length < 0:
+            raise ValueError("%s is not a valid length." % (length))
+
+        self._length = length
+
+
+    @property
+    def maps(self):
+        """
+        Returns whether the hash tables of the Map blocks are sized as well.
+        """
+        return self._maps
+
+
+    @maps.setter
+    def maps(self, maps):
+        """
+        Sets whether the hash tables of the Map blocks are sized as well.
+        """
+        if not isinstance(maps, bool):
+            raise TypeError("The maps must be a boolean, not %s." % (type(maps).__name__))
+
+        self._maps = maps
+
+
+    @property
+    def max_size(self):
+        """
+        Returns the maximum number of buckets of the hash tables: the smallest power of two, no
+        smaller than 512, holding four buckets per server name.
+        """
+        max_size = 512
+        while max_size < 4 * self.count:
+            max_size *= 2
+        return max_size
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines the Template class, used by all the Nginx blocks to render themselves.
+
+A template is written with the same syntax of str.format: fields are enclosed in curly braces and
+literal curly braces, which Nginx blocks are full of, are doubled. Rather than being parsed each
+time a block is rendered, a template is parsed once, when it is created, into a list of literal
+fragments with empty slots for its fields. Blocks compile their templates at import time, so that
+rendering one of them only requires filling in the slots and joining the fragments.
+
+Fields are plain names: neither format specs nor conversions are supported, and the values of the
+fields must already be strings.
+"""
+
+from string import Formatter
+
+
+class Template(object):
+    """
+    Represent a compiled template.
+    """
+    __slots__ = ("_fields", "_fragments", "_source")
+
+
+    def __init__(self, source):
+        """
+        Initializes a Template instance, compiling the given source.
+        """
+        if source is None:
+            raise ValueError("A template source must be given.")
+        if not isinstance(source, str):
+            raise TypeError("The template source must be a string, not %s." % (type(source).__name__))
+
+        self._fields = []
+        self._fragments = []
+        self._source = source
+
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if literal:
+                self._fragments.append(literal)
+            if field is None:
+                continue
+            if not field or spec or conversion:
+                raise ValueError("%s is not a valid template field." % (field))
+            self._fields.append((len(self._fragments), field))
+            self._fragments.append(None)
+
+
+    @property
+    def fields(self):
+        """
+        Returns the names of the fields of the template, in the order they appear.
+        """
+        return [field for index, field in self._fields]
+
+
+    def render(self, values):
+        """
+        Returns the template with its fields replaced by the given values, a dictionary mapping
+        each field's name to a string.
+        """
+        fragments = list(self._fragments)
+        for index, field in self._fields:
+            fragments[index] = values[field]
+        return "".join(fragments)
+
+
+    @property
+    def source(self):
+        """
+        Returns the source the template was compiled from.
+        """
+        return self._source
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module defines an Nginx Upstream block. An Upstream block names a group of backend servers,
+which Location blocks proxy their requests to by name rather than by address.
+
+Upstream blocks are named after their servers, by the Location blocks using them: any character
+matched by NAME_REGEX, which is not allowed within a name, is replaced by an underscore. Since
+different servers may then read the same, such as /run/app-1.sock and /run/app_1.sock, the name
+of an Upstream block of a single server, given by upstream_name, ends with a short digest of the
+server.
+
+Upstream blocks live in the http context and must be defined once, no matter how many Location
+blocks use them. They also hold the pool of idle connections Nginx keeps open towards their
+servers: keepalive is the number of idle connections each worker keeps, and keepalive_requests the
+number of requests served through a connection before it is closed. They default to 32 and 1000,
+respectively. Without such a pool, Nginx opens a new connection to the backend for each request.
+
+Requests are balanced among the servers of an Upstream block through one of the METHODS: round robin,
+the default, least_conn, which picks the server with the fewest active connections, and hash, which
+picks the server by hashing a key, the client address by default.
+
+As Server blocks do, Upstream blocks are exported as a stream of fragments. The opening and the
+closing of the block are rendered through Templates compiled at import time.
+"""
+
+from hashlib import sha1
+from re import compile
+
+from nrt.blocks.template import Template
+
+METHODS = ("hash", "least_conn", "round_robin")
+NAME_REGEX = compile(r"\W")
+
+
+def upstream_name(prefix, server):
+    """
+    Returns the name of the Upstream block of the given single server, made of the given prefix,
+    the server with any character matched by NAME_REGEX replaced by an underscore, and a short
+    digest of the server itself.
+    """
+    return "%s_%s_%s" % (prefix, NAME_REGEX.sub("_", server), sha1(server.encode("utf-8")).hexdigest()[:8])
+
+
+class UpstreamBlock(object):
+    """
+    Represent an Nginx Upstream block.
+    """
+    TEMPLATE = Template(
+                        "    keepalive {keepalive};\n"
+                        "    keepalive_requests {keepalive_requests};\n"
+                        "}}\n"
+                        )
+
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initializes an UpstreamBlock instance. The name of the block is mandatory. Its servers, the
+        balancing method and its key, as well as the keepalive and keepalive_requests settings, can
+        be optionally passed in.
+        """
+        self._name = None
+        self._servers = []
+        self.name = kwargs.get("name", None)
+        for server in kwargs.get("servers", []):
+            self.servers = server
+        self.keepalive = kwargs.get("keepalive", "32")
+        self.keepalive_requests = kwargs.get("keepalive_requests", "1000")
+        self.key = kwargs.get("key", "$remote_addr")
+        self.method = kwargs.get("method", "round_robin")
+
+
+    def export(self):
+        """
+        Yields the block as properly formatted fragments ready to be written, in order, to a
+        configuration file.
+        """
+        yield "upstream %s {\n" % (self.name)
+        if self.method == "hash":
+            yield "    hash %s;\n" % (self.key)
+        elif self.method == "least_conn":
+            yield "    least_conn;\n"
+        for server in self.servers:
+            yield "    server %s;\n" % (server)
+        yield self.TEMPLATE.render({
+                                    "keepalive" : self.keepalive,
+                                    "keepalive_requests" : self.keepalive_requests,
+                                    }
+                                )
+
+
+    @property
+    def keepalive(self):
+        """
+        Returns the number of idle connections to the servers each worker keeps open.
+        """
+        return self._keepalive
+
+
+    @keepalive.setter
+    def keepalive(self, keepalive):
+        """
+        Sets the number of idle connections to the servers each worker keeps open.
+        """
+        if keepalive is None:
+            raise ValueError("A keepalive must be given.")
+        if not isinstance(keepalive, str):
+            raise TypeError("The keepalive must be a string, not %s." % (type(keepalive).__name__))
+        if not keepalive.isdigit():
+            raise ValueError("%s is not a valid keepalive." % (keepalive))
+
+        self._keepalive = keepalive
+
+
+    @property
+    def keepalive_requests(self):
+        """
+        Returns the number of requests served through a connection before it is closed.
+        """
+        return self._keepalive_requests
+
+
+    @keepalive_requests.setter
+    def keepalive_requests(self, keepalive_requests):
+        """
+        Sets the number of requests served through a connection before it is closed.
+        """
+        if keepalive_requests is None:
+            raise ValueError("A keepalive_requests must be given.")
+        if not isinstance(keepalive_requests, str):
+            raise TypeError("The keepalive_requests must be a string, not %s." % (type(keepalive_requests).__name__))
+        if not keepalive_requests.isdigit():
+            raise ValueError("%s is not a valid keepalive_requests." % (keepalive_requests))
+
+        self._keepalive_requests = keepalive_requests
+
+
+    @property
+    def key(self):
+        """
+        Returns the key the hash method balances on.
+        """
+        return self._key
+
+
+    @key.setter
+    def key(self, key):
+        """
+        Sets the key the hash method balances on. The goodness of the key itself is not validated.
+        """
+        if key is None:
+            raise ValueError("A key must be given.")
+        if not isinstance(key, str):
+            raise TypeError("The key must be a string, not %s." % (type(key).__name__))
+
+        self._key = key
+
+
+    @property
+    def method(self):
+        """
+        Returns the method requests are balanced among the servers with.
+        """
+        return self._method
+
+
+    @method.setter
+    def method(self, method):
+        """
+        Sets the method requests are balanced among the servers with.
+        """
+        if method is None:
+            raise ValueError("A method must be given.")
+        if not isinstance(method, str):
+            raise TypeError("The method must be a string, not %s." % (type(method).__name__))
+        if method not in METHODS:
+            raise ValueError("%s is not a valid method, it must be one of %s." % (method, ", ".join(METHODS)))
+
+        self._method = method
+
+
+    @property
+    def name(self):
+        """
+        Returns the name of the Upstream block.
+        """
+        return self._name
+
+
+    @name.setter
+    def name(self, name):
+        """
+        Sets the name of the Upstream block.
+        """
+        if name is None:
+            raise ValueError("A name must be given.")
+        if not isinstance(name, str):
+            raise TypeError("The name must be a string, not %s." % (type(name).__name__))
+
+        self._name = name
+
+
+    @property
+    def servers(self):
+        """
+        Returns the servers of the Upstream block.
+        """
+        return self._servers
+
+
+    @servers.setter
+    def servers(self, server):
+        """
+        Adds a server to those of the Upstream block. The goodness of the server itself is not
+        validated.
+        """
+        if server is None:
+            raise ValueError("A server must be given.")
+        if not isinstance(server, str):
+            raise TypeError("The server must be a string, not %s." % (type(server).__name__))
+
+        if server not in self._servers:
+            self._servers.append(server)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides the helpers shared by all the levels of an Nginx Resolution Tree to deal with
+directives.
+
+A directive is a dictionary, which makes it unhashable. Each level of the tree, though, must be
+able to tell whether it already stores a directive or not without scanning all of them. To do so,
+every directive is turned into a canonical key, made of its signature and a frozen copy of its
+parameters. Two directives share the same key if and only if they have the same signature and equal
+parameters, no matter the order their keys were given in. As its signature is, the key of a
+directive is computed once, when it enters the tree, and handed down to each level along with it.
+
+The signature of a directive is a colon separated string. Rather than splitting it at each level of
+the tree, it is parsed once into an immutable Signature record.
+
+Directives are validated once, when they enter the tree. The levels below the root are handed
+directives that are already known to be valid, and do not validate them again.
+"""
+
+from collections import namedtuple
+from re import compile
+
+SIGNATURE_REGEX = compile(r"^\w+:[\w\.]+:\d+:[\w\.]+:[\w/]+$")
+
+
+def freeze(value):
+    """
+    Returns a hashable representation of the given value. Dictionaries are turned into frozensets
+    of their frozen items, lists and tuples into tuples of their frozen elements and sets into
+    frozensets. Any other value is returned as is.
+    """
+    if isinstance(value, dict):
+        return frozenset((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    return value
+
+
+def directive_key(directive):
+    """
+    Returns the canonical, hashable key of a directive: a pair made of its signature and its frozen
+    parameters.
+    """
+    return (directive["signature"], freeze(directive.get("parameters", {})))
+
+
+class Signature(namedtuple("Signature", ["alias", "ip", "port", "server_name", "location"])):
+    """
+    Represents a parsed signature. A signature is parsed once, when its directive enters the tree,
+    and is then handed down to each level along with the directive itself.
+    """
+    __slots__ = ()
+
+
+    @classmethod
+    def parse(cls, signature):
+        """
+        Parses a colon separated signature string into a Signature instance. The signature is
+        expected to be already validated.
+        """
+        return cls(*signature.split(":"))
+
+
+    @property
+    def address(self):
+        """
+        Returns the address, IP:PORT, the signature refers to.
+        """
+        return "%s:%s" % (self.ip, self.port)
+
+
+def validate_directive(directive):
+    """
+    Validates a directive, raising the proper exception if it is not well formed.
+    """
+    if directive is None:
+        raise ValueError("A directive name must be given.")
+    if not isinstance(directive, dict):
+        raise TypeError("The directive name must be a dictionary, not %s." % (type(directive)))
+    if 'signature' not in directive.keys():
+        raise ValueError("A directive is expected to have a 'signature'.")
+    if not isinstance(directive['signature'], str):
+        raise TypeError("The signature is expected as a string, not %s." % (type(directive['signature'])))
+    if not SIGNATURE_REGEX.match(directive['signature']):
+        raise ValueError("A signature must have the following format: 'alias:ip:port:server_name:location'")
+    if not isinstance(directive.get('parameters', {}), dict):
+        raise TypeError("The parameters are expected as a dictionary, not %s." % (type(directive['parameters'])))
@@ -5,25 +5,50 @@ This module defines a Listen object of an Nginx Resolution Tree. A Listen object
 identified by the pair IP:PORT. This pair is usually referred to as the address. Neither the IP
 address nor the port are mandatory parameters: the first defaults to 0.0.0.0, while the latter to
 80.  Each Listen object is also associated with a list of unique ServerName objects.
+
+A Listen object also holds the options of the socket Nginx opens at its address, such as reuseport
+or backlog, which directives pass in through the listen key of their parameters. Nginx rejects the
+same socket options given twice for an address, so they are rendered once, in a single server
+block, no matter how many server names share the address. Directives which set the same option to
+different values collide, and the Listen is not valid. The options are validated, through
+validate_options, before the directive passing them in is stored anywhere in the tree.
 """
 
-from re import compile, match
+from re import compile
 from socket import AF_INET, error, inet_aton, inet_pton
 
+from nrt.directive import directive_key, Signature, validate_directive
+from nrt.location import validate_parameters
 from nrt.servername import ServerName
 
+OPTIONS = {
+            "backlog" : compile(r"^\d+$"),
+            "deferred" : compile(r"^(on|off)$"),
+            "fastopen" : compile(r"^\d+$"),
+            "reuseport" : compile(r"^(on|off)$"),
+            }
+
 class Listen(object):
     """
     This class represents a Listen object.
     """
     def __init__(self, *args, **kwargs):
         """
-        Initializes a Listen instance.
+        Initializes a Listen instance. Whether the Locations below it are balanced can be
+        optionally passed in, and defaults to False.
         """
+        self._balance = kwargs.get("balance", False)
         self._directives = []
+        self._index = set()
+        self._invalid_locations = {}
+        self._options = {}
+        self._parent = None
+        self._keys = []
+        self._signatures = []
         self.ip = kwargs.get("ip", "0.0.0.0")
         self.port = kwargs.get("port", 80)
         self._server_names = {}
+        self._valid_options = True
 
         if not isinstance(self.port, str) and not isinstance(self.port, int):
             raise TypeError("The port is expected either as a string or an integer, not %s." % (type(self.port)))
@@ -59,22 +84,79 @@ class Listen(object):
         return True
 
 
-    def _build(self):
+    def _build(self, directives=None, signatures=None, keys=None):
         """
-        Turns the input directives into a unique list of ServerName objects.
+        Turns the input directives into a unique list of ServerName objects. Only the given
+        directives are routed, all of them if none is given.
         """
-        for directive in self.directives:
-            alias, ip, port, server_name, location = directive["signature"].split(":")
+        if directives is None:
+            directives, signatures, keys = self._directives, self._signatures, self._keys
 
-            if server_name not in self.server_names.keys():
+        for directive, signature, key in zip(directives, signatures, keys):
+            self._update_options(signature.alias, directive.get("parameters", {}).get("listen", None))
+
+            if signature.server_name not in self._server_names:
                 handle_server_name = ServerName(**{
-                                                    "domain" : server_name,
+                                                    "balance" : self._balance,
+                                                    "domain" : signature.server_name,
                                                     }
                                                 )
                 self.server_names = handle_server_name
 
-            self.server_names[server_name].directives = directive
-            self.server_names[server_name]._build()
+            self._server_names[signature.server_name]._insert(directive, signature, key)
+
+
+    def _insert(self, directive, signature, key=None):
+        """
+        Routes a directive down the tree, unless an equal one is already stored, and stores it
+        along with its parsed signature and its canonical key. The key, handed down by the upper
+        level of the tree, is only computed if not given. The directive is only stored once routed,
+        so that one failing to route can be given again. It is expected to be already validated.
+        """
+        if key is None:
+            key = directive_key(directive)
+        if key not in self._index:
+            self._build([directive], [signature], [key])
+            self._index.add(key)
+            self._directives.append(directive)
+            self._keys.append(key)
+            self._signatures.append(signature)
+
+
+    def _update_options(self, alias, options):
+        """
+        Validates and stores the socket options the given alias passes in, then recomputes whether
+        the options of the Listen conflict. If that changed, the change is propagated to the upper
+        level of the tree, if any.
+        """
+        if options is None:
+            return
+        validate_options(options)
+
+        for option, value in options.items():
+            aliases = self._options.setdefault(option, {}).setdefault(value, [])
+            if alias not in aliases:
+                aliases.append(alias)
+
+        valid = self.reason is None
+        if valid != self._valid_options:
+            self._valid_options = valid
+            if self._parent is not None:
+                self._parent._update_invalid_listen(self, not valid)
+
+
+    def _update_invalid(self, location, invalid):
+        """
+        Adds the given Location to, or removes it from, the invalid Locations below the Listen,
+        propagating the change to the upper level of the tree, if any.
+        """
+        if invalid:
+            self._invalid_locations[location] = None
+        else:
+            self._invalid_locations.pop(location, None)
+
+        if self._parent is not None:
+            self._parent._update_invalid(location, invalid)
 
 
     @property
@@ -88,25 +170,15 @@ class Listen(object):
     @directives.setter
     def directives(self, directive):
         """
-        Adds a directive to the directives of the Listen object.
+        Adds a directive to the directives of the Listen object. The directive, and its
+        parameters, are validated, while those handed down by the upper level of the tree, through
+        _insert, are not.
         """
-        signature_regex =  compile("^\w+:[\w\.]+:\d+:[\w\.]+:[\w/]+$")
-
-        if directive is None:
-            raise ValueError("A directive name must be given.")
-        if not isinstance(directive, dict):
-            raise TypeError("The directive name must be a dictionary, not %s." % (type(directive)))
-        if 'signature' not in directive.keys():
-            raise ValueError("A directive is expected to have a 'signature'.")
-        if not isinstance(directive['signature'], str):
-            raise TypeError("The signature is expected as a string, not %s." % (type(directive['signature'])))
-        if not signature_regex.match(directive['signature']):
-            raise ValueError("A signature must have the following format: 'alias:ip:port:server_name:location'")
-
-        if directive not in self._directives:
-            self._directives.append(directive)
-
-        self._build()
+        validate_directive(directive)
+        signature = Signature.parse(directive["signature"])
+        validate_options(directive.get("parameters", {}).get("listen", None))
+        validate_parameters(directive, signature)
+        self._insert(directive, signature)
 
 
     @property
@@ -120,13 +192,44 @@ class Listen(object):
     @property
     def is_valid(self):
         """
-        Returns whether the Listen is valid or not. The Listen is not valid if any of its server
-        names is not.
+        Returns whether the Listen is valid or not. The Listen is not valid if its socket options
+        conflict or if any of its server names is not, that is, if any Location below it is not.
         """
-        for server_name in self.server_names.values():
-            if not server_name.is_valid:
-                return False
-        return True
+        return self._valid_options and len(self._invalid_locations) == 0
+
+
+    @property
+    def options(self):
+        """
+        Returns the socket options of the Listen, as a dictionary mapping each option its
+        directives set to its value. Conflicting options are left out.
+        """
+        return {option : list(values)[0] for option, values in self._options.items() if len(values) == 1}
+
+
+    @property
+    def reason(self):
+        """
+        Returns why the socket options of the Listen are not valid, or None if they are.
+        """
+        if any(len(values) > 1 for values in self._options.values()):
+            return "conflicting listen options"
+        return None
+
+
+    @property
+    def socket_options(self):
+        """
+        Returns the socket options of the Listen as they follow the address in a listen directive,
+        sorted by name, or an empty string if there are none. Options turned off are left out.
+        """
+        rendered = []
+        for option, value in sorted(self.options.items()):
+            if value == "on":
+                rendered.append(option)
+            elif value != "off":
+                rendered.append("%s=%s" % (option, value))
+        return " ".join(rendered)
 
 
     @property
@@ -149,3 +252,34 @@ class Listen(object):
 
         if server_name.domain not in self.server_names.keys():
             self._server_names[server_name.domain] = server_name
+            server_name._parent = self
+            for location in list(server_name._invalid_locations):
+                self._update_invalid(location, True)
+
+
+
+def validate_address(ip, port):
+    """
+    Validates the IP address and the port of an address, raising the proper exception if either
+    is not valid. A scratch Listen is built out of them, and then thrown away, so that they are
+    validated by the very same rules the Listen objects of the tree are.
+    """
+    Listen(**{"ip" : ip, "port" : port})
+
+def validate_options(options):
+    """
+    Validates the socket options a directive passes in through the listen key of its parameters,
+    raising the proper exception if any of them is not valid. None stands for no options.
+    """
+    if options is None:
+        return
+    if not isinstance(options, dict):
+        raise TypeError("The listen options must be a dictionary, not %s." % (type(options).__name__))
+
+    for option, value in options.items():
+        if option not in OPTIONS:
+            raise ValueError("%s is not a valid listen option." % (option))
+        if not isinstance(value, str):
+            raise TypeError("The listen option %s must be a string, not %s." % (option, type(value).__name__))
+        if not OPTIONS[option].match(value):
+            raise ValueError("%s is not a valid value for the listen option %s." % (value, option))
@@ -11,10 +11,31 @@ A Location is associated to a list of containers, referred to as alias. For an N
 file to be valid, multiple containers must not redefine the same location within the same server
 block.
 
-A property, is_valid, returns whether the current location is valid or not.
+Locations can optionally be balanced. A balanced Python Location may be associated to multiple
+containers, all of them serving Python, which become the servers of the same upstream pool instead
+of colliding. Each of them tunes its own server, and the pool as a whole, through the upstream key
+of its directive's parameters: weight and max_fails apply to its server, while method, one of
+round_robin, least_conn and hash, and key, the key hash balances on, apply to the whole pool and
+must be agreed upon.
+
+HTML Locations, which serve static content, can optionally opt in to a static profile, through the
+static key of their directive's parameters. It holds the settings, such as expires or gzip_static,
+that make Nginx serve the content fast.
+
+A property, is_valid, returns whether the current location is valid or not. The validity is cached
+and updated whenever the aliases or the allow and deny directives change. Any change is reported to
+the ServerName the Location belongs to, so that the upper levels of the tree never have to walk
+their Locations to know whether they are valid.
+
+The parameters of a directive are validated, through validate_parameters, before the directive is
+stored anywhere in the tree, so that a directive whose parameters are not valid leaves no trace.
 """
 
-from re import compile, match
+from nrt.blocks.cache_path.base import SETTINGS as CACHE_SETTINGS
+from nrt.blocks.location.phpfpm import BUFFER_SIZE_REGEX, BUFFERS_REGEX
+from nrt.blocks.location.static import SETTINGS
+from nrt.blocks.upstream.base import METHODS
+from nrt.directive import directive_key, Signature, validate_directive
 
 class Location(object):
     """
@@ -26,33 +47,57 @@ class Location(object):
         """
         self._allow = ["all"]
         self._alias = []
+        self._backends = {}
+        self._balance = False
         self._deny = []
         self._directives = []
+        self._index = set()
+        self._signatures = []
+        self._static = None
         self._language = "html"
         self._language_configuration = {}
+        self._languages = {}
+        self._parent = None
+        self._upstream = {}
+        self._valid = False
+        self.balance = kwargs.get("balance", False)
         self.location = kwargs.get("location", None)
 
 
-    def _build(self, *args, **kwargs):
+    def _apply(self, directive, signature):
         """
-        Turns the input directives into a unique list of alias entries.
+        Applies a single directive, along with its parsed signature, to the Location.
         """
         language_configuration_map = {
-                                        "php" : "phpfmp",
+                                        "php" : "phpfpm",
                                         "python" : "gunicorn",
                                         }
 
-        for directive in self.directives:
-            alias, ip, port, server_name, location = directive["signature"].split(":")
-            parameters = directive.get("parameters", {})
+        parameters = directive.get("parameters", {})
 
-            if alias not in self.alias:
-                self.alias = alias
+        if signature.alias not in self.alias:
+            self.alias = signature.alias
 
-            self.allow = parameters.get("allow", None)
-            self.deny = parameters.get("deny", None)
-            self.language = parameters.get("language", None)
-            self.language_configuration = parameters.get(language_configuration_map.get(self.language, None), {})
+        self.allow = parameters.get("allow", None)
+        self.deny = parameters.get("deny", None)
+        self.language = parameters.get("language", None)
+        self._languages[signature.alias] = self.language
+        self.language_configuration = parameters.get(language_configuration_map.get(self.language, None), {})
+        self._backends[signature.alias] = self.language_configuration
+        self.static = parameters.get("static", None)
+        self._update_upstream(signature.alias, parameters.get("upstream", None))
+
+
+    def _build(self, directives=None, signatures=None):
+        """
+        Turns the input directives into a unique list of alias entries. Only the given directives
+        are applied, all of them if none is given.
+        """
+        if directives is None:
+            directives, signatures = self._directives, self._signatures
+
+        for directive, signature in zip(directives, signatures):
+            self._apply(directive, signature)
 
 
     @property
@@ -77,6 +122,7 @@ class Location(object):
         
         if alias not in self.alias:
             self._alias.append(alias)
+            self._update_validity()
 
 
     @property
@@ -99,13 +145,45 @@ class Location(object):
         
         if "all" in directives:
             self._allow = ["all"]
-            return
-
-        if directives == []:
+        elif directives == []:
             self._allow = []
-            return
+        else:
+            self._allow = [directive for directive in set(directives) if directive not in self.allow]
 
-        self._allow = [directive for directive in set(directives) if directive not in self.allow]
+        self._update_validity()
+
+
+    @property
+    def backends(self):
+        """
+        Returns the backends of the Location: a dictionary mapping each alias to its language
+        configuration, merged with its upstream parameters.
+        """
+        backends = {}
+        for alias in self._alias:
+            backends[alias] = dict(self._backends.get(alias, {}))
+            backends[alias].update(self._upstream.get(alias, {}))
+        return backends
+
+
+    @property
+    def balance(self):
+        """
+        Returns whether the Location balances its requests among multiple aliases.
+        """
+        return self._balance
+
+
+    @balance.setter
+    def balance(self, balance):
+        """
+        Sets whether the Location balances its requests among multiple aliases.
+        """
+        if not isinstance(balance, bool):
+            raise TypeError("The balance must be a boolean, not %s." % (type(balance).__name__))
+
+        self._balance = balance
+        self._update_validity()
 
 
     @property
@@ -128,9 +206,63 @@ class Location(object):
         
         if "all" in directives:
             self._deny = ["all"]
-            return
+        else:
+            self._deny = [directive for directive in set(directives) if directive not in self.deny]
+
+        self._update_validity()
+
+
+    def _insert(self, directive, signature, key=None):
+        """
+        Applies a directive to the Location, unless an equal one is already stored, and stores it
+        along with its parsed signature. Whether it is already stored is told by its canonical key,
+        handed down by the upper level of the tree, which is only computed if not given. The
+        directive is only stored once applied, so that one failing to apply can be given again. It
+        is expected to be already validated.
+        """
+        if key is None:
+            key = directive_key(directive)
+        if key not in self._index:
+            self._build([directive], [signature])
+            self._index.add(key)
+            self._directives.append(directive)
+            self._signatures.append(signature)
+
+
+    def _update_upstream(self, alias, upstream):
+        """
+        Validates and stores the upstream parameters of the given alias, then recomputes whether
+        the Location is valid, since the aliases of a balanced Location must agree on the method.
+        """
+        if upstream is None:
+            upstream = {}
+        if not isinstance(upstream, dict):
+            raise TypeError("The upstream parameters must be a dictionary, not %s." % (type(upstream).__name__))
+
+        for setting in ("key", "max_fails", "method", "weight"):
+            if setting in upstream.keys() and not isinstance(upstream[setting], str):
+                raise TypeError("The upstream %s must be a string, not %s." % (setting, type(upstream[setting]).__name__))
+        for setting in ("max_fails", "weight"):
+            if setting in upstream.keys() and not upstream[setting].isdigit():
+                raise ValueError("%s is not a valid upstream %s." % (upstream[setting], setting))
+        if upstream.get("method", "round_robin") not in METHODS:
+            raise ValueError("%s is not a valid upstream method, it must be one of %s." % (upstream["method"], ", ".join(METHODS)))
 
-        self._deny = [directive for directive in set(directives) if directive not in self.deny]
+        self._upstream[alias] = dict(upstream)
+        self._update_validity()
+
+
+    def _update_validity(self):
+        """
+        Recomputes whether the Location is valid. If its validity changed, the change is propagated
+        to the ServerName the Location belongs to, if any.
+        """
+        valid = self.reason is None
+
+        if valid != self._valid:
+            self._valid = valid
+            if self._parent is not None:
+                self._parent._update_invalid(self, not valid)
 
 
     @property
@@ -144,33 +276,25 @@ class Location(object):
     @directives.setter
     def directives(self, directive):
         """
-        Adds a directive to the directives of the Location object.
+        Adds a directive to the directives of the Location object. The directive, and its
+        parameters, are validated, while those handed down by the upper level of the tree, through
+        _insert, are not.
         """
-        signature_regex =  compile("^\w+:[\w\.]+:\d+:[\w\.]+:[\w/]+$")
-
-        if directive is None:
-            raise ValueError("A directive name must be given.")
-        if not isinstance(directive, dict):
-            raise TypeError("The directive name must be a dictionary, not %s." % (type(directive)))
-        if 'signature' not in directive.keys():
-            raise ValueError("A directive is expected to have a 'signature'.")
-        if not isinstance(directive['signature'], str):
-            raise TypeError("The signature is expected as a string, not %s." % (type(directive['signature'])))
-        if not signature_regex.match(directive['signature']):
-            raise ValueError("A signature must have the following format: 'alias:ip:port:server_name:location'")
-
-        if directive not in self._directives:
-            self._directives.append(directive)
-
-        self._build()
+        validate_directive(directive)
+        signature = Signature.parse(directive["signature"])
+        validate_parameters(directive, signature)
+        self._insert(directive, signature)
 
 
     @property
     def is_valid(self):
         """
-        Returns whether the Location is valid or not.
+        Returns whether the Location is valid or not. A Location is valid if it has exactly one
+        alias, or multiple aliases agreeing on the upstream method if it is a balanced Python one
+        all of whose aliases serve Python, and its allow and deny directives are neither both
+        'all' nor both empty.
         """
-        return len(self._alias) == 1 and not ("all" in self.allow and "all" in self.deny) and not (self.allow == [] and self.deny == [])
+        return self._valid
 
 
     @property
@@ -194,6 +318,7 @@ class Location(object):
             raise ValueError("%s is not a valid language." % (language))
 
         self._language = language.lower()
+        self._update_validity()
 
 
     @property
@@ -207,24 +332,118 @@ class Location(object):
     @language_configuration.setter
     def language_configuration(self, configuration):
         """
-        Sets the configuration specific to the language of the object.
+        Sets the configuration specific to the language of the object. Python and PHP backends can
+        be reached through a unix socket, given as an absolute path, instead of an IP and a port.
         """
         if not isinstance(configuration, dict):
             raise TypeError("The language configuration must be a dictionary, not %s." % (type(configuration).__name__))
-        
+
+        # Work on a copy, so that the defaults never leak into the directive's parameters
+        configuration = dict(configuration)
+        if self.language in ("php", "python") and "socket" in configuration.keys():
+            if not isinstance(configuration["socket"], str):
+                raise TypeError("The socket must be a string, not %s." % (type(configuration["socket"]).__name__))
+            if not configuration["socket"].startswith("/"):
+                raise ValueError("The socket must be an absolute path, not %s." % (configuration["socket"]))
+            if "ip" in configuration.keys() or "port" in configuration.keys():
+                raise ValueError("A socket cannot be given along with an IP or a port.")
         if self.language == "python":
-            if "ip" not in configuration.keys():
-                configuration["ip"] = "127.0.0.1"
-            if "port" not in configuration.keys():
-                configuration["port"] = "8000"
-            if not isinstance(configuration["ip"], str):
-                raise TypeError("GUnicorn's IP must be a string, not %s." % (type(configuration["ip"]).__name__))
-            if not isinstance(configuration["port"], str):
-                raise TypeError("GUnicorn's port must be a string, not %s." % (type(configuration["port"]).__name__))
+            if "socket" not in configuration.keys():
+                if "ip" not in configuration.keys():
+                    configuration["ip"] = "127.0.0.1"
+                if "port" not in configuration.keys():
+                    configuration["port"] = "8000"
+                if not isinstance(configuration["ip"], str):
+                    raise TypeError("GUnicorn's IP must be a string, not %s." % (type(configuration["ip"]).__name__))
+                if not isinstance(configuration["port"], str):
+                    raise TypeError("GUnicorn's port must be a string, not %s." % (type(configuration["port"]).__name__))
+        if self.language == "python" and "cache" in configuration.keys():
+            if not isinstance(configuration["cache"], dict):
+                raise TypeError("GUnicorn's cache must be a dictionary, not %s." % (type(configuration["cache"]).__name__))
+            for setting, value in configuration["cache"].items():
+                if setting not in CACHE_SETTINGS:
+                    raise ValueError("%s is not a valid cache setting." % (setting))
+                if not isinstance(value, str):
+                    raise TypeError("The cache setting %s must be a string, not %s." % (setting, type(value).__name__))
+                if not CACHE_SETTINGS[setting][1].match(value):
+                    raise ValueError("%s is not a valid value for the cache setting %s." % (value, setting))
+        if self.language == "php":
+            for setting in ("ip", "port"):
+                if setting in configuration.keys() and not isinstance(configuration[setting], str):
+                    raise TypeError("PHP-FPM's %s must be a string, not %s." % (setting, type(configuration[setting]).__name__))
+            for setting, regex in (("fastcgi_buffer_size", BUFFER_SIZE_REGEX), ("fastcgi_buffers", BUFFERS_REGEX)):
+                if setting not in configuration.keys():
+                    continue
+                if not isinstance(configuration[setting], str):
+                    raise TypeError("PHP-FPM's %s must be a string, not %s." % (setting, type(configuration[setting]).__name__))
+                if not regex.match(configuration[setting]):
+                    raise ValueError("%s is not a valid %s." % (configuration[setting], setting))
+        if self.language in ("php", "python"):
+            for setting in ("keepalive", "keepalive_requests"):
+                if setting not in configuration.keys():
+                    continue
+                if not isinstance(configuration[setting], str):
+                    raise TypeError("The %s must be a string, not %s." % (setting, type(configuration[setting]).__name__))
+                if not configuration[setting].isdigit():
+                    raise ValueError("%s is not a valid %s." % (configuration[setting], setting))
 
         self._language_configuration = configuration
 
 
+    @property
+    def reason(self):
+        """
+        Returns why the Location is not valid, or None if it is.
+        """
+        if len(self._alias) == 0:
+            return "no alias"
+        if len(self._alias) > 1:
+            languages = set(self._languages.get(alias, self._language) for alias in self._alias)
+            if not self._balance or self._language != "python" or languages != set(["python"]):
+                return "multiple aliases"
+            methods = set((upstream.get("method", "round_robin"), upstream.get("key", None)) for upstream in self._upstream.values())
+            if len(methods) > 1:
+                return "conflicting upstream methods"
+        if "all" in self._allow and "all" in self._deny:
+            return "allow and deny all"
+        if self._allow == [] and self._deny == []:
+            return "empty allow and deny"
+        return None
+
+
+    @property
+    def static(self):
+        """
+        Returns the settings of the static profile of the Location, or None if it did not opt in
+        to it.
+        """
+        return self._static
+
+
+    @static.setter
+    def static(self, settings):
+        """
+        Sets the settings of the static profile of the Location. An empty dictionary opts in to the
+        profile with its default settings, while None opts out of it. The profile only applies to
+        HTML Locations.
+        """
+        if settings is None:
+            self._static = None
+            return
+        if not isinstance(settings, dict):
+            raise TypeError("The static settings must be a dictionary, not %s." % (type(settings).__name__))
+
+        for setting, value in settings.items():
+            if setting not in SETTINGS:
+                raise ValueError("%s is not a valid static setting." % (setting))
+            if not isinstance(value, str):
+                raise TypeError("The static setting %s must be a string, not %s." % (setting, type(value).__name__))
+            if not SETTINGS[setting][1].match(value):
+                raise ValueError("%s is not a valid value for the static setting %s." % (value, setting))
+
+        self._static = dict(settings)
+
+
     @property
     def location(self):
         """
@@ -247,3 +466,13 @@ class Location(object):
         if not location[0] == location[-1] == "/":
             raise ValueError("The locations must start and end with a forward slash.")
         self._location = location
+
+
+def validate_parameters(directive, signature):
+    """
+    Validates the parameters of a directive, along with its parsed signature, raising the proper
+    exception if any of them is not valid. The directive is applied to a scratch Location, which is
+    then thrown away, so that the parameters are validated by the very same setters that apply
+    them to the tree.
+    """
+    Location(**{"location" : signature.location})._apply(directive, signature)
@@ -21,12 +21,71 @@ dictionary which maps the unique address to the reference itself. The Nrt class
 of instantiating Listen instances. The Nrt class, though, is not responsible of generating any
 other component of the tree. Each level of the tree is indeed responsible of generating its lower
 level, properly mapping those objects.
+
+Each level of the tree keeps track of the invalid Locations below it. The Nrt can thus report its
+collisions, as Collision records, in a time proportional to their number rather than to the size of
+the tree. Listen objects whose socket options conflict are tracked the same way.
+
+A valid Nrt is resolved into a stream of ResolvedServer records, one per server block, each holding
+the ResolvedLocation records of its location blocks. It can also be exported into virtual host
+files, one per server name, which are streamed to disk one location block at a time. Exports are
+incremental: only the files whose content changed are written. Since each file is exported on its
+own, the export can be fanned out over a pool of threads or processes.
+
+Python and PHP locations pass their requests to Upstream blocks, one per distinct Green Unicorn
+server or PHP-FPM pool, which keep a pool of connections to it alive, and Python locations can cache
+the responses into proxy cache zones. Such blocks live in the http context: they are deduplicated
+across the whole tree and exported once, to files of their own. So is the sizing of the hash
+tables Nginx looks the server names up in, which the Nrt computes out of its server names.
+
+Many server names of an address are often served the very same way, but for the backends their
+locations pass requests to. An export can optionally merge them into a single server block, whose
+locations pass requests to variables set, per host, by Map blocks, so that Nginx holds and reloads
+far fewer server blocks. Likewise, a server name served the very same way at many addresses is
+served by a single server block listening to all of them. An export can also minimize the server
+blocks, setting the directives all their locations share once, at the server level.
+
+An Nrt can optionally be balanced. In a balanced Nrt, multiple containers claiming the same Python
+location do not collide: they become the servers of an upstream pool the location balances its
+requests among.
 """
 
-from collections import defaultdict
-from re import compile, match
+from collections import defaultdict, deque, namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from hashlib import sha1
+from itertools import chain, islice
+from os.path import basename, isdir, isfile, join
+
+from nrt.blocks.cache_path.base import CachePathBlock, ZONE_SETTINGS
+from nrt.blocks.location.base import LocationBlock
+from nrt.blocks.location.gunicorn import GunicornLocationBlock
+from nrt.blocks.location.phpfpm import PhpfpmLocationBlock
+from nrt.blocks.location.static import StaticLocationBlock
+from nrt.blocks.map.base import MapBlock
+from nrt.blocks.server.base import ServerBlock
+from nrt.blocks.server_names_hash.base import ServerNamesHashBlock
+from nrt.blocks.upstream.base import UpstreamBlock
+from nrt.directive import directive_key, Signature, validate_directive
+from nrt.listen import Listen, validate_address, validate_options
+from nrt.location import validate_parameters
+from nrt.vhost import CACHES, Changes, commit, export_vhost, export_vhosts, MANIFEST, read_manifest, SERVER_NAMES_HASH, stage, unmanaged, UPSTREAMS, write_manifest
+
+Collision = namedtuple("Collision", ["address", "domain", "location", "aliases", "reason"])
+ResolvedLocation = namedtuple("ResolvedLocation", ["location", "alias", "allow", "deny", "language", "language_configuration", "aliases"])
+ResolvedServer = namedtuple("ResolvedServer", ["address", "server_name", "locations"])
 
-from nrt.listen import Listen
+BATCH_SIZE = 64
+
+POOLS = {
+            "process" : ProcessPoolExecutor,
+            "thread" : ThreadPoolExecutor,
+            }
+
+LOCATION_BLOCKS = {
+                    "html" : LocationBlock,
+                    "php" : PhpfpmLocationBlock,
+                    "python" : GunicornLocationBlock,
+                    }
 
 
 class Nrt(object):
@@ -36,33 +95,429 @@ class Nrt(object):
     def __init__(self, *args, **kwargs):
         """
         Initializes an Nrt instance. Requires the client to provide the Nginx directives passed in
-        by the linked containers. 
+        by the linked containers. These can be given at once through the optional directives
+        parameter, an iterable that is ingested through add_directives. Whether the Nrt is balanced
+        can be optionally passed in too, and defaults to False.
         """
+        self._balance = kwargs.get("balance", False)
         self._directives = []
+        self._index = set()
+        self._invalid_listens = {}
+        self._invalid_locations = {}
         self._listen = {}
+        self._keys = []
+        self._signatures = []
+
+        if not isinstance(self._balance, bool):
+            raise TypeError("The balance must be a boolean, not %s." % (type(self._balance).__name__))
+
+        directives = kwargs.get("directives", None)
+        if directives is not None:
+            self.add_directives(directives)
 
 
-    def _build(self):
+    def _build(self, directives=None, signatures=None, keys=None):
         """
         Turns the input directives into a unique list of Listen objects. If multiple directives
         refer to the same Listen's address, only one is created and all the directives are stored
         there. The Listen object will, internally, take care to properly split them into proper
         ServerName objects.
+
+        Only the given directives are routed down the tree, so that adding a directive only
+        touches the path leading to its Location. If none is given, all the directives of the Nrt
+        are routed, which leaves an already built tree untouched. Each directive is handed down
+        along with its parsed Signature and its canonical key, both computed once, when it entered
+        the Nrt.
         """
-        for directive in self.directives:
-            alias, ip, port, server_name, location = directive["signature"].split(":")
-            address = "%s:%s" % (ip, port)
+        if directives is None:
+            directives, signatures, keys = self._directives, self._signatures, self._keys
+
+        for directive, signature, key in zip(directives, signatures, keys):
+            address = signature.address
 
-            if address not in self._listen.keys():
+            if address not in self._listen:
                 handle_listen = Listen(**{
-                                            "ip" : ip,
-                                            "port" : port,
+                                            "balance" : self._balance,
+                                            "ip" : signature.ip,
+                                            "port" : signature.port,
                                             }
                                         )
                 self.listen = handle_listen
 
-            self.listen[address].directives = directive
-            self.listen[address]._build()
+            self._listen[address]._insert(directive, signature, key)
+
+
+    def _collect(self, changes, filenames, outcomes):
+        """
+        Records the outcome of the export of the given virtual host files into the given Changes.
+        Returns the number of bytes minimizing their server blocks saved.
+        """
+        trimmed = 0
+        for filename, (outcome, bytes_trimmed) in zip(filenames, outcomes):
+            if outcome == "added":
+                changes.added.append(filename)
+            elif outcome == "changed":
+                changes.changed.append(filename)
+            trimmed += bytes_trimmed
+        return trimmed
+
+
+    def _domains(self):
+        """
+        Returns a dictionary mapping each server name of the Nrt to the sorted addresses it is
+        served at.
+        """
+        domains = defaultdict(list)
+        for address in sorted(self._listen):
+            for domain in self._listen[address].server_names:
+                domains[domain].append(address)
+        return domains
+
+
+    def _http_blocks(self, merge=False):
+        """
+        Returns the blocks of the Nrt that live in the http context, as a list of (filename,
+        blocks) pairs, one per file they are exported to, sorted by filename. Files without blocks
+        are left out. All the blocks are gathered in a single walk of the backend Locations.
+
+        Upstream blocks are exported to UPSTREAMS, one per distinct Green Unicorn server, pool of
+        Green Unicorn servers or PHP-FPM pool, sorted by name. If the Locations proxying to the
+        same server ask for different keepalive settings, the largest applies, so that none of
+        them gets a smaller pool than it asked for. A setting no Location asks for is left to its
+        default. A ValueError exception is raised if two Locations name the same Upstream block
+        after different servers.
+
+        Proxy cache path blocks are exported to CACHES, one per distinct zone the Python Locations
+        cache into, sorted by zone. A ValueError exception is raised if two Locations define the
+        same zone differently, or if two zones share the same path, which Nginx rejects.
+
+        The server names hash block is exported to SERVER_NAMES_HASH, sized out of the number of
+        server names of the busiest address and of the longest server name of the Nrt. If server
+        blocks are merged, it sizes the hash tables of their Map blocks too.
+        """
+        caches = {}
+        paths = {}
+        upstreams = {}
+        for listen_object in self._listen.values():
+            for server_object in listen_object.server_names.values():
+                for location_object in server_object.locations.values():
+                    if location_object.language not in ("php", "python"):
+                        continue
+                    location_block = LOCATION_BLOCKS[location_object.language](**self._language_parameters(location_object))
+                    parameters = upstreams.setdefault(location_block.upstream, {
+                                                                                "name" : location_block.upstream,
+                                                                                "servers" : location_block.servers,
+                                                                                }
+                                                    )
+                    if parameters["servers"] != location_block.servers:
+                        raise ValueError("The upstream %s is defined with different servers by multiple locations." % (location_block.upstream))
+                    if location_object.language == "python":
+                        parameters["key"] = location_block.hash_key
+                        parameters["method"] = location_block.method
+                    for setting in ("keepalive", "keepalive_requests"):
+                        value = getattr(location_block, setting)
+                        if value is not None and int(value) >= int(parameters.get(setting, value)):
+                            parameters[setting] = value
+
+                    if location_object.language == "python" and location_block.cache is not None:
+                        zone = dict((setting, location_block.cache[setting]) for setting in ZONE_SETTINGS)
+                        if caches.setdefault(zone["zone"], zone) != zone:
+                            raise ValueError("The cache zone %s is defined differently by multiple locations." % (zone["zone"]))
+                        if paths.setdefault(zone["path"], zone["zone"]) != zone["zone"]:
+                            raise ValueError("The cache zones %s and %s share the path %s." % (paths[zone["path"]], zone["zone"], zone["path"]))
+
+        server_names_hash_blocks = []
+        if any(listen_object.server_names for listen_object in self._listen.values()):
+            address = min(self._listen, key=lambda address: (-len(self._listen[address].server_names), address))
+            server_names_hash_blocks.append(ServerNamesHashBlock(**{
+                                                                    "address" : address,
+                                                                    "count" : len(self._listen[address].server_names),
+                                                                    "length" : max(len(domain) for listen_object in self._listen.values() for domain in listen_object.server_names),
+                                                                    "maps" : merge,
+                                                                    }
+                                                                ))
+
+        http_blocks = [
+                        (CACHES, [CachePathBlock(**caches[zone]) for zone in sorted(caches)]),
+                        (SERVER_NAMES_HASH, server_names_hash_blocks),
+                        (UPSTREAMS, [UpstreamBlock(**upstreams[name]) for name in sorted(upstreams)]),
+                        ]
+        return [(filename, blocks) for filename, blocks in http_blocks if blocks]
+
+
+    def _language_parameters(self, location_object):
+        """
+        Returns the parameters of the Location block rendering the given Location, out of its
+        language configuration, or of its static settings for a static HTML one. A Location with
+        multiple aliases, which only a balanced Nrt holds, is given the backends of all of them,
+        sorted by alias, along with the method they agreed upon, the largest keepalive settings
+        they ask for and the cache settings of the first of them asking for any.
+        """
+        if location_object.language == "html" and location_object.static is not None:
+            return dict(location_object.static)
+        if len(location_object.alias) < 2:
+            return dict(location_object.language_configuration)
+
+        backends = location_object.backends
+        parameters = {"backends" : [backends[alias] for alias in sorted(backends)]}
+        if "method" in parameters["backends"][0]:
+            parameters["method"] = parameters["backends"][0]["method"]
+        if "key" in parameters["backends"][0]:
+            parameters["hash_key"] = parameters["backends"][0]["key"]
+        for setting in ("keepalive", "keepalive_requests"):
+            values = [backend[setting] for backend in parameters["backends"] if setting in backend]
+            if values:
+                parameters[setting] = max(values, key=int)
+        caches = [backend["cache"] for backend in parameters["backends"] if "cache" in backend]
+        if caches:
+            parameters["cache"] = caches[0]
+        return parameters
+
+
+    def _location_block(self, location_object):
+        """
+        Returns the Location block rendering the given Location, picked according to its language,
+        and whether it opted in to the static profile, and configured through its language
+        parameters.
+        """
+        location_block_class = LOCATION_BLOCKS[location_object.language]
+        if location_object.language == "html" and location_object.static is not None:
+            location_block_class = StaticLocationBlock
+
+        parameters = self._language_parameters(location_object)
+        parameters.update({
+                            "allow" : location_object.allow,
+                            "deny" : location_object.deny,
+                            "location" : location_object.location,
+                            }
+                        )
+        return location_block_class(**parameters)
+
+
+    def _listen_groups(self, domain, addresses, merges):
+        """
+        Returns the given addresses of the given domain grouped by the server block they render,
+        as a list of lists of addresses, sorted by their first address. The addresses of a group
+        serve the same merged server names, if any, through Location blocks of the same structure
+        passing requests to the same Upstream blocks, so that a single server block listening to
+        all of them serves the domain the very same way.
+        """
+        groups = OrderedDict()
+        for address in addresses:
+            listen_object = self._listen[address]
+            server_objects = [listen_object.server_names[other] for other in merges.get(address, {}).get(domain, [domain])]
+            signature = tuple(server_object.domain for server_object in server_objects)
+            for location in sorted(server_objects[0].locations):
+                location_blocks = [self._location_block(server_object.locations[location]) for server_object in server_objects]
+                signature += ((location, location_blocks[0].structure(), tuple(location_block.upstream for location_block in location_blocks)),)
+            groups.setdefault(signature, []).append(address)
+        return list(groups.values())
+
+
+    def _merges(self):
+        """
+        Returns a dictionary mapping each address to the server names it merges, each mapped in
+        turn to the sorted list of the server names it is merged with, itself included. Server
+        names are merged if their Location blocks have the same structure, that is, if they only
+        differ in the Upstream blocks they pass requests to. Addresses merging nothing are left
+        out.
+        """
+        merges = {}
+        for address, listen_object in self._listen.items():
+            groups = defaultdict(list)
+            for domain in sorted(listen_object.server_names):
+                server_object = listen_object.server_names[domain]
+                structure = tuple(self._location_block(server_object.locations[location]).structure() for location in sorted(server_object.locations))
+                groups[structure].append(domain)
+            merged = dict((domain, domains) for domains in groups.values() if len(domains) > 1 for domain in domains)
+            if merged:
+                merges[address] = merged
+        return merges
+
+
+    def _resolve(self):
+        """
+        Lazily yields a ResolvedServer record for each ServerName of each Listen. Addresses, server
+        names and locations are yielded sorted, so that the same tree always resolves in the same
+        order, no matter the order its directives were added in.
+        """
+        for address in sorted(self._listen):
+            listen_object = self._listen[address]
+            for server_name in sorted(listen_object.server_names):
+                server_object = listen_object.server_names[server_name]
+                locations = []
+                for location in sorted(server_object.locations):
+                    location_object = server_object.locations[location]
+                    locations.append(ResolvedLocation(
+                                                        location,
+                                                        location_object.alias[0],
+                                                        location_object.allow,
+                                                        location_object.deny,
+                                                        location_object.language,
+                                                        location_object.language_configuration,
+                                                        list(location_object.alias),
+                                                        )
+                                    )
+                yield ResolvedServer(address, server_name, locations)
+
+
+    def _server_blocks(self, domain, groups, options, merges, minimize):
+        """
+        Returns the blocks of the given domain: a ServerBlock for each of the given groups of
+        addresses, as returned by _listen_groups, which listens to all of them and is rendered
+        out of the first. Their Location blocks are sorted by location. The socket options of an
+        address, given by _socket_options, are only rendered if the domain is the one they are
+        rendered for.
+
+        A domain the given merges, returned by _merges, merge with others at an address, serves
+        all of them through a single ServerBlock. Each of its Location blocks whose Upstream
+        block differs among them passes requests to a variable instead, set by a MapBlock,
+        which comes right before the ServerBlock. The variable defaults to the Upstream block of
+        the given domain, so that a request for an unknown host, which the ServerBlock may serve
+        as the default server of its address, is served as it was before merging. The ServerBlocks are minimized if minimize is
+        True.
+        """
+        blocks = []
+        for addresses in groups:
+            address = addresses[0]
+            listen_object = self._listen[address]
+            server_object = listen_object.server_names[domain]
+            domains = merges.get(address, {}).get(domain, [domain])
+            locations = sorted(server_object.locations)
+            location_blocks = [self._location_block(server_object.locations[location]) for location in locations]
+            for location, location_block in zip(locations, location_blocks):
+                if len(domains) == 1 or location_block.upstream is None:
+                    continue
+                entries = [(other, self._location_block(listen_object.server_names[other].locations[location]).upstream) for other in domains]
+                if len(set(upstream for other, upstream in entries)) > 1:
+                    location_block.variable = "$nrt_%s" % (sha1(("%s %s %s" % (address, domain, location)).encode("utf-8")).hexdigest()[:12])
+                    blocks.append(MapBlock(**{
+                                                "default" : entries[0][1],
+                                                "entries" : entries,
+                                                "variable" : location_block.variable,
+                                                }
+                                            ))
+            listens = []
+            for listen_address in addresses:
+                owner, socket_options = options.get(listen_address, (None, None))
+                listens.append("%s %s" % (listen_address, socket_options) if owner == domain else listen_address)
+            blocks.append(ServerBlock(**{
+                                            "listen" : listens[0],
+                                            "listens" : listens[1:],
+                                            "locations" : location_blocks,
+                                            "minimize" : minimize,
+                                            "server_name" : " ".join(domains),
+                                            }
+                                        ))
+        return blocks
+
+
+    def _socket_options(self):
+        """
+        Returns a dictionary mapping each address with socket options to a pair made of the domain
+        whose server block renders them, the first one in sorted order, and the options
+        themselves. Nginx rejects the options of an address given more than once, so the server
+        blocks of all the other domains leave them out.
+        """
+        options = {}
+        for address, listen_object in self._listen.items():
+            socket_options = listen_object.socket_options
+            if socket_options and listen_object.server_names:
+                options[address] = (min(listen_object.server_names), socket_options)
+        return options
+
+
+    def _update_invalid(self, location, invalid):
+        """
+        Adds the given Location to, or removes it from, the invalid Locations of the whole tree.
+        """
+        if invalid:
+            self._invalid_locations[location] = None
+        else:
+            self._invalid_locations.pop(location, None)
+
+
+    def _update_invalid_listen(self, listen, invalid):
+        """
+        Adds the given Listen to, or removes it from, the Listen objects of the tree whose socket
+        options conflict.
+        """
+        if invalid:
+            self._invalid_listens[listen] = None
+        else:
+            self._invalid_listens.pop(listen, None)
+
+
+    def add_directives(self, directives):
+        """
+        Adds a batch of directives to those currently part of the Nrt. The whole batch, addresses,
+        parameters and listen options included, is validated before any of its directives is
+        stored, and the tree is built once at the end, rather than once per directive. The
+        directives are only stored once the tree is built. The resulting tree is the same obtained
+        by assigning the directives one by one.
+        """
+        if directives is None:
+            raise ValueError("The directives must be given.")
+        if isinstance(directives, (dict, str)):
+            raise TypeError("The directives must be an iterable of dictionaries, not %s." % (type(directives)))
+
+        directives = list(directives)
+        signatures = []
+        for directive in directives:
+            validate_directive(directive)
+            signatures.append(Signature.parse(directive["signature"]))
+            validate_address(signatures[-1].ip, signatures[-1].port)
+            validate_options(directive.get("parameters", {}).get("listen", None))
+            validate_parameters(directive, signatures[-1])
+
+        batch = set()
+        new_directives = []
+        new_keys = []
+        new_signatures = []
+        for directive, signature in zip(directives, signatures):
+            if directive["signature"] not in self._index and directive["signature"] not in batch:
+                batch.add(directive["signature"])
+                new_directives.append(directive)
+                new_keys.append(directive_key(directive))
+                new_signatures.append(signature)
+
+        self._build(new_directives, new_signatures, new_keys)
+        self._index.update(batch)
+        self._directives.extend(new_directives)
+        self._keys.extend(new_keys)
+        self._signatures.extend(new_signatures)
+
+
+    def collisions(self):
+        """
+        Yields a Collision record for each invalid Location of the Nrt, in the order they became
+        invalid. Each record carries the address and the domain the Location belongs to, the
+        location itself, its aliases and the reason why it is not valid. Only the invalid
+        Locations are visited.
+
+        A Collision record is then yielded for each Listen whose socket options conflict. Its
+        domain and location are None, and its aliases are those setting the conflicting options.
+        """
+        for location in list(self._invalid_locations):
+            server_name = location._parent
+            listen = server_name._parent
+            yield Collision(listen.address, server_name.domain, location.location, list(location.alias), location.reason)
+
+        for listen in list(self._invalid_listens):
+            aliases = []
+            for values in listen._options.values():
+                if len(values) > 1:
+                    aliases.extend(alias for value in values.values() for alias in value if alias not in aliases)
+            yield Collision(listen.address, None, None, aliases, listen.reason)
+
+
+    @property
+    def balance(self):
+        """
+        Returns whether the Nrt balances the requests to a Python location among the containers
+        claiming it.
+        """
+        return self._balance
 
 
     @property
@@ -76,34 +531,136 @@ class Nrt(object):
     @directives.setter
     def directives(self, directive):
         """
-        Adds a directive to those currently part of the Nrt.
+        Adds a directive to those currently part of the Nrt. The directive, address, parameters and
+        listen options included, is validated first, and only stored once routed down the tree.
         """
-        signature_regex =  compile("^\w+:[\w\.]+:\d+:[\w\.]+:[\w/]+$")
+        validate_directive(directive)
+        signature = Signature.parse(directive["signature"])
+        validate_address(signature.ip, signature.port)
+        validate_options(directive.get("parameters", {}).get("listen", None))
+        validate_parameters(directive, signature)
 
-        if directive is None:
-            raise ValueError("A directive name must be given.")
-        if not isinstance(directive, dict):
-            raise TypeError("The directive name must be a dictionary, not %s." % (type(directive)))
-        if 'signature' not in directive.keys():
-            raise ValueError("A directive is expected to have a 'signature'.")
-        if not isinstance(directive['signature'], str):
-            raise TypeError("The signature is expected as a string, not %s." % (type(directive['signature'])))
-        if not signature_regex.match(directive['signature']):
-            raise ValueError("A signature must have the following format: 'alias:ip:port:server_name:location'")
-
-        if directive["signature"] not in [directive["signature"] for directive in self._directives]:
+        if directive["signature"] not in self._index:
+            key = directive_key(directive)
+            self._build([directive], [signature], [key])
+            self._index.add(directive["signature"])
             self._directives.append(directive)
-
-        self._build()
+            self._keys.append(key)
+            self._signatures.append(signature)
 
 
-    @property
-    def export(self, *args, **kwargs):
+    def export(self, path, workers=1, pool="thread", merge=False, minimize=False):
         """
         Exports the Nrt into virtual host configuration files. Only valid Nrts can be exported to
-        file.
+        file. A file, named after the server name, is written in the given directory for each
+        server name. It holds a server block for each address the server name is served at. The
+        blocks are streamed through buffered writes, so the configuration is never rendered in
+        memory as a whole.
+
+        The export is incremental. The content of each file is fingerprinted as it is rendered and
+        the file is only written if its fingerprint differs from the one of the file on disk.
+        Files written by a previous export whose server name is not part of the Nrt anymore are
+        removed. Files not written by an export are never touched: a ValueError exception is
+        raised, and nothing is written, if any of them would be overwritten. Returns a Changes
+        record, listing the paths of the added, changed and removed files: if all are empty, Nginx
+        does not need to be reloaded. It also tells how many server blocks merging saved.
+
+        If merge is True, the server names of an address whose locations only differ in the
+        Upstream blocks they pass requests to are merged into a single server block, exported to
+        the file of the first of them. Locations whose Upstream block differs among the merged
+        server names pass requests to a variable, set per host by a Map block exported along with
+        the server block. A server name all of whose server blocks are merged into others has no
+        file of its own. The server blocks of a server name which serve it the very same way at
+        different addresses are merged too, into a single server block listening to all of them.
+
+        If minimize is True, the directives all the locations of a server block share are set once
+        at the server level, and redundant ones, such as allow all, are dropped. Server blocks are
+        left as they are if minimizing them would change how requests are served. The returned
+        Changes tells how many bytes minimizing saved.
+
+        The blocks of the Nrt living in the http context, if any, are exported along with the
+        virtual host files, to files of their own which Nginx includes along with them: the
+        Upstream blocks to nrt-upstreams.conf, the proxy cache zones to nrt-caches.conf and the
+        sizing of the server names hash tables to nrt-server-names-hash.conf. A ValueError
+        exception is raised if two locations define the same cache zone, or the same Upstream
+        block, differently, or if two cache zones share the same path.
+
+        Nginx never sees a half written file. Files are written into a staging directory and, once
+        all of them are ready, fsynced in batches and atomically renamed over their counterparts.
+
+        By default files are exported one after the other. If more than one worker is requested,
+        they are rendered and written by a pool of that many workers, either threads or processes,
+        as chosen through the pool parameter. Files are handed over to the pool in batches, and
+        only a bounded number of batches is pending at any time. The files, as well as the
+        returned Changes, are the same in all cases.
         """
-        raise NotImplementedError
+        if not self.is_valid:
+            raise SystemError("The NRT is not valid!")
+        if path is None:
+            raise ValueError("A path must be given.")
+        if not isinstance(path, str):
+            raise TypeError("The path must be a string, not %s." % (type(path).__name__))
+        if not isdir(path):
+            raise ValueError("%s is not a directory." % (path))
+        if not isinstance(workers, int) or isinstance(workers, bool):
+            raise TypeError("The workers must be an integer, not %s." % (type(workers).__name__))
+        if workers < 1:
+            raise ValueError("%s is not a valid number of workers." % (workers))
+        if pool not in POOLS:
+            raise ValueError("%s is not a valid pool, it must be one of %s." % (pool, ", ".join(sorted(POOLS))))
+        if not isinstance(merge, bool):
+            raise TypeError("The merge must be a boolean, not %s." % (type(merge).__name__))
+        if not isinstance(minimize, bool):
+            raise TypeError("The minimize must be a boolean, not %s." % (type(minimize).__name__))
+
+        domains = self._domains()
+        merges = self._merges() if merge else {}
+        saved = 0
+        for domain in list(domains):
+            addresses = [address for address in domains[domain] if merges.get(address, {}).get(domain, [domain])[0] == domain]
+            groups = self._listen_groups(domain, addresses, merges) if merge else [[address] for address in addresses]
+            saved += len(domains[domain]) - len(groups)
+            if groups:
+                domains[domain] = groups
+            else:
+                del domains[domain]
+        http_blocks = self._http_blocks(merge)
+        options = self._socket_options()
+        changes = Changes([], [], [], saved, 0)
+        trimmed = 0
+        vhosts = ["%s.conf" % (domain) for domain in sorted(domains)]
+        jobs = ((join(path, vhost), self._server_blocks(domain, domains[domain], options, merges, minimize)) for vhost, domain in zip(vhosts, sorted(domains)))
+        if http_blocks:
+            vhosts.extend([filename for filename, blocks in http_blocks])
+            jobs = chain([(join(path, filename), blocks) for filename, blocks in http_blocks], jobs)
+        foreign = unmanaged(path, vhosts)
+        if foreign:
+            raise ValueError("%s would be overwritten, but not written by an export." % (", ".join(foreign)))
+        staging = stage(path)
+
+        if workers == 1:
+            for filename, server_blocks in jobs:
+                trimmed += self._collect(changes, [filename], [export_vhost(filename, server_blocks, staging)])
+        else:
+            with POOLS[pool](max_workers=workers) as executor:
+                pending = deque()
+                batch = list(islice(jobs, BATCH_SIZE))
+                while batch:
+                    pending.append(([filename for filename, server_blocks in batch], executor.submit(export_vhosts, batch, staging)))
+                    if len(pending) >= 2 * workers:
+                        filenames, future = pending.popleft()
+                        trimmed += self._collect(changes, filenames, future.result())
+                    batch = list(islice(jobs, BATCH_SIZE))
+                while pending:
+                    filenames, future = pending.popleft()
+                    trimmed += self._collect(changes, filenames, future.result())
+
+        removed = [vhost for vhost in sorted(read_manifest(path) - set(vhosts)) if isfile(join(path, vhost))]
+        changes.removed.extend([join(path, vhost) for vhost in removed])
+
+        write_manifest(staging, vhosts)
+        commit(path, staging, [basename(filename) for filename in changes.added + changes.changed] + [MANIFEST], removed)
+        return changes._replace(trimmed=trimmed)
 
 
     @property
@@ -111,11 +668,11 @@ class Nrt(object):
         """
         Returns whether the Nrt's current status is valid or not. The Nrt is not valid if any of
         its listen istances is not. Only valid Nrts can be exported to virtual host files.
+
+        Each level of the tree keeps track of the invalid Locations below it as they change, so the
+        validity of the Nrt is known without walking the tree.
         """
-        for listen in self.listen.values():
-            if not listen.is_valid:
-                return False
-        return True
+        return len(self._invalid_locations) == 0 and len(self._invalid_listens) == 0
 
 
     @property
@@ -138,21 +695,22 @@ class Nrt(object):
         
         if listen.address not in self._listen.keys():
             self._listen[listen.address] = listen
+            listen._parent = self
+            for location in list(listen._invalid_locations):
+                self._update_invalid(location, True)
+            if not listen._valid_options:
+                self._update_invalid_listen(listen, True)
 
 
     def resolve(self):
         """
-        Resolves the NRT into proper Nginx blocks.
+        Resolves the NRT into proper Nginx blocks. Returns a generator of ResolvedServer records,
+        one per server block, each carrying its address, its server name and the ResolvedLocation
+        records of its location blocks. A ResolvedLocation carries its first alias, as well as all
+        of them, which only differ for the upstream pool of a balanced Nrt. The records are
+        produced lazily and refer to the state of the tree, which is not copied.
         """
         if not self.is_valid:
             raise SystemError("The NRT is not valid!")
 
-        for listening_address, listen_object in self.listen.items():
-            for server_name, server_object in listen_object.server_names.items():
-                print("Server Block")
-                print("%s\t%s" % (listening_address, server_name))
-                for location, location_object in server_object.locations.items():
-                    print("\tLocation Block")
-                    print("\t%s\tserved by container %s" % (location, ', '.join(location_object.alias)))
-                    print("\n")
-                print("\n")
+        return self._resolve()
@@ -7,12 +7,12 @@ matched then, the server name of those Listen entries that were positive. A Serv
 associated to Listen objects. Two ServerName instances can have the same value but be associated
 to different Listen instances: despite having the same value, they are different instances.
 
-Each ServerName has one to N unique Location objects associated to it.
+Each ServerName has one to N unique Location objects associated to it. It keeps track of those that
+are invalid, which its Locations report as they change.
 """
 
-from re import compile, match
-
-from nrt.location import Location
+from nrt.directive import directive_key, Signature, validate_directive
+from nrt.location import Location, validate_parameters
 
 
 class ServerName(object):
@@ -21,27 +21,69 @@ class ServerName(object):
     """
     def __init__(self, *args, **kwargs):
         """
-        Initializes a ServerName instance. 
+        Initializes a ServerName instance. Whether its Locations are balanced can be optionally
+        passed in, and defaults to False.
         """
+        self._balance = kwargs.get("balance", False)
         self._directives = []
+        self._index = set()
+        self._invalid_locations = {}
+        self._keys = []
+        self._signatures = []
         self.domain = kwargs.get("domain", None)
         self._locations = {}
+        self._parent = None
 
 
-    def _build(self, *args, **kwargs):
+    def _build(self, directives=None, signatures=None, keys=None):
         """
-        Turns the input directives into a unique list of Location objects.
+        Turns the input directives into a unique list of Location objects. Only the given
+        directives are routed, all of them if none is given.
         """
-        for directive in self.directives:
-            alias, ip, port, server_name, location = directive["signature"].split(":")
+        if directives is None:
+            directives, signatures, keys = self._directives, self._signatures, self._keys
+
+        for directive, signature, key in zip(directives, signatures, keys):
 
-            if location not in self.locations.keys():
+            if signature.location not in self._locations:
                 handle_location = Location(**{
-                                                "location" : location,
+                                                "balance" : self._balance,
+                                                "location" : signature.location,
                                                 }
                                             )
                 self.locations = handle_location
-            self.locations[location].directives = directive
+            self._locations[signature.location]._insert(directive, signature, key)
+
+
+    def _insert(self, directive, signature, key=None):
+        """
+        Routes a directive down the tree, unless an equal one is already stored, and stores it
+        along with its parsed signature and its canonical key. The key, handed down by the upper
+        level of the tree, is only computed if not given. The directive is only stored once routed,
+        so that one failing to route can be given again. It is expected to be already validated.
+        """
+        if key is None:
+            key = directive_key(directive)
+        if key not in self._index:
+            self._build([directive], [signature], [key])
+            self._index.add(key)
+            self._directives.append(directive)
+            self._keys.append(key)
+            self._signatures.append(signature)
+
+
+    def _update_invalid(self, location, invalid):
+        """
+        Adds the given Location to, or removes it from, the invalid Locations below the ServerName,
+        propagating the change to the upper level of the tree, if any.
+        """
+        if invalid:
+            self._invalid_locations[location] = None
+        else:
+            self._invalid_locations.pop(location, None)
+
+        if self._parent is not None:
+            self._parent._update_invalid(location, invalid)
 
 
     @property
@@ -55,25 +97,14 @@ class ServerName(object):
     @directives.setter
     def directives(self, directive):
         """
-        Adds a directive to the directives of the ServerName object.
+        Adds a directive to the directives of the ServerName object. The directive, and its
+        parameters, are validated, while those handed down by the upper level of the tree, through
+        _insert, are not.
         """
-        signature_regex =  compile("^\w+:[\w\.]+:\d+:[\w\.]+:[\w/]+$")
-
-        if directive is None:
-            raise ValueError("A directive name must be given.")
-        if not isinstance(directive, dict):
-            raise TypeError("The directive name must be a dictionary, not %s." % (type(directive)))
-        if 'signature' not in directive.keys():
-            raise ValueError("A directive is expected to have a 'signature'.")
-        if not isinstance(directive['signature'], str):
-            raise TypeError("The signature is expected as a string, not %s." % (type(directive['signature'])))
-        if not signature_regex.match(directive['signature']):
-            raise ValueError("A signature must have the following format: 'alias:ip:port:server_name:location'")
-
-        if directive not in self._directives:
-            self._directives.append(directive)
-
-        self._build()
+        validate_directive(directive)
+        signature = Signature.parse(directive["signature"])
+        validate_parameters(directive, signature)
+        self._insert(directive, signature)
 
 
     @property
@@ -104,12 +135,10 @@ class ServerName(object):
     def is_valid(self):
         """
         Returns whether the ServerName is valid or not. The ServerName is not valid if any of its
-        locations is not.
+        locations is not. The invalid locations are tracked as they change, so no location is
+        visited.
         """
-        for location in self.locations.values():
-            if not location.is_valid:
-                return False
-        return True
+        return len(self._invalid_locations) == 0
 
 
     @property
@@ -132,3 +161,6 @@ class ServerName(object):
 
         if location.location not in self._locations.keys():
             self._locations[location.location] = location
+            location._parent = self
+            if not location.is_valid:
+                self._update_invalid(location, True)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the Cache module.
+"""
+
+from nrt.blocks.cache import LRUCache
+from nrt.tests.test_base import TestBase
+
+
+class TestCache(TestBase):
+    """
+    A class containing unit tests for the Cache module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestCache, self).setUp(*args, **{
+                                                "test_module_filename" : __file__
+                                                }
+                                    )
+
+
+    def test_clear_correct(self):
+        """
+        Tests that clearing a cache removes all its entries and resets its counters.
+        """
+        handle_cache = LRUCache(**{"maxsize" : 2})
+        handle_cache.put("foo", "bar")
+        handle_cache.get("foo")
+        handle_cache.get("baz")
+        handle_cache.clear()
+        self.assertEqual(len(handle_cache), 0)
+        self.assertEqual((handle_cache.hits, handle_cache.misses), (0, 0))
+        del handle_cache
+
+
+    def test_get_correct(self):
+        """
+        Tests that a cache returns the entries it holds, None otherwise, and counts hits and misses.
+        """
+        handle_cache = LRUCache()
+        self.assertEqual(handle_cache.maxsize, 4096)
+        handle_cache.put("foo", "bar")
+        self.assertEqual(handle_cache.get("foo"), "bar")
+        self.assertIsNone(handle_cache.get("baz"))
+        self.assertEqual((handle_cache.hits, handle_cache.misses), (1, 1))
+        del handle_cache
+
+
+    def test_maxsize_correct_shrink(self):
+        """
+        Tests that shrinking a cache evicts its least recently used entries.
+        """
+        handle_cache = LRUCache(**{"maxsize" : 3})
+        for key in ("foo", "bar", "baz"):
+            handle_cache.put(key, key)
+        handle_cache.get("foo")
+        handle_cache.maxsize = 1
+        self.assertEqual(len(handle_cache), 1)
+        self.assertEqual(handle_cache.get("foo"), "foo")
+        del handle_cache
+
+
+    def test_maxsize_correct_zero(self):
+        """
+        Tests that a cache whose maximum size is 0 never stores anything.
+        """
+        handle_cache = LRUCache(**{"maxsize" : 0})
+        handle_cache.put("foo", "bar")
+        self.assertEqual(len(handle_cache), 0)
+        self.assertIsNone(handle_cache.get("foo"))
+        del handle_cache
+
+
+    def test_maxsize_wrong(self):
+        """
+        Tests that the proper exceptions are raised if the maximum size of a cache is not a non
+        negative integer.
+        """
+        handle_cache = LRUCache()
+        self.assertRaises(ValueError, setattr, handle_cache, "maxsize", -1)
+        for maxsize in ("1", 1.0, True, None):
+            self.assertRaises(TypeError, setattr, handle_cache, "maxsize", maxsize)
+        del handle_cache
+
+
+    def test_put_correct_eviction(self):
+        """
+        Tests that a full cache evicts its least recently used entry, rather than the oldest one.
+        """
+        handle_cache = LRUCache(**{"maxsize" : 2})
+        handle_cache.put("foo", 1)
+        handle_cache.put("bar", 2)
+        handle_cache.get("foo")
+        handle_cache.put("baz", 3)
+        self.assertEqual(len(handle_cache), 2)
+        self.assertIsNone(handle_cache.get("bar"))
+        self.assertEqual(handle_cache.get("foo"), 1)
+        self.assertEqual(handle_cache.get("baz"), 3)
+        del handle_cache
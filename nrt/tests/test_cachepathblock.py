@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the CachePathBlock module.
+"""
+
+from nrt.blocks.cache_path.base import CachePathBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestCachePathBlock(TestBase):
+    """
+    A class containing unit tests for the CachePathBlock module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestCachePathBlock, self).setUp(*args, **{
+                                                        "test_module_filename" : __file__
+                                                        }
+                                            )
+
+
+    def test_export_correct(self):
+        """
+        Tests that a proxy cache path block defines its zone, with its defaults, on a single line.
+        """
+        handle_block = CachePathBlock(**{})
+        expected_response = "proxy_cache_path /var/cache/nginx/microcache levels=1:2 keys_zone=microcache:10m max_size=1g inactive=10m use_temp_path=off;\n"
+        self.assertEqual("".join(handle_block.export()), expected_response)
+        self.assertEqual(handle_block.zone, "microcache")
+        del handle_block
+
+
+    def test_export_correct_custom_settings(self):
+        """
+        Tests that the zone settings passed in replace the defaults, while the settings of the
+        Location blocks are ignored.
+        """
+        handle_block = CachePathBlock(**{"path" : "/tmp/api", "size" : "1m", "valid" : "5s", "zone" : "api"})
+        self.assertTrue("".join(handle_block.export()).startswith("proxy_cache_path /tmp/api levels=1:2 keys_zone=api:1m "))
+        self.assertFalse("valid" in handle_block.settings)
+        del handle_block
+
+
+    def test_export_correct_default_path(self):
+        """
+        Tests that the path of a zone defaults to a directory named after it.
+        """
+        handle_block = CachePathBlock(**{"zone" : "api"})
+        self.assertEqual(handle_block.settings["path"], "/var/cache/nginx/api")
+        del handle_block
+
+
+    def test_settings_wrong(self):
+        """
+        Tests that the proper exceptions are raised if a zone setting is unknown, is not a string
+        or does not have a valid value.
+        """
+        handle_block = CachePathBlock(**{})
+        self.assertRaises(ValueError, setattr, handle_block, "settings", ("valid", "1s"))
+        self.assertRaises(ValueError, setattr, handle_block, "settings", ("path", "cache"))
+        self.assertRaises(ValueError, setattr, handle_block, "settings", ("zone", "micro cache"))
+        self.assertRaises(TypeError, setattr, handle_block, "settings", ("size", 10))
+        del handle_block
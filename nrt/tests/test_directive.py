@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the Directive module.
+"""
+
+from nrt.directive import directive_key, freeze, Signature
+from nrt.tests.test_base import TestBase
+
+
+class TestDirective(TestBase):
+    """
+    A class containing unit tests for the Directive module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestDirective, self).setUp(*args, **{
+                                                    "test_module_filename" : __file__
+                                                    }
+                                        )
+        self.valid_signature = "a:0.0.0.0:80:a.b.c:/"
+
+
+    def test_directive_key_correct(self):
+        """
+        Tests that two directives having the same signature and equal parameters share the same key,
+        no matter the order their parameters were given in.
+        """
+        directive = {
+                        "signature" : self.valid_signature,
+                        "parameters" : {"allow" : ["1.2.3.4"], "language" : "python", "gunicorn" : {"ip" : "1.2.3.4", "port" : "1234"}},
+                        }
+        same_directive = {
+                            "signature" : self.valid_signature,
+                            "parameters" : {"gunicorn" : {"port" : "1234", "ip" : "1.2.3.4"}, "language" : "python", "allow" : ["1.2.3.4"]},
+                            }
+        self.assertEqual(directive_key(directive), directive_key(same_directive))
+        self.assertEqual(len(set([directive_key(directive), directive_key(same_directive)])), 1)
+
+
+    def test_directive_key_correct_different_parameters(self):
+        """
+        Tests that two directives having the same signature but different parameters have
+        different keys.
+        """
+        directive = { "signature" : self.valid_signature, "parameters" : {"language" : "php"}}
+        other_directive = { "signature" : self.valid_signature, "parameters" : {"language" : "python"}}
+        self.assertNotEqual(directive_key(directive), directive_key(other_directive))
+
+
+    def test_directive_key_correct_no_parameters(self):
+        """
+        Tests that a directive without parameters has the same key of one having empty parameters.
+        """
+        directive = { "signature" : self.valid_signature}
+        other_directive = { "signature" : self.valid_signature, "parameters" : {}}
+        self.assertEqual(directive_key(directive), directive_key(other_directive))
+
+
+    def test_freeze_correct(self):
+        """
+        Tests that freeze turns nested dictionaries, lists and sets into hashable values.
+        """
+        value = {"a" : [1, {"b" : set([2, 3])}], "c" : "d"}
+        response = freeze(value)
+        self.assertTrue(isinstance(hash(response), int))
+        self.assertEqual(response, freeze({"c" : "d", "a" : [1, {"b" : set([3, 2])}]}))
+
+
+    def test_signature_parse_correct(self):
+        """
+        Tests that a signature string is properly parsed into its fields.
+        """
+        signature = Signature.parse("container1:1.2.3.4:8080:a.b.c:/location/")
+        self.assertEqual(signature.alias, "container1")
+        self.assertEqual(signature.ip, "1.2.3.4")
+        self.assertEqual(signature.port, "8080")
+        self.assertEqual(signature.server_name, "a.b.c")
+        self.assertEqual(signature.location, "/location/")
+        self.assertEqual(signature.address, "1.2.3.4:8080")
+
+
+    def test_signature_wrong_immutable(self):
+        """
+        Tests that an AttributeError exception is raised if we try to change a field of a parsed
+        signature or to add a new one.
+        """
+        signature = Signature.parse(self.valid_signature)
+        self.assertRaises(
+                            AttributeError,
+                            setattr,
+                            signature,
+                            "alias",
+                            "b",
+                            )
+        self.assertRaises(
+                            AttributeError,
+                            setattr,
+                            signature,
+                            "foo",
+                            "b",
+                            )
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the Gunicorn module.
+"""
+
+from nrt.blocks.location.gunicorn import GunicornLocationBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestGunicorn(TestBase):
+    """
+    A class containing unit tests for the Gunicorn module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestGunicorn, self).setUp(*args, **{
+                                                    "test_module_filename" : __file__
+                                                    }
+                                        )
+        self.valid_location = "/foo/"
+
+
+    def test_export_correct(self):
+        """
+        Tests that a Green Unicorn Location block proxies the requests to the Upstream block of its
+        server, after the allow and deny rules, through keepalive connections.
+        """
+        handle_block = GunicornLocationBlock(**{
+                                                "allow" : ["1.2.3.4"],
+                                                "ip" : "5.6.7.8",
+                                                "location" : self.valid_location,
+                                                "port" : "1234",
+                                                }
+                                            )
+        response = handle_block.export()
+        self.assertTrue(response.startswith("    location /foo/ {\n        allow 1.2.3.4;\n        deny all;\n        proxy_pass http://gunicorn_5_6_7_8_1234_322bb838;\n"))
+        self.assertTrue("        proxy_http_version 1.1;\n        proxy_set_header Connection \"\";\n" in response)
+        self.assertTrue(response.endswith("    }\n"))
+        del handle_block
+
+
+    def test_export_correct_backends(self):
+        """
+        Tests that a Green Unicorn Location block balancing among a pool of backends proxies to an
+        Upstream block named after its servers and its method.
+        """
+        backends = [{"ip" : "10.0.0.1", "weight" : "2"}, {"ip" : "10.0.0.2", "max_fails" : "3"}]
+        handle_block = GunicornLocationBlock(**{"backends" : backends, "location" : self.valid_location})
+        self.assertEqual(handle_block.servers, ["10.0.0.1:8000 weight=2", "10.0.0.2:8000 max_fails=3"])
+        self.assertTrue(handle_block.upstream.startswith("gunicorn_pool_"))
+        self.assertIn("proxy_pass http://%s;" % (handle_block.upstream), handle_block.export())
+        handle_other_block = GunicornLocationBlock(**{"backends" : backends, "location" : self.valid_location, "method" : "least_conn"})
+        self.assertNotEqual(handle_block.upstream, handle_other_block.upstream)
+        del handle_block
+        del handle_other_block
+
+
+    def test_export_correct_cache(self):
+        """
+        Tests that a Green Unicorn Location block caches the responses of its server only if asked
+        to, with the given settings replacing the defaults.
+        """
+        handle_block = GunicornLocationBlock(**{"location" : self.valid_location})
+        self.assertFalse("proxy_cache" in handle_block.export())
+        handle_cached_block = GunicornLocationBlock(**{"cache" : {"valid" : "5s"}, "location" : self.valid_location})
+        expected_lines = (
+                            "        proxy_cache microcache;\n"
+                            "        proxy_cache_valid 5s;\n"
+                            "        proxy_cache_key $scheme$request_method$host$request_uri;\n"
+                            "        proxy_cache_lock on;\n"
+                            "        proxy_cache_use_stale updating error timeout http_500 http_502 http_503 http_504;\n"
+                            "    }\n"
+                            )
+        self.assertTrue(handle_cached_block.export().endswith(expected_lines))
+        self.assertRaises(ValueError, setattr, handle_block, "cache", {"valid" : "soon"})
+        self.assertRaises(ValueError, setattr, handle_block, "cache", {"use_stale" : "always"})
+        self.assertRaises(TypeError, setattr, handle_block, "cache", "microcache")
+        del handle_block
+        del handle_cached_block
+
+
+    def test_export_correct_socket(self):
+        """
+        Tests that a Green Unicorn Location block reaches its server through its unix socket, if
+        one is given, through an Upstream block named after it.
+        """
+        handle_block = GunicornLocationBlock(**{"location" : self.valid_location, "socket" : "/run/app.sock"})
+        self.assertEqual(handle_block.servers, ["unix:/run/app.sock"])
+        self.assertEqual(handle_block.upstream, "gunicorn_unix__run_app_sock_2849ba06")
+        self.assertTrue("        proxy_pass http://gunicorn_unix__run_app_sock_2849ba06;\n" in handle_block.export())
+        handle_pool_block = GunicornLocationBlock(**{"backends" : [{"socket" : "/run/a.sock"}, {"port" : "8001"}], "location" : self.valid_location})
+        self.assertEqual(handle_pool_block.servers, ["unix:/run/a.sock", "127.0.0.1:8001"])
+        del handle_block
+        del handle_pool_block
+
+
+    def test_export_correct_variable(self):
+        """
+        Tests that a Green Unicorn Location block proxies the requests to its variable, if one is
+        given, and that its structure does not depend on its Upstream block.
+        """
+        handle_block = GunicornLocationBlock(**{"location" : self.valid_location, "variable" : "$nrt_backend"})
+        self.assertTrue("        proxy_pass http://$nrt_backend;\n" in handle_block.export())
+        handle_other_block = GunicornLocationBlock(**{"location" : self.valid_location, "port" : "8001"})
+        self.assertEqual(handle_block.structure(), handle_other_block.structure())
+        self.assertNotEqual(handle_block._key(), handle_other_block._key())
+        self.assertRaises(ValueError, setattr, handle_block, "variable", "nrt_backend")
+        del handle_block
+        del handle_other_block
+
+
+    def test_init_correct_default_values(self):
+        """
+        Tests that a Green Unicorn Location block defaults to 127.0.0.1:8000.
+        """
+        handle_block = GunicornLocationBlock(**{"location" : self.valid_location})
+        self.assertEqual(handle_block.ip, "127.0.0.1")
+        self.assertEqual(handle_block.port, "8000")
+        self.assertIsNone(handle_block.keepalive)
+        self.assertIsNone(handle_block.keepalive_requests)
+        self.assertEqual(handle_block.upstream, "gunicorn_127_0_0_1_8000_701ea28f")
+        del handle_block
+
+
+    def test_init_wrong_mistyped_keepalive(self):
+        """
+        Tests that a TypeError exception is raised if the keepalive settings are not given as
+        strings.
+        """
+        for setting in ("keepalive", "keepalive_requests"):
+            self.assertRaises(
+                                TypeError,
+                                GunicornLocationBlock,
+                                **{"location" : self.valid_location, setting : 32}
+                                )
+
+
+    def test_init_wrong_mistyped_port(self):
+        """
+        Tests that a TypeError exception is raised if the port is not given as a string.
+        """
+        self.assertRaises(
+                            TypeError,
+                            GunicornLocationBlock,
+                            **{"location" : self.valid_location, "port" : 8000}
+                            )
@@ -327,6 +327,24 @@ class TestListen(TestBase):
         del handle_listen
 
 
+    def test_is_valid_correct_conflicting_options(self):
+        """
+        Tests that the is_valid property correctly returns False if two directives set the same
+        socket option to different values, and that the reason tells so.
+        """
+        directives = [
+                        { "signature" : "container1:0.0.0.0:80:a.b.c:/location1/", "parameters" : {"listen" : {"backlog" : "4096"}}},
+                        { "signature" : "container2:0.0.0.0:80:d.e.f:/location1/", "parameters" : {"listen" : {"backlog" : "511"}}}
+                        ]
+        handle_listen = Listen(**{})
+        for directive in directives:
+            handle_listen.directives = directive
+        self.assertFalse(handle_listen.is_valid)
+        self.assertEqual(handle_listen.reason, "conflicting listen options")
+        self.assertEqual(handle_listen.options, {})
+        del handle_listen
+
+
     def test_is_valid_ipv4_address_correct_valid_ip(self):
         """
         Tests that __is_valid_ipv4_address properly returns True if it is passed a valid IPv4.
@@ -378,6 +396,60 @@ class TestListen(TestBase):
         del handle_listen
 
 
+    def test_options_correct(self):
+        """
+        Tests that the options property merges the socket options of all the directives of a
+        Listen object, and that socket_options renders them sorted, leaving out those turned off.
+        """
+        directives = [
+                        { "signature" : "container1:0.0.0.0:80:a.b.c:/", "parameters" : {"listen" : {"reuseport" : "on", "backlog" : "4096"}}},
+                        { "signature" : "container2:0.0.0.0:80:d.e.f:/", "parameters" : {"listen" : {"backlog" : "4096", "deferred" : "off", "fastopen" : "256"}}},
+                        { "signature" : "container3:0.0.0.0:80:g.h.i:/"},
+                        ]
+        handle_listen = Listen(**{})
+        for directive in directives:
+            handle_listen.directives = directive
+        self.assertEqual(handle_listen.options, {"backlog" : "4096", "deferred" : "off", "fastopen" : "256", "reuseport" : "on"})
+        self.assertEqual(handle_listen.socket_options, "backlog=4096 fastopen=256 reuseport")
+        self.assertIsNone(handle_listen.reason)
+        self.assertTrue(handle_listen.is_valid)
+        del handle_listen
+
+
+    def test_options_correct_empty(self):
+        """
+        Tests that a Listen object has no socket options unless its directives set them.
+        """
+        handle_listen = Listen(**{})
+        handle_listen.directives = { "signature" : "container1:0.0.0.0:80:a.b.c:/"}
+        self.assertEqual(handle_listen.options, {})
+        self.assertEqual(handle_listen.socket_options, "")
+        del handle_listen
+
+
+    def test_options_wrong(self):
+        """
+        Tests that the proper exception is raised if a directive passes in malformed socket
+        options.
+        """
+        handle_listen = Listen(**{})
+        for options, exception in (
+                                    ("reuseport", TypeError),
+                                    ({"rcvbuf" : "8k"}, ValueError),
+                                    ({"backlog" : 4096}, TypeError),
+                                    ({"backlog" : "many"}, ValueError),
+                                    ({"reuseport" : "yes"}, ValueError),
+                                    ):
+            self.assertRaises(
+                                exception,
+                                setattr,
+                                handle_listen,
+                                "directives",
+                                { "signature" : "container1:0.0.0.0:80:a.b.c:/", "parameters" : {"listen" : options}},
+                                )
+        del handle_listen
+
+
     def test_server_names_correct_empty(self):
         """
         Tests that the server_names property properly returns a map of ServerName instances
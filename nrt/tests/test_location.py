@@ -345,6 +345,24 @@ class TestLocation(TestBase):
         del handle_location
         
 
+    def test_directives_correct_no_dupes_language_configuration(self):
+        """
+        Tests that a Location object stores a unique copy of a Python directive added multiple
+        times, and that the Gunicorn defaults do not leak into the directive's parameters.
+        """
+        directive = { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {}}}
+        handle_location = Location(**{
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        for i in range(3):
+            handle_location.directives = directive
+        self.assertEqual(len(handle_location.directives), 1)
+        self.assertEqual(directive["parameters"]["gunicorn"], {})
+        self.assertEqual(handle_location.language_configuration["ip"], "127.0.0.1")
+        del handle_location
+
+
     def test_directives_wrong_missing_directive(self):
         """
         Tests that a ValueError exception is raised if we try to add a directive to a ServerName
@@ -560,6 +578,51 @@ class TestLocation(TestBase):
         del handle_location
 
 
+    def test_is_valid_correct_multiple_aliases_balanced_mixed(self):
+        """
+        Tests that a balanced Location is not valid if any of its aliases does not serve Python, no
+        matter the order its directives are given in.
+        """
+        directives = [
+                        { "signature" : "foo1:0.0.0.0:80:a.b.c:/"},
+                        { "signature" : "foo2:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python"}},
+                        ]
+        for ordered in (directives, list(reversed(directives))):
+            handle_location = Location(**{
+                                            "balance" : True,
+                                            "location" : self.valid_location
+                                            }
+                                        )
+            for directive in ordered:
+                handle_location.directives = directive
+            self.assertFalse(handle_location.is_valid)
+            self.assertEqual(handle_location.reason, "multiple aliases")
+            del handle_location
+
+
+    def test_is_valid_correct_multiple_aliases_balanced(self):
+        """
+        Tests that a balanced Python Location is valid with multiple aliases, as long as they agree
+        on the upstream method, while a balanced HTML one is not.
+        """
+        handle_location = Location(**{
+                                        "balance" : True,
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        handle_location.directives = { "signature" : "foo1:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "upstream" : {"method" : "least_conn", "weight" : "2"}}}
+        handle_location.directives = { "signature" : "foo2:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "upstream" : {"method" : "least_conn"}}}
+        self.assertTrue(handle_location.is_valid)
+        self.assertEqual(handle_location.backends["foo1"], {"ip" : "127.0.0.1", "method" : "least_conn", "port" : "8000", "weight" : "2"})
+        handle_location.directives = { "signature" : "foo3:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "upstream" : {"method" : "hash"}}}
+        self.assertEqual(handle_location.reason, "conflicting upstream methods")
+        handle_location.language = "html"
+        self.assertEqual(handle_location.reason, "multiple aliases")
+        handle_location.balance = False
+        self.assertRaises(TypeError, setattr, handle_location, "balance", "yes")
+        del handle_location
+
+
     def test_language_correct(self):
         """
         Tests that the language property is properly set if we pass in a valid language.
@@ -674,6 +737,138 @@ class TestLocation(TestBase):
         del handle_location
 
 
+    def test_language_configuration_correct_socket(self):
+        """
+        Tests that Python and PHP backends can be reached through a unix socket, in which case
+        Gunicorn does not default to an IP and a port.
+        """
+        for language, key in (("python", "gunicorn"), ("php", "phpfpm")):
+            handle_location = Location(**{
+                                            "location" : self.valid_location
+                                            }
+                                        )
+            handle_location.directives = { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : language, key : {"socket" : "/run/app.sock"}}}
+            self.assertEqual(handle_location.language_configuration, {"socket" : "/run/app.sock"})
+            del handle_location
+
+
+    def test_language_configuration_wrong_cache(self):
+        """
+        Tests that the proper exceptions are raised if the cache settings of Gunicorn are not well
+        formed.
+        """
+        handle_location = Location(**{
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        handle_location.language = "python"
+        for cache, exception in (
+                                    ("on", TypeError),
+                                    ({"valid" : 1}, TypeError),
+                                    ({"valid" : "a second"}, ValueError),
+                                    ({"ttl" : "1s"}, ValueError),
+                                    ):
+            self.assertRaises(exception, setattr, handle_location, "language_configuration", {"cache" : cache})
+        del handle_location
+
+
+    def test_language_configuration_wrong_php(self):
+        """
+        Tests that the proper exceptions are raised if the PHP-FPM parameters are not well formed.
+        """
+        handle_location = Location(**{
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        handle_location.language = "php"
+        for configuration, exception in (
+                                            ({"port" : 9000}, TypeError),
+                                            ({"fastcgi_buffers" : "16"}, ValueError),
+                                            ({"fastcgi_buffer_size" : 32}, TypeError),
+                                            ({"keepalive" : "many"}, ValueError),
+                                            ):
+            self.assertRaises(exception, setattr, handle_location, "language_configuration", configuration)
+        del handle_location
+
+
+    def test_language_configuration_wrong_socket(self):
+        """
+        Tests that the proper exceptions are raised if a socket is not an absolute path, or if it
+        is given along with an IP or a port.
+        """
+        handle_location = Location(**{
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        for language in ("php", "python"):
+            handle_location.language = language
+            self.assertRaises(TypeError, setattr, handle_location, "language_configuration", {"socket" : 1})
+            self.assertRaises(ValueError, setattr, handle_location, "language_configuration", {"socket" : "run/app.sock"})
+            self.assertRaises(ValueError, setattr, handle_location, "language_configuration", {"socket" : "/run/app.sock", "port" : "8000"})
+        del handle_location
+
+
+    def test_language_configuration_wrong_keepalive(self):
+        """
+        Tests that the proper exceptions are raised if the keepalive settings of Gunicorn are not
+        given as strings of digits.
+        """
+        handle_location = Location(**{
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        handle_location.language = "python"
+        for setting in ("keepalive", "keepalive_requests"):
+            self.assertRaises(TypeError, setattr, handle_location, "language_configuration", {setting : 32})
+            self.assertRaises(ValueError, setattr, handle_location, "language_configuration", {setting : "-1"})
+        del handle_location
+
+
+    def test_language_configuration_wrong_upstream(self):
+        """
+        Tests that the proper exceptions are raised if the upstream parameters of a directive are
+        not well formed.
+        """
+        for upstream, exception in (
+                                    ("least_conn", TypeError),
+                                    ({"weight" : 2}, TypeError),
+                                    ({"weight" : "heavy"}, ValueError),
+                                    ({"max_fails" : "-1"}, ValueError),
+                                    ({"method" : "random"}, ValueError),
+                                    ):
+            handle_location = Location(**{
+                                            "balance" : True,
+                                            "location" : self.valid_location
+                                            }
+                                        )
+            self.assertRaises(
+                                exception,
+                                setattr,
+                                handle_location,
+                                "directives",
+                                { "signature" : "foo:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "upstream" : upstream}},
+                                )
+            del handle_location
+
+
+    def test_static_correct(self):
+        """
+        Tests that a Location only opts in to the static profile if its directive asks for it, and
+        that its settings are validated.
+        """
+        handle_location = Location(**{
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        self.assertIsNone(handle_location.static)
+        handle_location.directives = { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"static" : {"expires" : "7d"}}}
+        self.assertEqual(handle_location.static, {"expires" : "7d"})
+        self.assertRaises(TypeError, setattr, handle_location, "static", "on")
+        self.assertRaises(ValueError, setattr, handle_location, "static", {"expires" : "a week"})
+        self.assertRaises(ValueError, setattr, handle_location, "static", {"autoindex" : "on"})
+        del handle_location
+
+
     def test_language_configuration_wrong_mistyped(self):
         """
         Tests that a TypeError exception is raised if the language configuration is passed in, but
@@ -734,3 +929,26 @@ class TestLocation(TestBase):
                             directive,
                             )
         del handle_location
+
+
+    def test_reason_correct(self):
+        """
+        Tests that the reason property tells why a Location is not valid, and returns None once it
+        is.
+        """
+        handle_location = Location(**{
+                                        "location" : self.valid_location
+                                        }
+                                    )
+        self.assertEqual(handle_location.reason, "no alias")
+        handle_location.alias = "foo1"
+        self.assertEqual(handle_location.reason, None)
+        handle_location.deny = ["all"]
+        self.assertEqual(handle_location.reason, "allow and deny all")
+        handle_location.allow = []
+        handle_location.deny = []
+        self.assertEqual(handle_location.reason, "empty allow and deny")
+        handle_location.allow = ["all"]
+        handle_location.alias = "foo2"
+        self.assertEqual(handle_location.reason, "multiple aliases")
+        del handle_location
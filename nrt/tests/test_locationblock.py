@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the LocationBlock module.
+"""
+
+from nrt.blocks.location.base import LocationBlock, RENDER_CACHE
+from nrt.blocks.location.gunicorn import GunicornLocationBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestLocationBlock(TestBase):
+    """
+    A class containing unit tests for the LocationBlock module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestLocationBlock, self).setUp(*args, **{
+                                                        "test_module_filename" : __file__
+                                                        }
+                                            )
+        self.valid_location = "/foo/"
+        RENDER_CACHE.clear()
+
+
+    def test_allow_and_deny_correct_independent(self):
+        """
+        Tests that allow and deny directives are stored separately.
+        """
+        handle_location_block = LocationBlock(**{})
+        handle_location_block.allow = "1.2.3.4"
+        handle_location_block.deny = "5.6.7.8"
+        self.assertEqual(handle_location_block.allow, ["1.2.3.4"])
+        self.assertEqual(handle_location_block.deny, ["5.6.7.8"])
+        del handle_location_block
+
+
+    def test_export_correct_allow_all(self):
+        """
+        Tests that a Location block allowing all renders the specific deny rules before the allow
+        all one.
+        """
+        handle_location_block = LocationBlock(**{
+                                                    "allow" : ["all"],
+                                                    "deny" : ["1.2.3.4"],
+                                                    "location" : self.valid_location,
+                                                    }
+                                                )
+        expected_response = "    location /foo/ {\n        deny 1.2.3.4;\n        allow all;\n    }\n"
+        self.assertEqual(handle_location_block.export(), expected_response)
+        del handle_location_block
+
+
+    def test_export_correct_allow_specific(self):
+        """
+        Tests that a Location block allowing specific IPs only denies anybody else.
+        """
+        handle_location_block = LocationBlock(**{
+                                                    "allow" : ["1.2.3.4", "5.6.7.0/24"],
+                                                    "location" : self.valid_location,
+                                                    }
+                                                )
+        expected_response = "    location /foo/ {\n        allow 1.2.3.4;\n        allow 5.6.7.0/24;\n        deny all;\n    }\n"
+        self.assertEqual(handle_location_block.export(), expected_response)
+        del handle_location_block
+
+
+    def test_export_correct_cached(self):
+        """
+        Tests that identical blocks are rendered once, while blocks differing in any rendered field
+        are not served each other's text.
+        """
+        blocks = [
+                    LocationBlock(**{"allow" : ["1.2.3.4"], "location" : self.valid_location}),
+                    LocationBlock(**{"allow" : ["1.2.3.4"], "location" : self.valid_location}),
+                    LocationBlock(**{"allow" : ["5.6.7.8"], "location" : self.valid_location}),
+                    GunicornLocationBlock(**{"location" : self.valid_location, "port" : "8000"}),
+                    GunicornLocationBlock(**{"location" : self.valid_location, "port" : "8001"}),
+                    ]
+        responses = [handle_location_block.export() for handle_location_block in blocks]
+        self.assertEqual(responses[0], responses[1])
+        self.assertEqual(len(set(responses)), 4)
+        self.assertIn("8001", responses[4])
+        self.assertEqual((RENDER_CACHE.hits, RENDER_CACHE.misses), (1, 4))
+        self.assertEqual(len(RENDER_CACHE), 4)
+        del blocks
+
+
+    def test_init_correct(self):
+        """
+        Tests that a LocationBlock object is properly instantiated with its optional parameters.
+        """
+        handle_location_block = LocationBlock(**{
+                                                    "allow" : ["all"],
+                                                    "deny" : ["1.2.3.4"],
+                                                    "location" : self.valid_location,
+                                                    }
+                                                )
+        self.assertEqual(handle_location_block.allow, ["all"])
+        self.assertEqual(handle_location_block.deny, ["1.2.3.4"])
+        self.assertEqual(handle_location_block.location, self.valid_location)
+        del handle_location_block
+
+
+    def test_structure_correct(self):
+        """
+        Tests that a basic Location block does not pass requests to any Upstream block, so that
+        its structure is its whole state.
+        """
+        handle_block = LocationBlock(**{"location" : "/", "deny" : ["1.2.3.4"]})
+        self.assertIsNone(handle_block.upstream)
+        self.assertEqual(handle_block.structure(), handle_block._key())
+        del handle_block
+
+
+    def test_location_wrong_mistyped(self):
+        """
+        Tests that a TypeError exception is raised if the location is not a string.
+        """
+        handle_location_block = LocationBlock(**{})
+        self.assertRaises(
+                            TypeError,
+                            setattr,
+                            handle_location_block,
+                            "location",
+                            123,
+                            )
+        del handle_location_block
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the MapBlock module.
+"""
+
+from nrt.blocks.map.base import MapBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestMapBlock(TestBase):
+    """
+    A class containing unit tests for the MapBlock module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestMapBlock, self).setUp(*args, **{
+                                                    "test_module_filename" : __file__
+                                                    }
+                                        )
+        self.valid_variable = "$nrt_backend"
+
+
+    def test_export_correct(self):
+        """
+        Tests that a Map block is exported with its entries, in the order they were given.
+        """
+        handle_map_block = MapBlock(**{
+                                        "entries" : [("d.e.f", "gunicorn_127_0_0_1_8001"), ("a.b.c", "gunicorn_127_0_0_1_8000")],
+                                        "variable" : self.valid_variable,
+                                        }
+                                    )
+        expected_response = (
+                                "map $host $nrt_backend {\n"
+                                "    d.e.f gunicorn_127_0_0_1_8001;\n"
+                                "    a.b.c gunicorn_127_0_0_1_8000;\n"
+                                "}\n"
+                                )
+        self.assertEqual("".join(handle_map_block.export()), expected_response)
+        del handle_map_block
+
+
+    def test_export_correct_default(self):
+        """
+        Tests that the default of a Map block is exported before its entries.
+        """
+        handle_map_block = MapBlock(**{
+                                        "default" : "gunicorn_127_0_0_1_8000",
+                                        "entries" : [("a.b.c", "gunicorn_127_0_0_1_8000"), ("d.e.f", "gunicorn_127_0_0_1_8001")],
+                                        "variable" : self.valid_variable,
+                                        }
+                                    )
+        expected_response = (
+                                "map $host $nrt_backend {\n"
+                                "    default gunicorn_127_0_0_1_8000;\n"
+                                "    a.b.c gunicorn_127_0_0_1_8000;\n"
+                                "    d.e.f gunicorn_127_0_0_1_8001;\n"
+                                "}\n"
+                                )
+        self.assertEqual("".join(handle_map_block.export()), expected_response)
+        self.assertRaises(TypeError, setattr, handle_map_block, "default", 8000)
+        del handle_map_block
+
+
+    def test_entries_wrong(self):
+        """
+        Tests that the proper exceptions are raised if an entry is missing, is not a pair of
+        strings or maps a value already mapped.
+        """
+        handle_map_block = MapBlock(**{"entries" : [("a.b.c", "gunicorn_127_0_0_1_8000")], "variable" : self.valid_variable})
+        for entry, exception in (
+                                    (None, ValueError),
+                                    (["a.b.c", "gunicorn_127_0_0_1_8000"], TypeError),
+                                    (("a.b.c",), TypeError),
+                                    (("a.b.c", 8000), TypeError),
+                                    (("a.b.c", "gunicorn_127_0_0_1_8001"), ValueError),
+                                    ):
+            self.assertRaises(
+                                exception,
+                                setattr,
+                                handle_map_block,
+                                "entries",
+                                entry,
+                                )
+        del handle_map_block
+
+
+    def test_init_wrong(self):
+        """
+        Tests that the proper exceptions are raised if the variable or the source are missing or
+        not valid.
+        """
+        for parameters, exception in (
+                                        ({}, ValueError),
+                                        ({"variable" : 1}, TypeError),
+                                        ({"variable" : "nrt_backend"}, ValueError),
+                                        ({"source" : "$host name", "variable" : self.valid_variable}, ValueError),
+                                        ):
+            self.assertRaises(
+                                exception,
+                                MapBlock,
+                                **parameters
+                                )
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the minimize module.
+"""
+
+from nrt.blocks.location.base import LocationBlock
+from nrt.blocks.location.gunicorn import GunicornLocationBlock
+from nrt.blocks.location.phpfpm import PhpfpmLocationBlock
+from nrt.blocks.location.static import StaticLocationBlock
+from nrt.blocks.minimize import effective, family, minimize, parse
+from nrt.tests.test_base import TestBase
+
+
+class TestMinimize(TestBase):
+    """
+    A class containing unit tests for the minimize module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestMinimize, self).setUp(*args, **{
+                                                    "test_module_filename" : __file__
+                                                    }
+                                        )
+
+
+    def aux_assert_same_behaviour(self, locations, hoisted, minimized):
+        """
+        Auxiliary method that asserts that each minimized Location block serves requests the same
+        way its original does.
+        """
+        server_lines = [(family(line.strip()), line.strip()) for line in hoisted]
+        for location, minimized_location in zip(locations, minimized):
+            self.assertEqual(effective([], parse(location)[1]), effective(server_lines, parse(minimized_location)[1]))
+
+
+    def test_effective_correct(self):
+        """
+        Tests that a location inherits the families it does not set from its server, each family
+        as a whole, and that handler families only matter to the locations using the handler.
+        """
+        server_lines = [("access", "deny 1.2.3.4;"), ("proxy_set_header", "proxy_set_header Host $host;"), ("expires", "expires 1d;")]
+        location_lines = [("proxy_set_header", "proxy_set_header X-Real-IP $remote_addr;"), ("proxy_pass", "proxy_pass http://a;")]
+        response = effective(server_lines, location_lines)
+        expected_response = {
+                                "access" : ("deny 1.2.3.4;",),
+                                "expires" : ("expires 1d;",),
+                                "proxy_pass" : ("proxy_pass http://a;",),
+                                "proxy_set_header" : ("proxy_set_header X-Real-IP $remote_addr;",),
+                                }
+        self.assertEqual(response, expected_response)
+        self.assertEqual(effective(server_lines, [("access", "allow all;")]), {"expires" : ("expires 1d;",)})
+
+
+    def test_family_correct(self):
+        """
+        Tests that the family of a directive is its name, the allow and deny rules making one.
+        """
+        self.assertEqual(family("allow 10.0.0.0/8;"), "access")
+        self.assertEqual(family("deny all;"), "access")
+        self.assertEqual(family("proxy_set_header Host $host;"), "proxy_set_header")
+
+
+    def test_minimize_correct_allow_all(self):
+        """
+        Tests that a trailing allow all rule is dropped, while the other rules are kept.
+        """
+        locations = [
+                        LocationBlock(**{"location" : "/", "allow" : ["all"]}).export(),
+                        LocationBlock(**{"location" : "/a/", "allow" : ["all"], "deny" : ["1.2.3.4"]}).export(),
+                        ]
+        hoisted, minimized = minimize(locations)
+        self.assertEqual(hoisted, [])
+        self.assertEqual(minimized, ["    location / {\n    }\n", "    location /a/ {\n        deny 1.2.3.4;\n    }\n"])
+        self.aux_assert_same_behaviour(locations, hoisted, minimized)
+
+
+    def test_minimize_correct_hoisted(self):
+        """
+        Tests that the families shared by all the Location blocks they matter to are hoisted, and
+        that each Location block still serves requests the same way.
+        """
+        locations = [
+                        GunicornLocationBlock(**{"location" : "/", "allow" : ["10.0.0.0/8"]}).export(),
+                        GunicornLocationBlock(**{"location" : "/a/", "allow" : ["10.0.0.0/8"], "port" : "8001"}).export(),
+                        PhpfpmLocationBlock(**{"location" : "/b/", "allow" : ["10.0.0.0/8"]}).export(),
+                        ]
+        hoisted, minimized = minimize(locations)
+        self.assertEqual(hoisted[:3], ["    allow 10.0.0.0/8;\n", "    deny all;\n", "    proxy_http_version 1.1;\n"])
+        self.assertEqual(minimized[0], "    location / {\n        proxy_pass http://gunicorn_127_0_0_1_8000_701ea28f;\n    }\n")
+        self.assertIn("        include fastcgi_params;\n", minimized[2])
+        self.aux_assert_same_behaviour(locations, hoisted, minimized)
+
+
+    def test_minimize_correct_no_catch_all(self):
+        """
+        Tests that, without a Location block matching the root prefix, only the families of a
+        handler are hoisted, so that requests matching no location are served the same way.
+        """
+        locations = [
+                        GunicornLocationBlock(**{"location" : "/a/", "allow" : ["10.0.0.0/8"]}).export(),
+                        GunicornLocationBlock(**{"location" : "/b/", "allow" : ["10.0.0.0/8"], "port" : "8001"}).export(),
+                        ]
+        hoisted, minimized = minimize(locations)
+        self.assertNotIn("    allow 10.0.0.0/8;\n", hoisted)
+        self.assertNotIn("    deny all;\n", hoisted)
+        self.assertIn("    proxy_http_version 1.1;\n", hoisted)
+        self.assertIn("        allow 10.0.0.0/8;\n        deny all;\n", minimized[0])
+        self.aux_assert_same_behaviour(locations, hoisted, minimized)
+
+        locations = [StaticLocationBlock(**{"location" : "/a/"}).export(), StaticLocationBlock(**{"location" : "/b/"}).export()]
+        hoisted, minimized = minimize(locations)
+        self.assertEqual(hoisted, [])
+        self.assertEqual(minimized, locations)
+
+
+    def test_minimize_correct_not_shared(self):
+        """
+        Tests that families not shared by all the Location blocks they matter to, or set by a
+        single Location block, are not hoisted.
+        """
+        locations = [
+                        StaticLocationBlock(**{"location" : "/", "expires" : "1d"}).export(),
+                        StaticLocationBlock(**{"location" : "/a/"}).export(),
+                        ]
+        hoisted, minimized = minimize(locations)
+        self.assertNotIn("    expires 1d;\n", hoisted)
+        self.assertIn("    sendfile on;\n", hoisted)
+        self.assertIn("        expires 1d;\n", minimized[0])
+        self.aux_assert_same_behaviour(locations, hoisted, minimized)
+
+        locations = [GunicornLocationBlock(**{"location" : "/"}).export(), LocationBlock(**{"location" : "/a/"}).export()]
+        hoisted, minimized = minimize(locations)
+        self.assertEqual(hoisted, [])
+        self.aux_assert_same_behaviour(locations, hoisted, minimized)
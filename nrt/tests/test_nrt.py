@@ -4,9 +4,17 @@
 This module tests the Nrt module.
 """
 from collections import defaultdict
+from os import listdir
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest.mock import patch, PropertyMock
 
+from nrt.directive import directive_key
 from nrt.listen import Listen
+from nrt.location import Location
 from nrt.nrt import Nrt
+from nrt.servername import ServerName
 from nrt.tests.test_base import TestBase
 
 
@@ -24,6 +32,140 @@ class TestNrt(TestBase):
                                     )
 
 
+    def test_add_directives_correct(self):
+        """
+        Tests that add_directives builds the same tree we get by assigning the directives one by
+        one.
+        """
+        directives = [
+                        { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                        { "signature" : "a:0.0.0.0:80:a.b.c:/a/"},
+                        { "signature" : "b:0.0.0.0:8080:a.b.c:/"},
+                        { "signature" : "c:0.0.0.0:8080:d.e.f:/"},
+                        ]
+        handle_nrt_batch = Nrt(**{})
+        handle_nrt_batch.add_directives(directives)
+        handle_nrt_sequential = Nrt(**{})
+        for directive in directives:
+            handle_nrt_sequential.directives = directive
+        self.assertEqual(handle_nrt_batch.directives, handle_nrt_sequential.directives)
+        self.assertEqual(sorted(handle_nrt_batch.listen.keys()), sorted(handle_nrt_sequential.listen.keys()))
+        for address, listen in handle_nrt_batch.listen.items():
+            self.assertEqual(sorted(listen.server_names.keys()), sorted(handle_nrt_sequential.listen[address].server_names.keys()))
+            for domain, server_name in listen.server_names.items():
+                expected_server_name = handle_nrt_sequential.listen[address].server_names[domain]
+                self.assertEqual(sorted(server_name.locations.keys()), sorted(expected_server_name.locations.keys()))
+                for location, location_object in server_name.locations.items():
+                    self.assertEqual(location_object.alias, expected_server_name.locations[location].alias)
+        del handle_nrt_batch
+        del handle_nrt_sequential
+
+
+    def test_add_directives_correct_no_dupes(self):
+        """
+        Tests that add_directives only stores a unique copy of directives having the same
+        signature, both within the batch and with respect to those already stored.
+        """
+        handle_nrt = Nrt(**{})
+        handle_nrt.directives = { "signature" : "a:0.0.0.0:80:a.b.c:/"}
+        handle_nrt.add_directives([
+                                    { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                                    { "signature" : "a:0.0.0.0:80:a.b.c:/a/"},
+                                    { "signature" : "a:0.0.0.0:80:a.b.c:/a/"},
+                                    ])
+        self.assertEqual(len(handle_nrt.directives), 2)
+        del handle_nrt
+
+
+    def test_add_directives_wrong_invalid_directive(self):
+        """
+        Tests that a ValueError exception is raised if any of the directives of a batch is not
+        valid, and that none of the directives of that batch is stored.
+        """
+        handle_nrt = Nrt(**{})
+        self.assertRaises(
+                            ValueError,
+                            handle_nrt.add_directives,
+                            [{ "signature" : "a:0.0.0.0:80:a.b.c:/"}, { "signature" : "wrong_format"}],
+                            )
+        self.assertEqual(handle_nrt.directives, [])
+        self.assertEqual(handle_nrt.listen, {})
+        del handle_nrt
+
+
+    def test_add_directives_wrong_invalid_address(self):
+        """
+        Tests that a ValueError exception is raised if the address of any of the directives of a
+        batch is not valid, and that the tree is left empty.
+        """
+        handle_nrt = Nrt(**{})
+        self.assertRaises(
+                            ValueError,
+                            handle_nrt.add_directives,
+                            [{ "signature" : "a:0.0.0.0:80:x.com:/"}, { "signature" : "b:0.0.0.0:99999:y.com:/"}],
+                            )
+        self.assertRaises(ValueError, setattr, handle_nrt, "directives", { "signature" : "b:300.0.0.0:80:y.com:/"})
+        self.assertEqual(handle_nrt.directives, [])
+        self.assertEqual(handle_nrt.listen, {})
+        del handle_nrt
+
+
+    def test_add_directives_wrong_invalid_parameters(self):
+        """
+        Tests that a ValueError exception is raised if the parameters of any of the directives of a
+        batch are not valid, that none of the directives of that batch is stored, and that they can
+        be given again once fixed.
+        """
+        handle_nrt = Nrt(**{})
+        self.assertRaises(
+                            ValueError,
+                            handle_nrt.add_directives,
+                            [
+                                { "signature" : "x:0.0.0.0:80:a.b.c:/"},
+                                { "signature" : "y:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "ruby"}},
+                                { "signature" : "z:0.0.0.0:80:g.h.i:/"},
+                                ],
+                            )
+        self.assertEqual(handle_nrt.directives, [])
+        self.assertEqual(handle_nrt.listen, {})
+        handle_nrt.directives = { "signature" : "z:0.0.0.0:80:g.h.i:/"}
+        self.assertEqual(list(handle_nrt.listen["0.0.0.0:80"].server_names), ["g.h.i"])
+        self.assertRaises(ValueError, setattr, handle_nrt, "directives", { "signature" : "y:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "ruby"}})
+        self.assertEqual(list(handle_nrt.listen["0.0.0.0:80"].server_names), ["g.h.i"])
+        self.assertEqual(len(handle_nrt.directives), 1)
+        del handle_nrt
+
+
+    def test_directives_wrong_listen_options(self):
+        """
+        Tests that a directive passing invalid listen options is rejected before anything is
+        stored, so that the Nrt stays empty and the fixed directive can be given again.
+        """
+        handle_nrt = Nrt(**{})
+        self.assertRaises(TypeError, setattr, handle_nrt, "directives", { "signature" : "x:0.0.0.0:80:x.com:/", "parameters" : {"listen" : {"backlog" : 100}}})
+        self.assertRaises(ValueError, handle_nrt.add_directives, [{ "signature" : "x:0.0.0.0:80:x.com:/", "parameters" : {"listen" : {"backlog" : "many"}}}])
+        self.assertEqual(handle_nrt.directives, [])
+        self.assertEqual(handle_nrt.listen, {})
+        handle_nrt.directives = { "signature" : "x:0.0.0.0:80:x.com:/", "parameters" : {"listen" : {"backlog" : "100"}}}
+        self.assertEqual(list(handle_nrt.listen["0.0.0.0:80"].server_names), ["x.com"])
+        self.assertEqual(handle_nrt.listen["0.0.0.0:80"].options, {"backlog" : "100"})
+        del handle_nrt
+
+
+    def test_add_directives_wrong_mistyped_directives(self):
+        """
+        Tests that a TypeError exception is raised if the directives are passed in as a single
+        dictionary rather than an iterable of them.
+        """
+        handle_nrt = Nrt(**{})
+        self.assertRaises(
+                            TypeError,
+                            handle_nrt.add_directives,
+                            { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                            )
+        del handle_nrt
+
+
     def test_build_correct(self):
         """
         Tests that the _build method properly turns the directives into unique Listen objects.
@@ -58,6 +200,125 @@ class TestNrt(TestBase):
         del handle_nrt
 
 
+    def test_build_correct_incremental(self):
+        """
+        Tests that adding a directive to an Nrt only builds the path leading to its Location, that
+        is, the number of _build invocations of the lower levels does not grow with the number of
+        directives already part of the tree.
+        """
+        calls = defaultdict(int)
+
+        def aux_counting_build(cls):
+            original_build = cls._build
+            def counting_build(instance, *args, **kwargs):
+                calls[cls.__name__] += 1
+                return original_build(instance, *args, **kwargs)
+            return counting_build
+
+        handle_nrt = Nrt(**{})
+        calls_per_insert = []
+        with patch.object(Listen, "_build", aux_counting_build(Listen)), \
+                patch.object(ServerName, "_build", aux_counting_build(ServerName)), \
+                patch.object(Location, "_build", aux_counting_build(Location)):
+            for i in range(50):
+                calls.clear()
+                handle_nrt.directives = { "signature" : "a%d:0.0.0.0:80:a.b.c:/l%d/" % (i, i % 5)}
+                calls_per_insert.append(dict(calls))
+        self.assertEqual(calls_per_insert[0], {"Listen" : 1, "ServerName" : 1, "Location" : 1})
+        for calls_of_insert in calls_per_insert:
+            self.assertEqual(calls_of_insert, calls_per_insert[0])
+        del handle_nrt
+
+
+    def test_collisions_correct(self):
+        """
+        Tests that the collisions method yields a record for each invalid Location of the Nrt,
+        describing where the collision is and why.
+        """
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/location1/"},
+                                            { "signature" : "container2:0.0.0.0:80:a.b.c:/location1/"},
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/location2/"},
+                                            { "signature" : "container3:0.0.0.0:8080:d.e.f:/", "parameters" : {"deny" : ["all"]}},
+                                            ]
+                            }
+                        )
+        response = list(handle_nrt.collisions())
+        expected_response = [
+                                ("0.0.0.0:80", "a.b.c", "/location1/", ["container1", "container2"], "multiple aliases"),
+                                ("0.0.0.0:8080", "d.e.f", "/", ["container3"], "allow and deny all"),
+                                ]
+        self.assertEqual(response, expected_response)
+        self.assertEqual(response[0].reason, "multiple aliases")
+        del handle_nrt
+
+
+    def test_build_correct_keys_computed_once(self):
+        """
+        Tests that the canonical key of a directive is computed once, when it enters the Nrt, and
+        handed down to the lower levels of the tree rather than computed again.
+        """
+        with patch("nrt.nrt.directive_key", wraps=directive_key) as root_key, \
+                patch("nrt.listen.directive_key") as listen_key, \
+                patch("nrt.servername.directive_key") as server_name_key, \
+                patch("nrt.location.directive_key") as location_key:
+            handle_nrt = Nrt(**{
+                                "directives" : [
+                                                { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"allow" : ["1.2.3.4"]}},
+                                                { "signature" : "b:0.0.0.0:80:d.e.f:/"},
+                                                ]
+                                }
+                            )
+            handle_nrt.directives = { "signature" : "c:0.0.0.0:8080:a.b.c:/"}
+        self.assertEqual(root_key.call_count, 3)
+        self.assertFalse(listen_key.called or server_name_key.called or location_key.called)
+        self.assertEqual(len(handle_nrt.listen["0.0.0.0:80"].server_names["a.b.c"].locations["/"].directives), 1)
+        del handle_nrt
+
+
+    def test_collisions_correct_listen_options(self):
+        """
+        Tests that the collisions method yields a record for each Listen whose socket options
+        conflict, carrying the aliases setting them, after those of the invalid Locations.
+        """
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/", "parameters" : {"listen" : {"backlog" : "4096", "reuseport" : "on"}}},
+                                            { "signature" : "container2:0.0.0.0:80:d.e.f:/", "parameters" : {"listen" : {"reuseport" : "on"}}},
+                                            { "signature" : "container3:0.0.0.0:80:g.h.i:/", "parameters" : {"listen" : {"backlog" : "511"}}},
+                                            { "signature" : "container4:0.0.0.0:8080:d.e.f:/", "parameters" : {"deny" : ["all"]}},
+                                            ]
+                            }
+                        )
+        response = list(handle_nrt.collisions())
+        expected_response = [
+                                ("0.0.0.0:8080", "d.e.f", "/", ["container4"], "allow and deny all"),
+                                ("0.0.0.0:80", None, None, ["container1", "container3"], "conflicting listen options"),
+                                ]
+        self.assertEqual(response, expected_response)
+        self.assertFalse(handle_nrt.is_valid)
+        del handle_nrt
+
+
+    def test_collisions_correct_no_collisions(self):
+        """
+        Tests that the collisions method yields nothing if the Nrt is valid, and stops reporting a
+        Location once it becomes valid again.
+        """
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/", "parameters" : {"deny" : ["all"]}},
+                                            ]
+                            }
+                        )
+        self.assertEqual(len(list(handle_nrt.collisions())), 1)
+        handle_nrt.listen["0.0.0.0:80"].server_names["a.b.c"].locations["/"].deny = []
+        self.assertEqual(list(handle_nrt.collisions()), [])
+        self.assertTrue(handle_nrt.is_valid)
+        del handle_nrt
+
+
     def test_directives_correct(self):
         """
         Tests that an Nrt object properly returns the directives that were added to it.
@@ -75,6 +336,26 @@ class TestNrt(TestBase):
         del handle_nrt
 
 
+    def test_directives_correct_validated_once(self):
+        """
+        Tests that a directive added to an Nrt object is validated only once, at the root, and not
+        again by the lower levels of the tree.
+        """
+        handle_nrt = Nrt(**{})
+        with patch("nrt.nrt.validate_directive") as nrt_validate, \
+                patch("nrt.listen.validate_directive") as listen_validate, \
+                patch("nrt.servername.validate_directive") as servername_validate, \
+                patch("nrt.location.validate_directive") as location_validate:
+            handle_nrt.directives = { "signature" : "a:0.0.0.0:80:a.b.c:/"}
+            handle_nrt.add_directives([{ "signature" : "a:0.0.0.0:80:a.b.c:/a/"}])
+        self.assertEqual(nrt_validate.call_count, 2)
+        self.assertEqual(listen_validate.call_count, 0)
+        self.assertEqual(servername_validate.call_count, 0)
+        self.assertEqual(location_validate.call_count, 0)
+        self.assertEqual(len(handle_nrt.listen["0.0.0.0:80"].server_names["a.b.c"].locations), 2)
+        del handle_nrt
+
+
     def test_directives_correct_no_dupes(self):
         """
         Tests that an Nrt object only stores a unique copy of directives having the same signature.
@@ -183,18 +464,725 @@ class TestNrt(TestBase):
         del handle_nrt
 
 
-    def test_export(self):
+    def test_export_correct(self):
+        """
+        Tests that export writes a virtual host file per server name, holding a server block for
+        each address the server name is served at.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "gunicorn1:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "gunicorn1:0.0.0.0:80:a.b.c:/a/", "parameters" : {"allow" : ["1.2.3.4"]}},
+                                            { "signature" : "gunicorn1:0.0.0.0:8080:a.b.c:/", "parameters" : {"deny" : ["5.6.7.8"]}},
+                                            { "signature" : "gunicorn2:0.0.0.0:80:d.e.f:/"},
+                                            ]
+                            }
+                        )
+        response = handle_nrt.export(path)
+        self.assertEqual(response.added, [join(path, "nrt-server-names-hash.conf"), join(path, "a.b.c.conf"), join(path, "d.e.f.conf")])
+        self.assertEqual(sorted(listdir(path)), [".nrt.manifest", "a.b.c.conf", "d.e.f.conf", "nrt-server-names-hash.conf"])
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        expected_content = (
+                            "server {\n"
+                            "    listen 0.0.0.0:80;\n"
+                            "    server_name a.b.c;\n"
+                            "\n"
+                            "    location / {\n"
+                            "        allow all;\n"
+                            "    }\n"
+                            "\n"
+                            "    location /a/ {\n"
+                            "        allow 1.2.3.4;\n"
+                            "        deny all;\n"
+                            "    }\n"
+                            "}\n"
+                            "\n"
+                            "server {\n"
+                            "    listen 0.0.0.0:8080;\n"
+                            "    server_name a.b.c;\n"
+                            "\n"
+                            "    location / {\n"
+                            "        deny 5.6.7.8;\n"
+                            "        allow all;\n"
+                            "    }\n"
+                            "}\n"
+                            )
+        self.assertEqual(content, expected_content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_incremental(self):
+        """
+        Tests that export only writes the files whose content changed, and reports the added,
+        changed and removed files.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/"},
+                                            ]
+                            }
+                        )
+        self.assertEqual(len(handle_nrt.export(path).added), 3)
+
+        with patch("nrt.vhost.write") as write:
+            response = handle_nrt.export(path)
+        self.assertEqual(response, ([], [], [], 0, 0))
+        self.assertFalse(write.called)
+
+        handle_nrt.directives = { "signature" : "b:0.0.0.0:80:d.e.f:/b/"}
+        handle_nrt.directives = { "signature" : "c:0.0.0.0:80:g.h.i:/"}
+        response = handle_nrt.export(path)
+        self.assertEqual(response, ([join(path, "g.h.i.conf")], [join(path, "nrt-server-names-hash.conf"), join(path, "d.e.f.conf")], [], 0, 0))
+        with open(join(path, "d.e.f.conf")) as handle:
+            self.assertTrue("location /b/" in handle.read())
+
+        handle_nrt_shrunk = Nrt(**{"directives" : [{ "signature" : "a:0.0.0.0:80:a.b.c:/"}]})
+        response = handle_nrt_shrunk.export(path)
+        self.assertEqual(response, ([], [join(path, "nrt-server-names-hash.conf")], [join(path, "d.e.f.conf"), join(path, "g.h.i.conf")], 0, 0))
+        self.assertEqual(sorted(listdir(path)), [".nrt.manifest", "a.b.c.conf", "nrt-server-names-hash.conf"])
+        del handle_nrt
+        del handle_nrt_shrunk
+        rmtree(path)
+
+
+    def test_export_correct_foreign_files(self):
+        """
+        Tests that export never removes files it did not write.
+        """
+        path = mkdtemp()
+        with open(join(path, "foreign.conf"), "w") as handle:
+            handle.write("server {}\n")
+        handle_nrt = Nrt(**{"directives" : [{ "signature" : "a:0.0.0.0:80:a.b.c:/"}]})
+        response = handle_nrt.export(path)
+        self.assertEqual(response.removed, [])
+        self.assertTrue("foreign.conf" in listdir(path))
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_wrong_foreign_files(self):
+        """
+        Tests that a ValueError exception is raised, and no file is written, if export would
+        overwrite a file it did not write.
+        """
+        path = mkdtemp()
+        with open(join(path, "d.e.f.conf"), "w") as handle:
+            handle.write("server {}\n")
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/"},
+                                            ]
+                            }
+                        )
+        self.assertRaises(
+                            ValueError,
+                            handle_nrt.export,
+                            path,
+                            )
+        self.assertEqual(listdir(path), ["d.e.f.conf"])
+        with open(join(path, "d.e.f.conf")) as handle:
+            self.assertEqual(handle.read(), "server {}\n")
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_merge(self):
+        """
+        Tests that a merging export serves the server names of an address whose locations only
+        differ in their backends through a single server block, routing each host to its backend
+        through a map, and reports how many server blocks it saved.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8001"}}},
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/static/"},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8002"}}},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/static/"},
+                                            { "signature" : "c:0.0.0.0:80:g.h.i:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8003"}}},
+                                            { "signature" : "c:0.0.0.0:80:g.h.i:/static/"},
+                                            { "signature" : "d:0.0.0.0:80:j.k.l:/"},
+                                            { "signature" : "b:0.0.0.0:8080:d.e.f:/"},
+                                            ]
+                            }
+                        )
+        response = handle_nrt.export(path, merge=True)
+        self.assertEqual(response.saved, 2)
+        self.assertEqual(sorted(listdir(path)), [".nrt.manifest", "a.b.c.conf", "d.e.f.conf", "j.k.l.conf", "nrt-server-names-hash.conf", "nrt-upstreams.conf"])
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        variable = content.split(" ")[2]
+        self.assertTrue(content.startswith(
+                                            "map $host %s {\n"
+                                            "    default gunicorn_127_0_0_1_8001_cbcebef4;\n"
+                                            "    a.b.c gunicorn_127_0_0_1_8001_cbcebef4;\n"
+                                            "    d.e.f gunicorn_127_0_0_1_8002_3147a8d5;\n"
+                                            "    g.h.i gunicorn_127_0_0_1_8003_d30d6512;\n"
+                                            "}\n"
+                                            "\n"
+                                            "server {\n"
+                                            "    listen 0.0.0.0:80;\n"
+                                            "    server_name a.b.c d.e.f g.h.i;\n" % (variable)
+                                            ))
+        self.assertIn("        proxy_pass http://%s;\n" % (variable), content)
+        self.assertEqual(content.count("server {"), 1)
+        with open(join(path, "d.e.f.conf")) as handle:
+            content = handle.read()
+        self.assertIn("    listen 0.0.0.0:8080;\n", content)
+        self.assertNotIn("    listen 0.0.0.0:80;\n", content)
+        with open(join(path, "nrt-server-names-hash.conf")) as handle:
+            self.assertIn("map_hash_bucket_size 64;\n", handle.read())
+
+        response = handle_nrt.export(path)
+        self.assertEqual(response.saved, 0)
+        self.assertEqual(response.added, [join(path, "g.h.i.conf")])
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_merge_listens(self):
+        """
+        Tests that a merging export serves a server name through a single server block listening
+        to all the addresses it is served the very same way at, and keeps a server block of its
+        own for any other address.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "listen" : {"reuseport" : "on"}}},
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/a/"},
+                                            { "signature" : "a:0.0.0.0:8080:a.b.c:/", "parameters" : {"language" : "python"}},
+                                            { "signature" : "a:0.0.0.0:8080:a.b.c:/a/"},
+                                            { "signature" : "a:0.0.0.0:8081:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8001"}}},
+                                            { "signature" : "a:0.0.0.0:8081:a.b.c:/a/"},
+                                            ]
+                            }
+                        )
+        response = handle_nrt.export(path, merge=True)
+        self.assertEqual(response.saved, 1)
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        self.assertEqual(content.count("server {"), 2)
+        self.assertTrue(content.startswith("server {\n    listen 0.0.0.0:80 reuseport;\n    listen 0.0.0.0:8080;\n    server_name a.b.c;\n"))
+        self.assertIn("server {\n    listen 0.0.0.0:8081;\n    server_name a.b.c;\n", content)
+        self.assertEqual(handle_nrt.export(path).saved, 0)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_merge_same_backend(self):
+        """
+        Tests that a merging export does not map the locations passing requests to the same
+        backend for all the merged server names.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "php"}},
+                                            { "signature" : "a:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "php"}},
+                                            ]
+                            }
+                        )
+        self.assertEqual(handle_nrt.export(path, merge=True).saved, 1)
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        self.assertTrue(content.startswith("server {\n    listen 0.0.0.0:80;\n    server_name a.b.c d.e.f;\n"))
+        self.assertIn("        fastcgi_pass phpfpm_127_0_0_1_9000_70bacfa8;\n", content)
+        self.assertRaises(TypeError, handle_nrt.export, path, merge="yes")
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_minimize(self):
+        """
+        Tests that a minimizing export sets the directives shared by all the locations of a
+        server block once, and reports how many bytes it saved.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python"}},
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/a/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8001"}}},
+                                            ]
+                            }
+                        )
+        response = handle_nrt.export(path)
+        self.assertEqual(response.trimmed, 0)
+        with open(join(path, "a.b.c.conf")) as handle:
+            size = len(handle.read())
+
+        response = handle_nrt.export(path, minimize=True)
+        self.assertEqual(response.changed, [join(path, "a.b.c.conf")])
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        self.assertEqual(response.trimmed, size - len(content))
+        self.assertIn("    server_name a.b.c;\n    proxy_http_version 1.1;\n", content)
+        self.assertIn("    location /a/ {\n        proxy_pass http://gunicorn_127_0_0_1_8001_cbcebef4;\n    }\n", content)
+        self.assertNotIn("allow all", content)
+        self.assertEqual(handle_nrt.export(path, workers=2, minimize=True), ([], [], [], 0, size - len(content)))
+        self.assertRaises(TypeError, handle_nrt.export, path, minimize=1)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_pools(self):
+        """
+        Tests that exporting through a pool of threads or processes writes the very same files,
+        and reports the very same changes, of a serial export.
+        """
+        directives = []
+        for index in range(20):
+            directives.append({ "signature" : "a%d:0.0.0.0:80:d%d.b.c:/" % (index, index)})
+            directives.append({ "signature" : "a%d:0.0.0.0:8080:d%d.b.c:/b/" % (index, index), "parameters" : {"language" : "python"}})
+        handle_nrt = Nrt(**{"directives" : directives})
+        contents = []
+        reports = []
+        for workers, pool in ((1, "thread"), (4, "thread"), (3, "process")):
+            path = mkdtemp()
+            response = handle_nrt.export(path, workers=workers, pool=pool)
+            reports.append([filename.replace(path, "") for filename in response.added])
+            content = {}
+            for filename in listdir(path):
+                with open(join(path, filename), "rb") as handle:
+                    content[filename] = handle.read()
+            contents.append(content)
+            rmtree(path)
+        self.assertEqual(len(contents[0]), 23)
+        for content, report in zip(contents, reports):
+            self.assertEqual(content, contents[0])
+            self.assertEqual(report, reports[0])
+        del handle_nrt
+
+
+    def test_export_correct_staged(self):
+        """
+        Tests that export never writes a virtual host file in place, but stages it before moving
+        it to its final destination.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{"directives" : [{ "signature" : "a:0.0.0.0:80:a.b.c:/"}]})
+        with patch("nrt.nrt.commit") as commit:
+            handle_nrt.export(path)
+        self.assertEqual(listdir(path), [".nrt.staging"])
+        self.assertEqual(sorted(listdir(join(path, ".nrt.staging"))), [".nrt.manifest", "a.b.c.conf", "nrt-server-names-hash.conf"])
+        handle_nrt.export(path)
+        self.assertEqual(sorted(listdir(path)), [".nrt.manifest", "a.b.c.conf", "nrt-server-names-hash.conf"])
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_languages(self):
+        """
+        Tests that export renders each location through the Location block of its language.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/php/", "parameters" : {"language" : "php"}},
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/py/", "parameters" : {"language" : "python", "gunicorn" : {"ip" : "1.2.3.4", "port" : "1234"}}},
+                                            ]
+                            }
+                        )
+        handle_nrt.export(path)
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        self.assertTrue("    location / {\n        allow all;\n    }\n" in content)
+        self.assertTrue("    location ~ ^/php/.+\\.php(/|$) {\n" in content)
+        self.assertTrue("        fastcgi_pass phpfpm_127_0_0_1_9000_70bacfa8;\n" in content)
+        self.assertTrue("        proxy_pass http://gunicorn_1_2_3_4_1234_255b5a50;\n" in content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_caches(self):
+        """
+        Tests that export writes one proxy cache path block per distinct zone, shared by all the
+        locations caching into it.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"valid" : "1s"}}}},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"valid" : "5s"}}}},
+                                            { "signature" : "c:0.0.0.0:80:g.h.i:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"zone" : "api", "path" : "/tmp/api"}}}},
+                                            { "signature" : "d:0.0.0.0:80:j.k.l:/", "parameters" : {"language" : "python"}},
+                                            ]
+                            }
+                        )
+        response = handle_nrt.export(path)
+        self.assertIn(join(path, "nrt-caches.conf"), response.added)
+        with open(join(path, "nrt-caches.conf")) as handle:
+            lines = handle.read().split("\n\n")
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("proxy_cache_path /tmp/api levels=1:2 keys_zone=api:10m "))
+        self.assertTrue(lines[1].startswith("proxy_cache_path /var/cache/nginx/microcache levels=1:2 keys_zone=microcache:10m "))
+        with open(join(path, "d.e.f.conf")) as handle:
+            self.assertTrue("        proxy_cache microcache;\n        proxy_cache_valid 5s;\n" in handle.read())
+        with open(join(path, "j.k.l.conf")) as handle:
+            self.assertFalse("proxy_cache" in handle.read())
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_wrong_caches(self):
+        """
+        Tests that a ValueError exception is raised, and no file is written, if two locations
+        define the same cache zone differently.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"size" : "10m"}}}},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"size" : "20m"}}}},
+                                            ]
+                            }
+                        )
+        self.assertRaises(
+                            ValueError,
+                            handle_nrt.export,
+                            path,
+                            )
+        self.assertEqual(listdir(path), [])
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_caches_default_paths(self):
+        """
+        Tests that zones not given a path are stored in distinct directories, named after them.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"zone" : "a"}}}},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"zone" : "b"}}}},
+                                            ]
+                            }
+                        )
+        handle_nrt.export(path)
+        with open(join(path, "nrt-caches.conf")) as handle:
+            lines = handle.read().split("\n\n")
+        self.assertTrue(lines[0].startswith("proxy_cache_path /var/cache/nginx/a levels=1:2 keys_zone=a:10m "))
+        self.assertTrue(lines[1].startswith("proxy_cache_path /var/cache/nginx/b levels=1:2 keys_zone=b:10m "))
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_wrong_caches_shared_path(self):
+        """
+        Tests that a ValueError exception is raised, and no file is written, if two zones share the
+        same path.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"zone" : "a", "path" : "/tmp/cache"}}}},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "python", "gunicorn" : {"cache" : {"zone" : "b", "path" : "/tmp/cache"}}}},
+                                            ]
+                            }
+                        )
+        self.assertRaises(
+                            ValueError,
+                            handle_nrt.export,
+                            path,
+                            )
+        self.assertEqual(listdir(path), [])
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_server_names_hash(self):
+        """
+        Tests that export sizes the server names hash tables out of the busiest address and of the
+        longest server name.
+        """
+        path = mkdtemp()
+        directives = [{ "signature" : "a:0.0.0.0:80:d%d.b.c:/" % (index)} for index in range(300)]
+        directives.append({ "signature" : "a:0.0.0.0:8080:%s.b.c:/" % ("x" * 60)})
+        handle_nrt = Nrt(**{"directives" : directives})
+        handle_nrt.export(path)
+        with open(join(path, "nrt-server-names-hash.conf")) as handle:
+            content = handle.read()
+        expected_content = (
+                            "# Sized for 300 server names at 0.0.0.0:80, the busiest address, and for server\n"
+                            "# names up to 64 characters long.\n"
+                            "server_names_hash_max_size 2048;\n"
+                            "server_names_hash_bucket_size 128;\n"
+                            )
+        self.assertEqual(content, expected_content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_listen_options(self):
+        """
+        Tests that export renders the socket options of an address once, in the server block of
+        its first server name, no matter how many server names share it.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:d.e.f:/", "parameters" : {"listen" : {"backlog" : "4096", "deferred" : "on", "reuseport" : "on"}}},
+                                            { "signature" : "b:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "b:0.0.0.0:8080:a.b.c:/"},
+                                            ]
+                            }
+                        )
+        handle_nrt.export(path)
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        self.assertIn("    listen 0.0.0.0:80 backlog=4096 deferred reuseport;\n", content)
+        self.assertIn("    listen 0.0.0.0:8080;\n", content)
+        with open(join(path, "d.e.f.conf")) as handle:
+            content = handle.read()
+        self.assertIn("    listen 0.0.0.0:80;\n", content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_upstreams(self):
+        """
+        Tests that export writes one Upstream block per distinct Green Unicorn server, shared by
+        all the locations proxying to it, which gets the largest keepalive settings they ask for.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"keepalive" : "8"}}},
+                                            { "signature" : "b:0.0.0.0:80:d.e.f:/", "parameters" : {"language" : "python", "gunicorn" : {"keepalive" : "64", "keepalive_requests" : "500"}}},
+                                            { "signature" : "c:0.0.0.0:8080:d.e.f:/", "parameters" : {"language" : "python"}},
+                                            { "signature" : "d:0.0.0.0:80:g.h.i:/", "parameters" : {"language" : "python", "gunicorn" : {"ip" : "1.2.3.4"}}},
+                                            ]
+                            }
+                        )
+        response = handle_nrt.export(path)
+        self.assertEqual(sorted(listdir(path)), [".nrt.manifest", "a.b.c.conf", "d.e.f.conf", "g.h.i.conf", "nrt-server-names-hash.conf", "nrt-upstreams.conf"])
+        self.assertIn(join(path, "nrt-upstreams.conf"), response.added)
+        with open(join(path, "nrt-upstreams.conf")) as handle:
+            content = handle.read()
+        expected_content = (
+                            "upstream gunicorn_127_0_0_1_8000_701ea28f {\n"
+                            "    server 127.0.0.1:8000;\n"
+                            "    keepalive 64;\n"
+                            "    keepalive_requests 500;\n"
+                            "}\n"
+                            "\n"
+                            "upstream gunicorn_1_2_3_4_8000_493d4d59 {\n"
+                            "    server 1.2.3.4:8000;\n"
+                            "    keepalive 32;\n"
+                            "    keepalive_requests 1000;\n"
+                            "}\n"
+                            )
+        self.assertEqual(content, expected_content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_upstreams_balanced(self):
+        """
+        Tests that, in a balanced Nrt, the containers claiming the same Python location become the
+        servers of an upstream pool, shared by all the server blocks proxying to the same pool.
+        """
+        path = mkdtemp()
+        directives = []
+        for address in ("0.0.0.0:80", "0.0.0.0:8080"):
+            directives.append({ "signature" : "a:%s:a.b.c:/" % (address), "parameters" : {"language" : "python", "gunicorn" : {"ip" : "10.0.0.1"}, "upstream" : {"method" : "least_conn", "weight" : "3"}}})
+            directives.append({ "signature" : "b:%s:a.b.c:/" % (address), "parameters" : {"language" : "python", "gunicorn" : {"ip" : "10.0.0.2", "keepalive" : "8"}, "upstream" : {"method" : "least_conn", "max_fails" : "2"}}})
+        self.assertFalse(Nrt(**{"directives" : directives}).is_valid)
+        handle_nrt = Nrt(**{"balance" : True, "directives" : directives})
+        self.assertTrue(handle_nrt.balance)
+        handle_nrt.export(path)
+        with open(join(path, "nrt-upstreams.conf")) as handle:
+            content = handle.read()
+        self.assertEqual(content.count("upstream "), 1)
+        self.assertTrue(content.startswith("upstream gunicorn_pool_"))
+        self.assertTrue(content.endswith(" {\n    least_conn;\n    server 10.0.0.1:8000 weight=3;\n    server 10.0.0.2:8000 max_fails=2;\n    keepalive 8;\n    keepalive_requests 1000;\n}\n"))
+        name = content.split(" ")[1]
+        with open(join(path, "a.b.c.conf")) as handle:
+            self.assertEqual(handle.read().count("        proxy_pass http://%s;\n" % (name)), 2)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_upstreams_similar_sockets(self):
+        """
+        Tests that Python locations reached through unix sockets whose paths only differ in
+        characters not allowed within a name proxy to distinct Upstream blocks.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "x:0.0.0.0:80:x.com:/", "parameters" : {"language" : "python", "gunicorn" : {"socket" : "/run/app-1.sock"}}},
+                                            { "signature" : "y:0.0.0.0:80:y.com:/", "parameters" : {"language" : "python", "gunicorn" : {"socket" : "/run/app_1.sock"}}},
+                                            ]
+                            }
+                        )
+        handle_nrt.export(path)
+        with open(join(path, "nrt-upstreams.conf")) as handle:
+            content = handle.read()
+        self.assertIn("    server unix:/run/app-1.sock;\n", content)
+        self.assertIn("    server unix:/run/app_1.sock;\n", content)
+        with open(join(path, "y.com.conf")) as handle:
+            upstream = handle.read().split("proxy_pass http://")[1].split(";")[0]
+        self.assertIn("upstream %s {\n    server unix:/run/app_1.sock;\n" % (upstream), content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_wrong_upstreams_clashing(self):
+        """
+        Tests that a ValueError exception is raised, and no file is written, if two locations
+        name the same Upstream block after different servers.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "x:0.0.0.0:80:x.com:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8001"}}},
+                                            { "signature" : "y:0.0.0.0:80:y.com:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8002"}}},
+                                            ]
+                            }
+                        )
+        with patch("nrt.nrt.GunicornLocationBlock.upstream", new_callable=PropertyMock) as upstream:
+            upstream.return_value = "gunicorn_clashing"
+            self.assertRaises(
+                                ValueError,
+                                handle_nrt.export,
+                                path,
+                                )
+        self.assertEqual(listdir(path), [])
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_upstreams_socket(self):
+        """
+        Tests that a Python location reached through a unix socket proxies to an Upstream block
+        whose server is the socket.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{"directives" : [{ "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"socket" : "/run/app.sock"}}}]})
+        handle_nrt.export(path)
+        with open(join(path, "nrt-upstreams.conf")) as handle:
+            self.assertTrue(handle.read().startswith("upstream gunicorn_unix__run_app_sock_2849ba06 {\n    server unix:/run/app.sock;\n"))
+        with open(join(path, "a.b.c.conf")) as handle:
+            self.assertTrue("        proxy_pass http://gunicorn_unix__run_app_sock_2849ba06;\n" in handle.read())
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_upstreams_php(self):
+        """
+        Tests that PHP locations pass their requests to an Upstream block per PHP-FPM pool, tuned
+        through the phpfpm parameters.
+        """
+        path = mkdtemp()
+        parameters = {"language" : "php", "phpfpm" : {"fastcgi_buffers" : "32 8k", "keepalive" : "16", "port" : "9001"}}
+        handle_nrt = Nrt(**{"directives" : [{ "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : parameters}]})
+        handle_nrt.export(path)
+        with open(join(path, "nrt-upstreams.conf")) as handle:
+            self.assertEqual(handle.read(), "upstream phpfpm_127_0_0_1_9001_2c927f3d {\n    server 127.0.0.1:9001;\n    keepalive 16;\n    keepalive_requests 1000;\n}\n")
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        self.assertTrue("        fastcgi_pass phpfpm_127_0_0_1_9001_2c927f3d;\n" in content)
+        self.assertTrue("        fastcgi_buffers 32 8k;\n" in content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_correct_upstreams_removed(self):
+        """
+        Tests that the file of the Upstream blocks is removed once no location proxies to a Green
+        Unicorn server anymore.
+        """
+        path = mkdtemp()
+        Nrt(**{"directives" : [{ "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python"}}]}).export(path)
+        response = Nrt(**{"directives" : [{ "signature" : "a:0.0.0.0:80:a.b.c:/"}]}).export(path)
+        self.assertEqual(response.removed, [join(path, "nrt-upstreams.conf")])
+        self.assertEqual(sorted(listdir(path)), [".nrt.manifest", "a.b.c.conf", "nrt-server-names-hash.conf"])
+        rmtree(path)
+
+
+    def test_export_correct_static(self):
+        """
+        Tests that export renders the HTML locations that opted in to the static profile through
+        static Location blocks, and leaves the others untouched.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/assets/", "parameters" : {"static" : {"expires" : "1y"}}},
+                                            ]
+                            }
+                        )
+        handle_nrt.export(path)
+        with open(join(path, "a.b.c.conf")) as handle:
+            content = handle.read()
+        self.assertTrue("    location / {\n        allow all;\n    }\n" in content)
+        self.assertTrue("    location /assets/ {\n        allow all;\n        sendfile on;\n" in content)
+        self.assertTrue("        expires 1y;\n        gzip_static on;\n    }\n" in content)
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_wrong_invalid(self):
+        """
+        Tests that a SystemError exception is raised if we try to export an invalid Nrt, and that
+        no file is written.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "container2:0.0.0.0:80:a.b.c:/"},
+                                            ]
+                            }
+                        )
+        self.assertRaises(
+                            SystemError,
+                            handle_nrt.export,
+                            path,
+                            )
+        self.assertEqual(listdir(path), [])
+        del handle_nrt
+        rmtree(path)
+
+
+    def test_export_wrong_missing_path(self):
         """
-        Tests that the export property hasn't been implemented, yet.
+        Tests that a ValueError exception is raised if we try to export an Nrt to a path that is
+        not an existing directory.
         """
+        path = mkdtemp()
         handle_nrt = Nrt(**{})
         self.assertRaises(
-                            NotImplementedError,
-                            getattr,
-                            handle_nrt,
-                            "export",
+                            ValueError,
+                            handle_nrt.export,
+                            join(path, "not_a_directory"),
                             )
         del handle_nrt
+        rmtree(path)
+
+
+    def test_export_wrong_pool(self):
+        """
+        Tests that exceptions are raised if export is given an invalid number of workers or an
+        unknown pool.
+        """
+        path = mkdtemp()
+        handle_nrt = Nrt(**{})
+        self.assertRaises(TypeError, handle_nrt.export, path, workers="2")
+        self.assertRaises(ValueError, handle_nrt.export, path, workers=0)
+        self.assertRaises(ValueError, handle_nrt.export, path, workers=2, pool="fiber")
+        del handle_nrt
+        rmtree(path)
 
 
     def test_init_correct(self):
@@ -208,6 +1196,34 @@ class TestNrt(TestBase):
         del handle_nrt
 
 
+    def test_init_wrong_mistyped_balance(self):
+        """
+        Tests that a TypeError exception is raised if the balance is not given as a boolean.
+        """
+        self.assertRaises(
+                            TypeError,
+                            Nrt,
+                            **{"balance" : "yes"}
+                            )
+
+
+    def test_init_correct_directives(self):
+        """
+        Tests that an Nrt object properly ingests the directives passed in at instantiation time.
+        """
+        directives = [
+                        { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                        { "signature" : "a:0.0.0.0:8080:a.b.c:/"},
+                        ]
+        handle_nrt = Nrt(**{
+                            "directives" : directives,
+                            }
+                        )
+        self.assertEqual(handle_nrt.directives, directives)
+        self.assertEqual(len(handle_nrt.listen.keys()), 2)
+        del handle_nrt
+
+
     def test_is_valid_correct(self):
         """
         Tests that the is_valid property correctly returns True if all the ServerName objects
@@ -240,6 +1256,52 @@ class TestNrt(TestBase):
         del handle_nrt
 
 
+    def test_is_valid_correct_propagated(self):
+        """
+        Tests that a change of validity of a Location is propagated up to the Nrt, both when the
+        Location becomes invalid and when it becomes valid again.
+        """
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/location1/"},
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/location2/"},
+                                            ]
+                            }
+                        )
+        handle_location = handle_nrt.listen["0.0.0.0:80"].server_names["a.b.c"].locations["/location1/"]
+        self.assertTrue(handle_nrt.is_valid)
+        handle_location.deny = ["all"]
+        self.assertFalse(handle_location.is_valid)
+        self.assertFalse(handle_nrt.listen["0.0.0.0:80"].server_names["a.b.c"].is_valid)
+        self.assertFalse(handle_nrt.listen["0.0.0.0:80"].is_valid)
+        self.assertFalse(handle_nrt.is_valid)
+        handle_location.deny = []
+        self.assertTrue(handle_nrt.is_valid)
+        del handle_nrt
+
+
+    def test_is_valid_correct_does_not_walk_the_tree(self):
+        """
+        Tests that the is_valid property of an Nrt does not query the validity of its Listen,
+        ServerName and Location objects.
+        """
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/location1/"},
+                                            { "signature" : "container2:0.0.0.0:80:a.b.c:/location1/"},
+                                            ]
+                            }
+                        )
+        with patch.object(Listen, "is_valid", new_callable=PropertyMock) as listen_is_valid, \
+                patch.object(ServerName, "is_valid", new_callable=PropertyMock) as servername_is_valid, \
+                patch.object(Location, "is_valid", new_callable=PropertyMock) as location_is_valid:
+            self.assertFalse(handle_nrt.is_valid)
+        self.assertFalse(listen_is_valid.called)
+        self.assertFalse(servername_is_valid.called)
+        self.assertFalse(location_is_valid.called)
+        del handle_nrt
+
+
     def test_listen_correct(self):
         """
         Tests that the listen property properly returns the listen objects stored into it, by
@@ -320,3 +1382,85 @@ class TestNrt(TestBase):
                             "not_an_instance_of_Listen"
                             )
         del handle_nrt
+
+
+    def test_resolve_correct(self):
+        """
+        Tests that resolve yields a record per server block, sorted by address and server name,
+        each holding its location records sorted by location.
+        """
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "gunicorn1:0.0.0.0:8080:b.c.d:/"},
+                                            { "signature" : "gunicorn2:0.0.0.0:80:b.c.d:/gunicorn2/", "parameters" : {"language" : "python"}},
+                                            { "signature" : "gunicorn1:0.0.0.0:80:b.c.d:/"},
+                                            { "signature" : "gunicorn3:0.0.0.0:80:a.b.c:/", "parameters" : {"allow" : ["1.2.3.4"]}},
+                                            ]
+                            }
+                        )
+        response = list(handle_nrt.resolve())
+        self.assertEqual(
+                            [(server.address, server.server_name) for server in response],
+                            [("0.0.0.0:80", "a.b.c"), ("0.0.0.0:80", "b.c.d"), ("0.0.0.0:8080", "b.c.d")],
+                            )
+        self.assertEqual([location.location for location in response[1].locations], ["/", "/gunicorn2/"])
+        self.assertEqual(response[1].locations[1].alias, "gunicorn2")
+        self.assertEqual(response[1].locations[1].aliases, ["gunicorn2"])
+        self.assertEqual(response[1].locations[1].language, "python")
+        self.assertEqual(response[1].locations[1].language_configuration, {"ip" : "127.0.0.1", "port" : "8000"})
+        self.assertEqual(response[0].locations[0].allow, ["1.2.3.4"])
+        del handle_nrt
+
+
+    def test_resolve_correct_balanced(self):
+        """
+        Tests that resolve exposes all the aliases of the upstream pool of a balanced Nrt.
+        """
+        handle_nrt = Nrt(**{
+                            "balance" : True,
+                            "directives" : [
+                                            { "signature" : "a:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8001"}}},
+                                            { "signature" : "b:0.0.0.0:80:a.b.c:/", "parameters" : {"language" : "python", "gunicorn" : {"port" : "8002"}}},
+                                            ]
+                            }
+                        )
+        response = list(handle_nrt.resolve())
+        self.assertEqual(response[0].locations[0].alias, "a")
+        self.assertEqual(response[0].locations[0].aliases, ["a", "b"])
+        del handle_nrt
+
+
+    def test_resolve_correct_deterministic(self):
+        """
+        Tests that two Nrt objects given the same directives in different orders resolve into the
+        same records.
+        """
+        directives = [
+                        { "signature" : "a:0.0.0.0:80:a.b.c:/"},
+                        { "signature" : "b:0.0.0.0:80:d.e.f:/b/"},
+                        { "signature" : "c:0.0.0.0:8080:a.b.c:/c/"},
+                        { "signature" : "d:0.0.0.0:80:a.b.c:/d/"},
+                        ]
+        handle_nrt = Nrt(**{"directives" : directives})
+        handle_nrt_reversed = Nrt(**{"directives" : reversed(directives)})
+        self.assertEqual(list(handle_nrt.resolve()), list(handle_nrt_reversed.resolve()))
+        del handle_nrt
+        del handle_nrt_reversed
+
+
+    def test_resolve_wrong_invalid(self):
+        """
+        Tests that a SystemError exception is raised as soon as we try to resolve an invalid Nrt.
+        """
+        handle_nrt = Nrt(**{
+                            "directives" : [
+                                            { "signature" : "container1:0.0.0.0:80:a.b.c:/"},
+                                            { "signature" : "container2:0.0.0.0:80:a.b.c:/"},
+                                            ]
+                            }
+                        )
+        self.assertRaises(
+                            SystemError,
+                            handle_nrt.resolve,
+                            )
+        del handle_nrt
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the Phpfpm module.
+"""
+
+from nrt.blocks.location.phpfpm import PhpfpmLocationBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestPhpfpm(TestBase):
+    """
+    A class containing unit tests for the Phpfpm module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestPhpfpm, self).setUp(*args, **{
+                                                "test_module_filename" : __file__
+                                                }
+                                    )
+        self.valid_location = "/foo/"
+
+
+    def test_export_correct(self):
+        """
+        Tests that a PHP-FPM Location block matches the .php files below its location and passes
+        them to the Upstream block of its pool, keeping the connections alive.
+        """
+        handle_block = PhpfpmLocationBlock(**{
+                                                "allow" : ["all"],
+                                                "ip" : "5.6.7.8",
+                                                "location" : self.valid_location,
+                                                "port" : "1234",
+                                                }
+                                            )
+        response = handle_block.export()
+        self.assertTrue(response.startswith("    location ~ ^/foo/.+\\.php(/|$) {\n        allow all;\n"))
+        self.assertTrue("        fastcgi_pass phpfpm_5_6_7_8_1234_322bb838;\n        fastcgi_keep_conn on;\n" in response)
+        self.assertTrue("        fastcgi_buffer_size 32k;\n        fastcgi_buffers 16 16k;\n" in response)
+        self.assertTrue(response.endswith("    }\n"))
+        del handle_block
+
+
+    def test_export_correct_socket(self):
+        """
+        Tests that a PHP-FPM Location block passes the requests to the unix socket of its pool, if
+        one is given, through an Upstream block named after it.
+        """
+        handle_block = PhpfpmLocationBlock(**{"location" : self.valid_location, "socket" : "/run/php/fpm.sock"})
+        self.assertEqual(handle_block.servers, ["unix:/run/php/fpm.sock"])
+        self.assertTrue("        fastcgi_pass phpfpm_unix__run_php_fpm_sock_b225ead0;\n" in handle_block.export())
+        del handle_block
+
+
+    def test_export_correct_variable(self):
+        """
+        Tests that a PHP-FPM Location block passes the requests to its variable, if one is given,
+        and that its structure does not depend on its Upstream block.
+        """
+        handle_block = PhpfpmLocationBlock(**{"location" : self.valid_location, "variable" : "$nrt_backend"})
+        self.assertTrue("        fastcgi_pass $nrt_backend;\n" in handle_block.export())
+        handle_other_block = PhpfpmLocationBlock(**{"location" : self.valid_location, "socket" : "/run/php/fpm.sock"})
+        self.assertEqual(handle_block.structure(), handle_other_block.structure())
+        self.assertRaises(TypeError, setattr, handle_block, "variable", 1)
+        del handle_block
+        del handle_other_block
+
+
+    def test_init_correct_default_values(self):
+        """
+        Tests that a PHP-FPM Location block defaults to 127.0.0.1:9000.
+        """
+        handle_block = PhpfpmLocationBlock(**{"location" : self.valid_location})
+        self.assertEqual(handle_block.ip, "127.0.0.1")
+        self.assertEqual(handle_block.port, "9000")
+        self.assertEqual(handle_block.fastcgi_buffer_size, "32k")
+        self.assertEqual(handle_block.fastcgi_buffers, "16 16k")
+        self.assertIsNone(handle_block.keepalive)
+        del handle_block
+
+
+    def test_init_wrong_buffers(self):
+        """
+        Tests that the proper exceptions are raised if the FastCGI buffers are not well formed.
+        """
+        for setting, value, exception in (
+                                            ("fastcgi_buffer_size", 32, TypeError),
+                                            ("fastcgi_buffer_size", "32 kb", ValueError),
+                                            ("fastcgi_buffers", "16", ValueError),
+                                            ("fastcgi_buffers", None, ValueError),
+                                            ):
+            self.assertRaises(
+                                exception,
+                                PhpfpmLocationBlock,
+                                **{"location" : self.valid_location, setting : value}
+                                )
+
+
+    def test_init_wrong_mistyped_ip(self):
+        """
+        Tests that a TypeError exception is raised if the IP is not given as a string.
+        """
+        self.assertRaises(
+                            TypeError,
+                            PhpfpmLocationBlock,
+                            **{"location" : self.valid_location, "ip" : 127}
+                            )
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the ServerBlock module.
+"""
+
+from nrt.blocks.location.base import LocationBlock
+from nrt.blocks.server.base import ServerBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestServerBlock(TestBase):
+    """
+    A class containing unit tests for the ServerBlock module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestServerBlock, self).setUp(*args, **{
+                                                        "test_module_filename" : __file__
+                                                        }
+                                            )
+        self.valid_listen = "0.0.0.0:80"
+        self.valid_server_name = "a.b.c"
+
+
+    def test_export_correct(self):
+        """
+        Tests that a Server block is exported as fragments that, joined, make the whole block.
+        """
+        handle_server_block = ServerBlock(**{
+                                                "listen" : self.valid_listen,
+                                                "locations" : [LocationBlock(**{"allow" : ["all"], "location" : "/"})],
+                                                "server_name" : self.valid_server_name,
+                                                }
+                                            )
+        expected_response = "server {\n    listen 0.0.0.0:80;\n    server_name a.b.c;\n\n    location / {\n        allow all;\n    }\n}\n"
+        self.assertEqual("".join(handle_server_block.export()), expected_response)
+        del handle_server_block
+
+
+    def test_export_correct_lazy_locations(self):
+        """
+        Tests that the Location blocks of a Server block are only consumed as the block is
+        exported.
+        """
+        consumed = []
+
+        def aux_generate_locations():
+            for location in ("/a/", "/b/"):
+                consumed.append(location)
+                yield LocationBlock(**{"allow" : ["all"], "location" : location})
+
+        handle_server_block = ServerBlock(**{
+                                                "listen" : self.valid_listen,
+                                                "locations" : aux_generate_locations(),
+                                                "server_name" : self.valid_server_name,
+                                                }
+                                            )
+        fragments = handle_server_block.export()
+        next(fragments)
+        self.assertEqual(consumed, [])
+        list(fragments)
+        self.assertEqual(consumed, ["/a/", "/b/"])
+        del handle_server_block
+
+
+    def test_export_correct_listens(self):
+        """
+        Tests that a Server block listening to more addresses renders a listen directive for each
+        of them, the listen address first, without duplicates.
+        """
+        handle_server_block = ServerBlock(**{
+                                                "listen" : self.valid_listen,
+                                                "listens" : ["0.0.0.0:8080", self.valid_listen, "0.0.0.0:8080"],
+                                                "server_name" : "a.b.c",
+                                                }
+                                            )
+        expected_response = "server {\n    listen 0.0.0.0:80;\n    listen 0.0.0.0:8080;\n    server_name a.b.c;\n}\n"
+        self.assertEqual("".join(handle_server_block.export()), expected_response)
+        self.assertEqual(handle_server_block.listens, [self.valid_listen, "0.0.0.0:8080"])
+        self.assertRaises(TypeError, setattr, handle_server_block, "listens", 8080)
+        del handle_server_block
+
+
+    def test_export_correct_minimize(self):
+        """
+        Tests that a minimized Server block sets the rules its Location blocks share once, drops
+        the redundant ones and records how many bytes it saved.
+        """
+        handle_server_block = ServerBlock(**{
+                                                "listen" : self.valid_listen,
+                                                "locations" : [LocationBlock(**{"location" : "/", "deny" : ["1.2.3.4"], "allow" : ["all"]}), LocationBlock(**{"location" : "/a/", "deny" : ["1.2.3.4"]})],
+                                                "minimize" : True,
+                                                "server_name" : self.valid_server_name,
+                                                }
+                                            )
+        expected_response = "server {\n    listen 0.0.0.0:80;\n    server_name a.b.c;\n    deny 1.2.3.4;\n\n    location / {\n    }\n\n    location /a/ {\n    }\n}\n"
+        self.assertEqual("".join(handle_server_block.export()), expected_response)
+        self.assertEqual(handle_server_block.trimmed, 45)
+        self.assertRaises(TypeError, setattr, handle_server_block, "minimize", "yes")
+        del handle_server_block
+
+
+    def test_init_wrong_missing_listen(self):
+        """
+        Tests that a ValueError exception is raised if a ServerBlock is not given a listen address.
+        """
+        self.assertRaises(
+                            ValueError,
+                            ServerBlock,
+                            **{"server_name" : self.valid_server_name}
+                            )
+
+
+    def test_init_wrong_mistyped_server_name(self):
+        """
+        Tests that a TypeError exception is raised if a ServerBlock is given a server name that is
+        not a string.
+        """
+        self.assertRaises(
+                            TypeError,
+                            ServerBlock,
+                            **{"listen" : self.valid_listen, "server_name" : 123}
+                            )
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the ServerNamesHashBlock module.
+"""
+
+from nrt.blocks.server_names_hash.base import ServerNamesHashBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestServerNamesHashBlock(TestBase):
+    """
+    A class containing unit tests for the ServerNamesHashBlock module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestServerNamesHashBlock, self).setUp(*args, **{
+                                                                "test_module_filename" : __file__
+                                                                }
+                                                    )
+        self.valid_address = "0.0.0.0:80"
+
+
+    def test_bucket_size_correct(self):
+        """
+        Tests that the buckets fit an element of the longest server name, and are never smaller
+        than 64 bytes.
+        """
+        for length, bucket_size in ((1, 64), (45, 64), (46, 64), (47, 128), (110, 128), (111, 256)):
+            handle_block = ServerNamesHashBlock(**{"address" : self.valid_address, "count" : 1, "length" : length})
+            self.assertEqual(handle_block.bucket_size, bucket_size)
+            del handle_block
+
+
+    def test_export_correct(self):
+        """
+        Tests that a server names hash block explains its sizing and sets both directives.
+        """
+        handle_block = ServerNamesHashBlock(**{"address" : self.valid_address, "count" : 10, "length" : 20})
+        expected_response = (
+                                "# Sized for 10 server names at 0.0.0.0:80, the busiest address, and for server\n"
+                                "# names up to 20 characters long.\n"
+                                "server_names_hash_max_size 512;\n"
+                                "server_names_hash_bucket_size 64;\n"
+                                )
+        self.assertEqual("".join(handle_block.export()), expected_response)
+        del handle_block
+
+
+    def test_export_correct_maps(self):
+        """
+        Tests that a server names hash block sizes the hash tables of the Map blocks the same way,
+        if asked to.
+        """
+        handle_block = ServerNamesHashBlock(**{"address" : self.valid_address, "count" : 10, "length" : 60, "maps" : True})
+        response = "".join(handle_block.export())
+        self.assertTrue(response.endswith("server_names_hash_bucket_size 128;\nmap_hash_max_size 512;\nmap_hash_bucket_size 128;\n"))
+        self.assertRaises(TypeError, setattr, handle_block, "maps", "yes")
+        del handle_block
+
+
+    def test_max_size_correct(self):
+        """
+        Tests that the maximum size holds four buckets per server name, and is never smaller than
+        512.
+        """
+        for count, max_size in ((0, 512), (128, 512), (129, 1024), (5000, 32768)):
+            handle_block = ServerNamesHashBlock(**{"address" : self.valid_address, "count" : count, "length" : 10})
+            self.assertEqual(handle_block.max_size, max_size)
+            del handle_block
+
+
+    def test_init_wrong(self):
+        """
+        Tests that the proper exceptions are raised if the address, the count or the length are
+        missing or not valid.
+        """
+        for parameters, exception in (
+                                        ({"count" : 1, "length" : 1}, ValueError),
+                                        ({"address" : self.valid_address, "count" : "1", "length" : 1}, TypeError),
+                                        ({"address" : self.valid_address, "count" : 1, "length" : -1}, ValueError),
+                                        ({"address" : self.valid_address, "count" : True, "length" : 1}, TypeError),
+                                        ):
+            self.assertRaises(
+                                exception,
+                                ServerNamesHashBlock,
+                                **parameters
+                                )
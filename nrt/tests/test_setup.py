@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the setup script.
+"""
+
+from ast import keyword, literal_eval, parse, walk
+from os import walk as walk_directory
+from os.path import dirname, isfile, join, realpath, relpath
+
+from nrt.tests.test_base import TestBase
+
+ROOT = dirname(dirname(dirname(realpath(__file__))))
+
+
+class TestSetup(TestBase):
+    """
+    A class containing unit tests for the setup script.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestSetup, self).setUp(*args, **{
+                                                "test_module_filename" : __file__
+                                                }
+                                    )
+
+
+    def test_packages_correct(self):
+        """
+        Tests that the setup script lists every package of nrt, so that an install ships all the
+        modules the Nrt imports.
+        """
+        if not isfile(join(ROOT, "setup.py")):
+            self.skipTest("The setup script is only available in a source tree.")
+
+        with open(join(ROOT, "setup.py"), "r") as handle:
+            tree = parse(handle.read())
+        packages = [literal_eval(node.value) for node in walk(tree) if isinstance(node, keyword) and node.arg == "packages"][0]
+
+        expected = []
+        for directory, directories, filenames in walk_directory(join(ROOT, "nrt")):
+            if "__init__.py" in filenames:
+                expected.append(relpath(directory, ROOT).replace("/", "."))
+        self.assertEqual(sorted(packages), sorted(expected))
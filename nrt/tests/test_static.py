@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the Static module.
+"""
+
+from nrt.blocks.location.static import StaticLocationBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestStatic(TestBase):
+    """
+    A class containing unit tests for the Static module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestStatic, self).setUp(*args, **{
+                                                "test_module_filename" : __file__
+                                                }
+                                    )
+        self.valid_location = "/static/"
+
+
+    def test_export_correct(self):
+        """
+        Tests that a static Location block renders the settings that make Nginx serve static
+        content fast, after the allow and deny rules.
+        """
+        handle_block = StaticLocationBlock(**{"allow" : ["all"], "location" : self.valid_location})
+        expected_response = (
+                                "    location /static/ {\n"
+                                "        allow all;\n"
+                                "        sendfile on;\n"
+                                "        tcp_nopush on;\n"
+                                "        open_file_cache max=10000 inactive=60s;\n"
+                                "        open_file_cache_valid 60s;\n"
+                                "        open_file_cache_min_uses 2;\n"
+                                "        open_file_cache_errors on;\n"
+                                "        expires 30d;\n"
+                                "        gzip_static on;\n"
+                                "    }\n"
+                                )
+        self.assertEqual(handle_block.export(), expected_response)
+        del handle_block
+
+
+    def test_export_correct_custom_settings(self):
+        """
+        Tests that the settings passed in replace the defaults, and that a Cache-Control header is
+        only added if asked for.
+        """
+        handle_block = StaticLocationBlock(**{
+                                                "cache_control" : "public, immutable",
+                                                "expires" : "max",
+                                                "location" : self.valid_location,
+                                                "open_file_cache" : "off",
+                                                }
+                                            )
+        response = handle_block.export()
+        self.assertTrue("        open_file_cache off;\n" in response)
+        self.assertTrue("        expires max;\n" in response)
+        self.assertTrue(response.endswith("        add_header Cache-Control \"public, immutable\";\n    }\n"))
+        del handle_block
+
+
+    def test_settings_wrong(self):
+        """
+        Tests that the proper exceptions are raised if a setting is unknown, is not a string or
+        does not have a valid value.
+        """
+        handle_block = StaticLocationBlock(**{"location" : self.valid_location})
+        self.assertRaises(ValueError, setattr, handle_block, "settings", ("autoindex", "on"))
+        self.assertRaises(ValueError, setattr, handle_block, "settings", ("sendfile", "yes"))
+        self.assertRaises(ValueError, setattr, handle_block, "settings", ("expires", "30 days"))
+        self.assertRaises(TypeError, setattr, handle_block, "settings", ("open_file_cache_min_uses", 2))
+        self.assertRaises(TypeError, setattr, handle_block, "settings", "sendfile")
+        self.assertEqual(handle_block.settings["sendfile"], "on")
+        del handle_block
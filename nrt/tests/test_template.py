@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the Template module.
+"""
+
+from nrt.blocks.template import Template
+from nrt.tests.test_base import TestBase
+
+
+class TestTemplate(TestBase):
+    """
+    A class containing unit tests for the Template module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestTemplate, self).setUp(*args, **{
+                                                    "test_module_filename" : __file__
+                                                    }
+                                        )
+        self.valid_source = "location {location} {{\n    proxy_pass http://{ip}:{port};\n}}\n"
+
+
+    def test_fields_correct(self):
+        """
+        Tests that the fields of a template are returned in the order they appear.
+        """
+        handle_template = Template(self.valid_source)
+        self.assertEqual(handle_template.fields, ["location", "ip", "port"])
+        del handle_template
+
+
+    def test_render_correct(self):
+        """
+        Tests that a template renders the same string str.format would.
+        """
+        values = {"location" : "/", "ip" : "127.0.0.1", "port" : "8000"}
+        handle_template = Template(self.valid_source)
+        self.assertEqual(handle_template.render(values), self.valid_source.format(**values))
+        self.assertEqual(handle_template.render(values), handle_template.render(values))
+        del handle_template
+
+
+    def test_render_correct_no_fields(self):
+        """
+        Tests that a template without fields renders its source, with literal braces unescaped.
+        """
+        handle_template = Template("}}\n")
+        self.assertEqual(handle_template.render({}), "}\n")
+        del handle_template
+
+
+    def test_render_wrong_missing_value(self):
+        """
+        Tests that a KeyError exception is raised if the value of any field is not given.
+        """
+        handle_template = Template(self.valid_source)
+        self.assertRaises(
+                            KeyError,
+                            handle_template.render,
+                            {"location" : "/"},
+                            )
+        del handle_template
+
+
+    def test_init_wrong_mistyped_source(self):
+        """
+        Tests that a TypeError exception is raised if the source of a template is not a string.
+        """
+        self.assertRaises(
+                            TypeError,
+                            Template,
+                            123,
+                            )
+
+
+    def test_init_wrong_format_spec(self):
+        """
+        Tests that a ValueError exception is raised if a field of the source comes with a format
+        spec or a conversion.
+        """
+        for source in ("{port:d}", "{port!r}", "{}"):
+            self.assertRaises(
+                                ValueError,
+                                Template,
+                                source,
+                                )
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the UpstreamBlock module.
+"""
+
+from nrt.blocks.upstream.base import UpstreamBlock
+from nrt.tests.test_base import TestBase
+
+
+class TestUpstreamBlock(TestBase):
+    """
+    A class containing unit tests for the UpstreamBlock module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestUpstreamBlock, self).setUp(*args, **{
+                                                        "test_module_filename" : __file__
+                                                        }
+                                            )
+        self.valid_name = "gunicorn_127_0_0_1_8000"
+
+
+    def test_export_correct(self):
+        """
+        Tests that an Upstream block is exported with its servers and its keepalive settings.
+        """
+        handle_upstream_block = UpstreamBlock(**{
+                                                    "keepalive" : "16",
+                                                    "name" : self.valid_name,
+                                                    "servers" : ["127.0.0.1:8000", "127.0.0.1:8000", "127.0.0.1:8001"],
+                                                    }
+                                                )
+        expected_response = "upstream gunicorn_127_0_0_1_8000 {\n    server 127.0.0.1:8000;\n    server 127.0.0.1:8001;\n    keepalive 16;\n    keepalive_requests 1000;\n}\n"
+        self.assertEqual("".join(handle_upstream_block.export()), expected_response)
+        del handle_upstream_block
+
+
+    def test_export_correct_methods(self):
+        """
+        Tests that an Upstream block renders its balancing method before its servers.
+        """
+        for method, expected_line in (("round_robin", ""), ("least_conn", "    least_conn;\n"), ("hash", "    hash $request_uri consistent;\n")):
+            handle_upstream_block = UpstreamBlock(**{
+                                                        "key" : "$request_uri consistent",
+                                                        "method" : method,
+                                                        "name" : self.valid_name,
+                                                        "servers" : ["127.0.0.1:8000"],
+                                                        }
+                                                    )
+            expected_response = "upstream gunicorn_127_0_0_1_8000 {\n%s    server 127.0.0.1:8000;\n" % (expected_line)
+            self.assertTrue("".join(handle_upstream_block.export()).startswith(expected_response))
+            del handle_upstream_block
+
+
+    def test_init_correct_default_values(self):
+        """
+        Tests that an Upstream block keeps 32 idle connections, each serving up to 1000 requests,
+        by default.
+        """
+        handle_upstream_block = UpstreamBlock(**{"name" : self.valid_name})
+        self.assertEqual(handle_upstream_block.keepalive, "32")
+        self.assertEqual(handle_upstream_block.keepalive_requests, "1000")
+        self.assertEqual(handle_upstream_block.servers, [])
+        self.assertEqual(handle_upstream_block.method, "round_robin")
+        self.assertEqual(handle_upstream_block.key, "$remote_addr")
+        del handle_upstream_block
+
+
+    def test_init_wrong_missing_name(self):
+        """
+        Tests that a ValueError exception is raised if the name of an Upstream block is not given.
+        """
+        self.assertRaises(
+                            ValueError,
+                            UpstreamBlock,
+                            **{}
+                            )
+
+
+    def test_keepalive_wrong(self):
+        """
+        Tests that the proper exceptions are raised if the keepalive settings are not strings of
+        digits.
+        """
+        handle_upstream_block = UpstreamBlock(**{"name" : self.valid_name})
+        for setting in ("keepalive", "keepalive_requests"):
+            self.assertRaises(ValueError, setattr, handle_upstream_block, setting, None)
+            self.assertRaises(ValueError, setattr, handle_upstream_block, setting, "many")
+            self.assertRaises(TypeError, setattr, handle_upstream_block, setting, 32)
+        del handle_upstream_block
+
+
+    def test_method_wrong(self):
+        """
+        Tests that a ValueError exception is raised if the balancing method is not supported.
+        """
+        handle_upstream_block = UpstreamBlock(**{"name" : self.valid_name})
+        self.assertRaises(ValueError, setattr, handle_upstream_block, "method", "random")
+        self.assertRaises(TypeError, setattr, handle_upstream_block, "method", 1)
+        del handle_upstream_block
+
+
+    def test_servers_wrong_mistyped(self):
+        """
+        Tests that a TypeError exception is raised if a server is not given as a string.
+        """
+        handle_upstream_block = UpstreamBlock(**{"name" : self.valid_name})
+        self.assertRaises(TypeError, setattr, handle_upstream_block, "servers", 8000)
+        del handle_upstream_block
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module tests the Vhost module.
+"""
+
+from os import listdir
+from os.path import isdir, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest.mock import patch
+
+from nrt.tests.test_base import TestBase
+from nrt.vhost import commit, file_fingerprint, fingerprint, fsync_files, read_manifest, stage, STAGING, unmanaged, write, write_manifest
+
+
+class TestVhost(TestBase):
+    """
+    A class containing unit tests for the Vhost module.
+    """
+    def setUp(self, *args, **kwargs):
+        '''
+        Initializes whatever is needed during the tests.
+        '''
+        super(TestVhost, self).setUp(*args, **{
+                                                "test_module_filename" : __file__
+                                                }
+                                    )
+        self.path = mkdtemp()
+        self.valid_fragments = ["server {\n", "    listen 0.0.0.0:80;\n", "}\n"]
+
+
+    def tearDown(self):
+        '''
+        Removes whatever was written during the tests.
+        '''
+        rmtree(self.path)
+
+
+    def test_commit_correct(self):
+        """
+        Tests that commit moves the staged files over their counterparts, removes the given files
+        and the staging directory, and fsyncs the directory.
+        """
+        write(join(self.path, "a.b.c.conf"), ["old\n"])
+        write(join(self.path, "d.e.f.conf"), ["old\n"])
+        staging = stage(self.path)
+        write(join(staging, "a.b.c.conf"), ["new\n"])
+        write(join(staging, "g.h.i.conf"), ["new\n"])
+        with patch("nrt.vhost.fsync_directory") as fsync_directory:
+            commit(self.path, staging, ["a.b.c.conf", "g.h.i.conf"], ["d.e.f.conf"])
+        fsync_directory.assert_called_once_with(self.path)
+        self.assertEqual(sorted(listdir(self.path)), ["a.b.c.conf", "g.h.i.conf"])
+        with open(join(self.path, "a.b.c.conf")) as handle:
+            self.assertEqual(handle.read(), "new\n")
+
+
+    def test_file_fingerprint_correct(self):
+        """
+        Tests that the fingerprint of a written file matches the one of the fragments it was
+        written from.
+        """
+        filename = join(self.path, "a.b.c.conf")
+        write(filename, iter(self.valid_fragments))
+        self.assertEqual(file_fingerprint(filename), fingerprint(iter(self.valid_fragments)))
+        self.assertNotEqual(file_fingerprint(filename), fingerprint(self.valid_fragments[:-1]))
+
+
+    def test_file_fingerprint_correct_missing_file(self):
+        """
+        Tests that the fingerprint of a file that does not exist is None.
+        """
+        self.assertEqual(file_fingerprint(join(self.path, "missing.conf")), None)
+
+
+    def test_fsync_files_correct(self):
+        """
+        Tests that fsync_files fsyncs each of the given files once.
+        """
+        filenames = [join(self.path, "%d.conf" % (index)) for index in range(5)]
+        for filename in filenames:
+            write(filename, self.valid_fragments)
+        with patch("nrt.vhost.fsync") as fsync:
+            fsync_files(filenames, batch_size=2)
+        self.assertEqual(fsync.call_count, 5)
+
+
+    def test_manifest_correct(self):
+        """
+        Tests that a manifest lists the virtual host files it was written with, and that a
+        directory without manifest lists none.
+        """
+        self.assertEqual(read_manifest(self.path), set())
+        write_manifest(self.path, set(["a.b.c.conf", "d.e.f.conf"]))
+        self.assertEqual(read_manifest(self.path), set(["a.b.c.conf", "d.e.f.conf"]))
+
+
+    def test_stage_correct(self):
+        """
+        Tests that stage creates the staging directory, and empties it if an interrupted export
+        left any file there.
+        """
+        staging = stage(self.path)
+        self.assertEqual(staging, join(self.path, STAGING))
+        self.assertTrue(isdir(staging))
+        write(join(staging, "a.b.c.conf"), self.valid_fragments)
+        self.assertEqual(stage(self.path), staging)
+        self.assertEqual(listdir(staging), [])
+
+
+    def test_unmanaged_correct(self):
+        """
+        Tests that unmanaged returns the given files which exist but are not listed by the
+        manifest.
+        """
+        write_manifest(self.path, set(["a.b.c.conf"]))
+        for vhost in ("a.b.c.conf", "d.e.f.conf"):
+            write(join(self.path, vhost), self.valid_fragments)
+        self.assertEqual(unmanaged(self.path, ["g.h.i.conf", "d.e.f.conf", "a.b.c.conf"]), ["d.e.f.conf"])
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module provides the helpers used by an Nginx Resolution Tree to write its virtual host files.
+
+Exporting an Nrt is incremental. The content of each virtual host file is fingerprinted while it is
+rendered, and compared with the fingerprint of the file already on disk: a file is only written if
+it is new or if its content changed. Nginx, in turn, only needs to be reloaded if any file was
+added, changed or removed.
+
+To tell which files it is responsible of, an export keeps a manifest, a hidden file listing the
+virtual host files it wrote, in the directory it exports to. Files listed by the manifest that do
+not belong to the Nrt anymore are removed. Files not listed by it are never touched: an export
+which would overwrite any of them, as told by unmanaged, is refused.
+
+Each virtual host file is exported independently of the others, by export_vhost, from the server
+blocks it is made of. Exports can thus be fanned out over a pool of threads or processes, which are
+handed batches of files through export_vhosts to keep the cost of each hand over low.
+
+Nginx must never read a half written file. Files are thus not written in place but into a staging
+directory, a hidden subdirectory of the directory being exported to, so that both are on the same
+file system. Once all the files are staged, commit fsyncs them in batches, renames each over its
+counterpart, which atomically replaces it, and fsyncs the directory once to make all the renames
+durable.
+
+The blocks the server blocks rely on, such as the Upstream blocks they proxy to, the proxy cache
+zones they cache into or the sizing of the server names hash tables, are shared by all the virtual
+host files, and are exported once, to files of their own, along with them. Their names cannot clash
+with the one of a virtual host file, since server names cannot hold dashes.
+"""
+
+from collections import namedtuple
+from hashlib import sha1
+from os import close, fsync, listdir, mkdir, O_RDONLY, open as os_open, remove, replace, rmdir
+from os.path import basename, isdir, isfile, join
+
+CACHES = "nrt-caches.conf"
+ENCODING = "utf-8"
+FSYNC_BATCH_SIZE = 256
+MANIFEST = ".nrt.manifest"
+READ_SIZE = 65536
+SERVER_NAMES_HASH = "nrt-server-names-hash.conf"
+STAGING = ".nrt.staging"
+UPSTREAMS = "nrt-upstreams.conf"
+
+Changes = namedtuple("Changes", ["added", "changed", "removed", "saved", "trimmed"])
+
+
+def fingerprint(fragments):
+    """
+    Returns the fingerprint of the content made of the given fragments, consuming them one at a
+    time.
+    """
+    digest = sha1()
+    for fragment in fragments:
+        digest.update(fragment.encode(ENCODING))
+    return digest.hexdigest()
+
+
+def commit(path, staging, filenames, removed):
+    """
+    Moves the given files from the staging directory into the given directory. The staged files
+    are fsynced in batches first, then each is renamed over its counterpart. The given removed
+    files are then deleted and, finally, the directory is fsynced once, making all the renames and
+    removals durable. The staging directory is removed.
+    """
+    fsync_files([join(staging, filename) for filename in filenames])
+    for filename in filenames:
+        replace(join(staging, filename), join(path, filename))
+    for filename in removed:
+        if isfile(join(path, filename)):
+            remove(join(path, filename))
+    fsync_directory(path)
+    rmdir(staging)
+
+
+def export_vhost(filename, server_blocks, staging):
+    """
+    Exports the given server blocks to the given virtual host file, unless the file already has
+    the very same content. The file is not written in place but into the staging directory, from
+    which commit will move it. Returns a pair made of "added" or "changed" if the file was staged,
+    None otherwise, and of the number of bytes minimizing the server blocks saved. The server
+    blocks must hold their Location blocks in a list, since they are rendered twice if the file
+    has to be written: once to fingerprint them and once to write them.
+    """
+    on_disk = file_fingerprint(filename)
+    if on_disk is None:
+        change = "added"
+    elif on_disk != fingerprint(fragments(server_blocks)):
+        change = "changed"
+    else:
+        return None, trimmed(server_blocks)
+
+    write(join(staging, basename(filename)), fragments(server_blocks))
+    return change, trimmed(server_blocks)
+
+
+def export_vhosts(jobs, staging):
+    """
+    Exports a batch of virtual host files, given as a list of (filename, server_blocks) pairs.
+    Returns the outcome of export_vhost for each of them, in order.
+    """
+    return [export_vhost(filename, server_blocks, staging) for filename, server_blocks in jobs]
+
+
+def file_fingerprint(filename):
+    """
+    Returns the fingerprint of the content of the given file, or None if it does not exist. The
+    file is read in chunks, so that it is never loaded in memory as a whole.
+    """
+    if not isfile(filename):
+        return None
+
+    digest = sha1()
+    with open(filename, "rb") as handle:
+        for chunk in iter(lambda: handle.read(READ_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fsync_directory(path):
+    """
+    Fsyncs the given directory, making the creation, renaming and removal of its files durable.
+    """
+    descriptor = os_open(path, O_RDONLY)
+    try:
+        fsync(descriptor)
+    finally:
+        close(descriptor)
+
+
+def fsync_files(filenames, batch_size=FSYNC_BATCH_SIZE):
+    """
+    Fsyncs the given files, which are expected to be already written and closed. The files are
+    opened a batch at a time and fsynced together, so that the file system can flush their data
+    at once rather than file after file.
+    """
+    for start in range(0, len(filenames), batch_size):
+        descriptors = []
+        try:
+            for filename in filenames[start:start + batch_size]:
+                descriptors.append(os_open(filename, O_RDONLY))
+            for descriptor in descriptors:
+                fsync(descriptor)
+        finally:
+            for descriptor in descriptors:
+                close(descriptor)
+
+
+def fragments(server_blocks):
+    """
+    Yields the content of a virtual host file holding the given server blocks, as a stream of
+    fragments.
+    """
+    for index, server_block in enumerate(server_blocks):
+        if index:
+            yield "\n"
+        for fragment in server_block.export():
+            yield fragment
+
+
+def read_manifest(path):
+    """
+    Returns the set of the virtual host files listed by the manifest of the given directory, which
+    is empty if the directory has no manifest.
+    """
+    manifest = join(path, MANIFEST)
+    if not isfile(manifest):
+        return set()
+
+    with open(manifest, "r", encoding=ENCODING) as handle:
+        return set(line.strip() for line in handle if line.strip())
+
+
+def unmanaged(path, vhosts):
+    """
+    Returns the sorted list of the given virtual host files which exist in the given directory
+    but are not listed by its manifest, that is, which were not written by an export.
+    """
+    manifest = read_manifest(path)
+    return sorted(vhost for vhost in vhosts if vhost not in manifest and isfile(join(path, vhost)))
+
+
+def write_manifest(path, vhosts):
+    """
+    Writes the manifest of the given directory, listing the given virtual host files.
+    """
+    with open(join(path, MANIFEST), "w", encoding=ENCODING, newline="") as handle:
+        handle.writelines("%s\n" % (vhost) for vhost in sorted(vhosts))
+
+
+def stage(path):
+    """
+    Returns the staging directory of the given directory, creating it if needed. Any file left
+    there by an interrupted export is removed.
+    """
+    staging = join(path, STAGING)
+    if isdir(staging):
+        for filename in listdir(staging):
+            remove(join(staging, filename))
+    else:
+        mkdir(staging)
+    return staging
+
+
+def trimmed(blocks):
+    """
+    Returns the number of bytes minimizing the given blocks saved, the last time they were
+    rendered. Only server blocks can be minimized.
+    """
+    return sum(getattr(block, "trimmed", 0) for block in blocks)
+
+
+def write(filename, fragments):
+    """
+    Writes the given fragments, in order, to the given file through buffered writes.
+    """
+    with open(filename, "w", encoding=ENCODING, newline="") as handle:
+        handle.writelines(fragments)
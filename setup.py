@@ -12,8 +12,12 @@ setup(
     packages =[
                 'nrt',
                 'nrt.blocks',
+                'nrt.blocks.cache_path',
                 'nrt.blocks.location',
+                'nrt.blocks.map',
                 'nrt.blocks.server',
+                'nrt.blocks.server_names_hash',
+                'nrt.blocks.upstream',
                 'nrt.tests',
                 ],
     scripts = [],